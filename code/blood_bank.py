@@ -1,35 +1,109 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
 import sqlite3
-from datetime import datetime
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import hashlib
-import gettext
+from datetime import datetime, timedelta
+import heapq
+import gzip
+import json
 import logging
-import unittest
 import csv
+import os
+import queue
+import threading
+import time
+from passwords import hash_password
+import passwords
+from startup import STARTUP_BUDGET_MS
+import startup
+from translations import _, set_language
+import translations
+from notifications import EMAIL_BATCH_SIZE, NotificationDispatcher, send_email_notification
+
+# matplotlib, smtplib, email, NumPy and the translations are loaded where they are
+# used, so windows that don't chart, send email or translate open without them.
+# The tests are in test_blood_bank.py and are only imported to run them.
+
+
+MAX_DATE_ORDINAL = datetime.max.toordinal() + 1
+_treeview_rows = {}
+
+# Report settings
+DONATION_BUCKETS = {
+    'day': "date",
+    'week': "date(date, 'weekday 0', '-6 days')",  # the Monday starting the week
+    'month': "strftime('%Y-%m-01', date)",
+}
+REPORT_CACHE_SIZE = 64
+_report_cache = {}
+
+# Translation settings
+TEXT_DOMAIN = 'blood_bank'
+translations.text_domain = TEXT_DOMAIN
+
+# Startup settings
+LAZY_MODULES = ('matplotlib', 'smtplib', 'email', 'numpy', 'unittest')
+
+# Database settings
+DB_PATH = 'blood_bank.db'
+
+# Replication settings
+REPLICATION_BATCH_SIZE = 5000
+REPLICATED_TABLES = {
+    'donors': ('id', 'name', 'blood_type', 'contact', 'last_donation_date'),
+    'inventory': ('id', 'blood_type', 'quantity', 'expiration_date'),
+    'donations': ('id', 'donor_id', 'blood_type', 'quantity', 'date'),
+}
+
+# Blood compatibility settings
+BLOOD_TYPES = ["O-", "O+", "A-", "A+", "B-", "B+", "AB-", "AB+"]
+DONATION_INTERVAL_DAYS = 56  # days a donor must wait between whole blood donations
+EXPIRY_WINDOWS_DAYS = (1, 3, 7)  # stock dashboard columns: expiring within 24h, 72h and 7 days
+BLOOD_SHELF_LIFE_DAYS = 42  # days donated red cells can be stored
+IMPORT_CHUNK_SIZE = 5000
+ALLOCATE_ATTEMPTS = 3  # times an issue is replanned after another writer changed the lots it chose
+
+# Open a connection to the blood bank database
+def connect(db_path=None):
+    """
+    Open a connection to the blood bank database.
+
+    Parameters:
+    db_path (str): The path to the database, DB_PATH by default.
+
+    Returns:
+    sqlite3.Connection: The new connection.
+    """
+    return sqlite3.connect(db_path or DB_PATH)
 
 # Initialize the database
-def init_db():
+def init_db(db_path=None):
     """
     Initialize the database by creating the necessary tables if they do not exist.
+
+    Parameters:
+    db_path (str): The path to the blood bank database, DB_PATH by default.
     """
-    conn = sqlite3.connect('blood_bank.db')
+    conn = connect(db_path)
     c = conn.cursor()
     c.execute('''CREATE TABLE IF NOT EXISTS donors (
                     id INTEGER PRIMARY KEY,
                     name TEXT NOT NULL,
                     blood_type TEXT NOT NULL,
-                    contact TEXT NOT NULL)''')
+                    contact TEXT NOT NULL,
+                    last_donation_date TEXT)''')
     c.execute('''CREATE TABLE IF NOT EXISTS inventory (
                     id INTEGER PRIMARY KEY,
                     blood_type TEXT NOT NULL,
-                    quantity INTEGER NOT NULL,
+                    quantity INTEGER NOT NULL CHECK (quantity >= 0),
                     expiration_date TEXT NOT NULL)''')
+    # SQLite can't add a CHECK to an existing table, so older databases get triggers instead
+    c.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'inventory'")
+    if 'CHECK (quantity >= 0)' not in c.fetchone()[0]:
+        for event in ('INSERT', 'UPDATE OF quantity'):
+            c.execute(f'''CREATE TRIGGER IF NOT EXISTS inventory_quantity_check_{event.split()[0].lower()} BEFORE {event} ON inventory
+                          WHEN NEW.quantity < 0 BEGIN
+                              SELECT RAISE(ABORT, 'CHECK constraint failed: quantity >= 0');
+                          END''')
     c.execute('''CREATE TABLE IF NOT EXISTS donations (
                     id INTEGER PRIMARY KEY,
                     donor_id INTEGER,
@@ -42,242 +116,1586 @@ def init_db():
                     username TEXT NOT NULL UNIQUE,
                     password TEXT NOT NULL,
                     role TEXT NOT NULL)''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_inventory_type_expiry ON inventory(blood_type, expiration_date)")
+
+    # Databases created before donors had last_donation_date get it filled in from their donations
+    c.execute("PRAGMA table_info(donors)")
+    if 'last_donation_date' not in [column[1] for column in c.fetchall()]:
+        c.execute("ALTER TABLE donors ADD COLUMN last_donation_date TEXT")
+        c.execute("UPDATE donors SET last_donation_date = (SELECT MAX(date) FROM donations WHERE donations.donor_id = donors.id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_donors_type_last_donation ON donors(blood_type, last_donation_date)")
+    # Derived from last_donation_date, so it is current as soon as a donation is recorded.
+    # The interval is fixed into the schema when the column is added.
+    c.execute("PRAGMA table_xinfo(donors)")
+    if 'next_eligible_date' not in [column[1] for column in c.fetchall()]:
+        c.execute(f'''ALTER TABLE donors ADD COLUMN next_eligible_date TEXT
+                      GENERATED ALWAYS AS (date(last_donation_date, '+{DONATION_INTERVAL_DAYS} days')) VIRTUAL''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_donors_next_eligible ON donors(next_eligible_date)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_donations_donor_date ON donations(donor_id, date)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_donors_name_contact ON donors(name, contact)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_donors_contact ON donors(contact)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_donations_date ON donations(date)")
+    c.execute('''CREATE TRIGGER IF NOT EXISTS donations_last_date_insert AFTER INSERT ON donations BEGIN
+                    UPDATE donors SET last_donation_date = NEW.date
+                    WHERE id = NEW.donor_id AND (last_donation_date IS NULL OR last_donation_date < NEW.date);
+                END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS donations_last_date_delete AFTER DELETE ON donations BEGIN
+                    UPDATE donors SET last_donation_date = (SELECT MAX(date) FROM donations WHERE donor_id = OLD.donor_id)
+                    WHERE id = OLD.donor_id;
+                END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS donations_last_date_update AFTER UPDATE OF donor_id, date ON donations BEGIN
+                    UPDATE donors SET last_donation_date = (SELECT MAX(date) FROM donations WHERE donor_id = donors.id)
+                    WHERE id IN (OLD.donor_id, NEW.donor_id);
+                END''')
+
+    # Stock summaries for the dashboard, kept up to date by triggers
+    c.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('inventory_by_expiry', 'donation_totals', 'donations_by_day')")
+    existing_summaries = {row[0] for row in c.fetchall()}
+    c.execute('''CREATE TABLE IF NOT EXISTS inventory_by_expiry (
+                    blood_type TEXT NOT NULL,
+                    expiration_date TEXT NOT NULL,
+                    units INTEGER NOT NULL,
+                    PRIMARY KEY (blood_type, expiration_date))''')
+    c.execute('''CREATE TABLE IF NOT EXISTS donation_totals (
+                    blood_type TEXT PRIMARY KEY,
+                    donations INTEGER NOT NULL,
+                    units INTEGER NOT NULL)''')
+    c.execute('''CREATE TABLE IF NOT EXISTS donations_by_day (
+                    date TEXT NOT NULL,
+                    blood_type TEXT NOT NULL,
+                    donations INTEGER NOT NULL,
+                    units INTEGER NOT NULL,
+                    PRIMARY KEY (date, blood_type)) WITHOUT ROWID''')
+    c.execute('''CREATE TABLE IF NOT EXISTS donation_generation (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    generation INTEGER NOT NULL)''')
+    c.execute("INSERT OR IGNORE INTO donation_generation (id, generation) VALUES (1, 0)")
+    if 'inventory_by_expiry' not in existing_summaries:
+        c.execute('''INSERT INTO inventory_by_expiry (blood_type, expiration_date, units)
+                     SELECT blood_type, expiration_date, SUM(quantity) FROM inventory GROUP BY blood_type, expiration_date''')
+    if 'donation_totals' not in existing_summaries:
+        c.execute('''INSERT INTO donation_totals (blood_type, donations, units)
+                     SELECT blood_type, COUNT(*), SUM(quantity) FROM donations GROUP BY blood_type''')
+    if 'donations_by_day' not in existing_summaries:
+        c.execute('''INSERT INTO donations_by_day (date, blood_type, donations, units)
+                     SELECT date, blood_type, COUNT(*), SUM(quantity) FROM donations GROUP BY date, blood_type''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS inventory_by_expiry_insert AFTER INSERT ON inventory BEGIN
+                    INSERT INTO inventory_by_expiry (blood_type, expiration_date, units)
+                    VALUES (NEW.blood_type, NEW.expiration_date, NEW.quantity)
+                    ON CONFLICT(blood_type, expiration_date) DO UPDATE SET units = units + excluded.units;
+                END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS inventory_by_expiry_delete AFTER DELETE ON inventory BEGIN
+                    UPDATE inventory_by_expiry SET units = units - OLD.quantity
+                    WHERE blood_type = OLD.blood_type AND expiration_date = OLD.expiration_date;
+                    DELETE FROM inventory_by_expiry
+                    WHERE blood_type = OLD.blood_type AND expiration_date = OLD.expiration_date AND units = 0;
+                END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS inventory_by_expiry_update AFTER UPDATE OF blood_type, quantity, expiration_date ON inventory BEGIN
+                    UPDATE inventory_by_expiry SET units = units - OLD.quantity
+                    WHERE blood_type = OLD.blood_type AND expiration_date = OLD.expiration_date;
+                    DELETE FROM inventory_by_expiry
+                    WHERE blood_type = OLD.blood_type AND expiration_date = OLD.expiration_date AND units = 0;
+                    INSERT INTO inventory_by_expiry (blood_type, expiration_date, units)
+                    VALUES (NEW.blood_type, NEW.expiration_date, NEW.quantity)
+                    ON CONFLICT(blood_type, expiration_date) DO UPDATE SET units = units + excluded.units;
+                END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS donation_totals_insert AFTER INSERT ON donations BEGIN
+                    INSERT INTO donation_totals (blood_type, donations, units) VALUES (NEW.blood_type, 1, NEW.quantity)
+                    ON CONFLICT(blood_type) DO UPDATE SET donations = donations + 1, units = units + excluded.units;
+                END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS donation_totals_delete AFTER DELETE ON donations BEGIN
+                    UPDATE donation_totals SET donations = donations - 1, units = units - OLD.quantity WHERE blood_type = OLD.blood_type;
+                    DELETE FROM donation_totals WHERE blood_type = OLD.blood_type AND donations = 0;
+                END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS donation_totals_update AFTER UPDATE OF blood_type, quantity ON donations BEGIN
+                    UPDATE donation_totals SET donations = donations - 1, units = units - OLD.quantity WHERE blood_type = OLD.blood_type;
+                    DELETE FROM donation_totals WHERE blood_type = OLD.blood_type AND donations = 0;
+                    INSERT INTO donation_totals (blood_type, donations, units) VALUES (NEW.blood_type, 1, NEW.quantity)
+                    ON CONFLICT(blood_type) DO UPDATE SET donations = donations + 1, units = units + excluded.units;
+                END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS donations_by_day_insert AFTER INSERT ON donations BEGIN
+                    INSERT INTO donations_by_day (date, blood_type, donations, units) VALUES (NEW.date, NEW.blood_type, 1, NEW.quantity)
+                    ON CONFLICT(date, blood_type) DO UPDATE SET donations = donations + 1, units = units + excluded.units;
+                    UPDATE donation_generation SET generation = generation + 1;
+                END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS donations_by_day_delete AFTER DELETE ON donations BEGIN
+                    UPDATE donations_by_day SET donations = donations - 1, units = units - OLD.quantity
+                    WHERE date = OLD.date AND blood_type = OLD.blood_type;
+                    DELETE FROM donations_by_day WHERE date = OLD.date AND blood_type = OLD.blood_type AND donations = 0;
+                    UPDATE donation_generation SET generation = generation + 1;
+                END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS donations_by_day_update AFTER UPDATE OF date, blood_type, quantity ON donations BEGIN
+                    UPDATE donations_by_day SET donations = donations - 1, units = units - OLD.quantity
+                    WHERE date = OLD.date AND blood_type = OLD.blood_type;
+                    DELETE FROM donations_by_day WHERE date = OLD.date AND blood_type = OLD.blood_type AND donations = 0;
+                    INSERT INTO donations_by_day (date, blood_type, donations, units) VALUES (NEW.date, NEW.blood_type, 1, NEW.quantity)
+                    ON CONFLICT(date, blood_type) DO UPDATE SET donations = donations + 1, units = units + excluded.units;
+                    UPDATE donation_generation SET generation = generation + 1;
+                END''')
+
+    # Append-only change log for replication, kept up to date by triggers
+    c.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'change_log'")
+    new_change_log = c.fetchone() is None
+    c.execute('''CREATE TABLE IF NOT EXISTS change_log (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    table_name TEXT NOT NULL,
+                    row_id INTEGER NOT NULL,
+                    operation TEXT NOT NULL,
+                    row_data TEXT,
+                    changed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP)''')
+    if new_change_log:
+        # Log the rows already present, so a new replica can start from sequence 0
+        c.execute('''INSERT INTO change_log (table_name, row_id, operation, row_data)
+                     SELECT 'donors', id, 'insert', json_object('id', id, 'name', name, 'blood_type', blood_type,
+                                                                'contact', contact, 'last_donation_date', last_donation_date)
+                     FROM donors ORDER BY id''')
+        c.execute('''INSERT INTO change_log (table_name, row_id, operation, row_data)
+                     SELECT 'inventory', id, 'insert', json_object('id', id, 'blood_type', blood_type,
+                                                                   'quantity', quantity, 'expiration_date', expiration_date)
+                     FROM inventory ORDER BY id''')
+        c.execute('''INSERT INTO change_log (table_name, row_id, operation, row_data)
+                     SELECT 'donations', id, 'insert', json_object('id', id, 'donor_id', donor_id, 'blood_type', blood_type,
+                                                                   'quantity', quantity, 'date', date)
+                     FROM donations ORDER BY id''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS donors_log_insert AFTER INSERT ON donors BEGIN
+                    INSERT INTO change_log (table_name, row_id, operation, row_data)
+                    VALUES ('donors', NEW.id, 'insert', json_object('id', NEW.id, 'name', NEW.name, 'blood_type', NEW.blood_type,
+                                                                    'contact', NEW.contact, 'last_donation_date', NEW.last_donation_date));
+                END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS donors_log_update AFTER UPDATE ON donors BEGIN
+                    INSERT INTO change_log (table_name, row_id, operation, row_data)
+                    VALUES ('donors', NEW.id, 'update', json_object('id', NEW.id, 'name', NEW.name, 'blood_type', NEW.blood_type,
+                                                                    'contact', NEW.contact, 'last_donation_date', NEW.last_donation_date));
+                END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS donors_log_delete AFTER DELETE ON donors BEGIN
+                    INSERT INTO change_log (table_name, row_id, operation) VALUES ('donors', OLD.id, 'delete');
+                END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS inventory_log_insert AFTER INSERT ON inventory BEGIN
+                    INSERT INTO change_log (table_name, row_id, operation, row_data)
+                    VALUES ('inventory', NEW.id, 'insert', json_object('id', NEW.id, 'blood_type', NEW.blood_type,
+                                                                       'quantity', NEW.quantity, 'expiration_date', NEW.expiration_date));
+                END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS inventory_log_update AFTER UPDATE ON inventory BEGIN
+                    INSERT INTO change_log (table_name, row_id, operation, row_data)
+                    VALUES ('inventory', NEW.id, 'update', json_object('id', NEW.id, 'blood_type', NEW.blood_type,
+                                                                       'quantity', NEW.quantity, 'expiration_date', NEW.expiration_date));
+                END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS inventory_log_delete AFTER DELETE ON inventory BEGIN
+                    INSERT INTO change_log (table_name, row_id, operation) VALUES ('inventory', OLD.id, 'delete');
+                END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS donations_log_insert AFTER INSERT ON donations BEGIN
+                    INSERT INTO change_log (table_name, row_id, operation, row_data)
+                    VALUES ('donations', NEW.id, 'insert', json_object('id', NEW.id, 'donor_id', NEW.donor_id, 'blood_type', NEW.blood_type,
+                                                                       'quantity', NEW.quantity, 'date', NEW.date));
+                END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS donations_log_update AFTER UPDATE ON donations BEGIN
+                    INSERT INTO change_log (table_name, row_id, operation, row_data)
+                    VALUES ('donations', NEW.id, 'update', json_object('id', NEW.id, 'donor_id', NEW.donor_id, 'blood_type', NEW.blood_type,
+                                                                       'quantity', NEW.quantity, 'date', NEW.date));
+                END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS donations_log_delete AFTER DELETE ON donations BEGIN
+                    INSERT INTO change_log (table_name, row_id, operation) VALUES ('donations', OLD.id, 'delete');
+                END''')
     conn.commit()
     conn.close()
     logging.info("Database initialized.")
 
-# Add a new donor
-def add_donor():
-    name = entry_name.get()
-    blood_type = entry_blood_type.get()
-    contact = entry_contact.get()
-    conn = sqlite3.connect('blood_bank.db')
-    c = conn.cursor()
-    c.execute("INSERT INTO donors (name, blood_type, contact) VALUES (?, ?, ?)",
-              (name, blood_type, contact))
-    conn.commit()
-    conn.close()
-    messagebox.showinfo("Success", "Donor added successfully!")
-    clear_entries()
-    view_donors()
-
-# Update donor information
-def update_donor():
-    name = entry_name.get()
-    blood_type = entry_blood_type.get()
-    contact = entry_contact.get()
-    conn = sqlite3.connect('blood_bank.db')
-    c = conn.cursor()
-    c.execute("UPDATE donors SET blood_type = ?, contact = ? WHERE name = ?", (blood_type, contact, name))
-    conn.commit()
-    conn.close()
-    messagebox.showinfo("Success", "Donor information updated successfully!")
-    clear_entries()
-    view_donors()
-
-# Delete a donor
-def delete_donor():
-    name = entry_name.get()
-    conn = sqlite3.connect('blood_bank.db')
-    c = conn.cursor()
-    c.execute("DELETE FROM donors WHERE name = ?", (name,))
-    conn.commit()
-    conn.close()
-    messagebox.showinfo("Success", "Donor deleted successfully!")
-    clear_entries()
-    view_donors()
-
-# Search for a donor by name
-def search_donor():
-    name = entry_name.get()
-    conn = sqlite3.connect('blood_bank.db')
-    c = conn.cursor()
-    c.execute("SELECT * FROM donors WHERE name = ?", (name,))
-    rows = c.fetchall()
-    conn.close()
-    if rows:
-        messagebox.showinfo("Donor Found", f"Name: {rows[0][1]}, Blood Type: {rows[0][2]}, Contact: {rows[0][3]}")
-    else:
-        messagebox.showinfo("Donor Not Found", "No donor found with the given name.")
-
-# Add blood to inventory
-def add_blood():
-    blood_type = entry_blood_type.get()
-    quantity = entry_quantity.get()
-    expiration_date = entry_expiration_date.get()
-    conn = sqlite3.connect('blood_bank.db')
-    c = conn.cursor()
-    c.execute("INSERT INTO inventory (blood_type, quantity, expiration_date) VALUES (?, ?, ?)",
-              (blood_type, quantity, expiration_date))
-    conn.commit()
-    conn.close()
-    messagebox.showinfo("Success", "Blood added to inventory successfully!")
-    clear_entries()
-    view_inventory()
-
-# Update blood inventory
-def update_inventory():
-    blood_type = entry_blood_type.get()
-    quantity = entry_quantity.get()
-    conn = sqlite3.connect('blood_bank.db')
-    c = conn.cursor()
-    c.execute("UPDATE inventory SET quantity = ? WHERE blood_type = ?", (quantity, blood_type))
-    conn.commit()
-    conn.close()
-    messagebox.showinfo("Success", "Blood inventory updated successfully!")
-    clear_entries()
-    view_inventory()
-
-# Record a donation
-def record_donation():
-    donor_name = entry_name.get()
-    blood_type = entry_blood_type.get()
-    quantity = entry_quantity.get()
-    date = entry_date.get()
-    conn = sqlite3.connect('blood_bank.db')
-    c = conn.cursor()
-    c.execute("SELECT id FROM donors WHERE name = ?", (donor_name,))
-    donor_id = c.fetchone()[0]
-    c.execute("INSERT INTO donations (donor_id, blood_type, quantity, date) VALUES (?, ?, ?, ?)",
-              (donor_id, blood_type, quantity, date))
-    conn.commit()
-    conn.close()
-    messagebox.showinfo("Success", "Donation recorded successfully!")
-    clear_entries()
-    view_donations()
-
-# View donors in a table
-def view_donors():
-    for i in tree_donors.get_children():
-        tree_donors.delete(i)
-    conn = sqlite3.connect('blood_bank.db')
-    c = conn.cursor()
-    c.execute("SELECT * FROM donors")
-    rows = c.fetchall()
-    conn.close()
-    for row in rows:
-        tree_donors.insert("", "end", values=row)
-
-# View inventory in a table
-def view_inventory():
-    for i in tree_inventory.get_children():
-        tree_inventory.delete(i)
-    conn = sqlite3.connect('blood_bank.db')
+# Convert a YYYY-MM-DD date to a day number
+def date_ordinal(date_text):
+    """
+    Convert a date to its proleptic Gregorian ordinal.
+
+    Parameters:
+    date_text (str): The date (YYYY-MM-DD).
+
+    Returns:
+    int: The day number, 1 for 0001-01-01.
+
+    Raises:
+    ValueError: If the date is not in YYYY-MM-DD format.
+    """
+    return datetime.strptime(date_text, '%Y-%m-%d').toordinal()
+
+# Running totals over expiration dates
+class FenwickTree:
+    def __init__(self, size):
+        """
+        Initialize the FenwickTree class. Nodes are kept in a dict, so only the
+        dates that have stock take up memory.
+
+        Parameters:
+        size (int): The number of positions, indexed from 0.
+        """
+        self.size = size
+        self.tree = {}
+
+    def add(self, position, delta):
+        """
+        Add delta to the value at a position in O(log size).
+        """
+        position += 1
+        while position <= self.size:
+            self.tree[position] = self.tree.get(position, 0) + delta
+            position += position & -position
+
+    def prefix_sum(self, position):
+        """
+        Return the sum of the values at positions 0 to position in O(log size).
+        """
+        total = 0
+        position = min(position + 1, self.size)
+        while position > 0:
+            total += self.tree.get(position, 0)
+            position -= position & -position
+        return total
+
+# First-expiring-first-out blood inventory
+class InventoryIndex:
+    def __init__(self, db_path=None):
+        """
+        Initialize the InventoryIndex class and load the inventory table.
+
+        For each blood type the index keeps a heap of lots ordered by expiration
+        date, used to issue units first-expiring-first-out, and a Fenwick tree of
+        units by expiration date, used to count the units that last until a date.
+        All changes to the inventory table must go through this class to keep it
+        in sync; call load() after changing the table any other way.
+
+        Parameters:
+        db_path (str): The path to the blood bank database, DB_PATH by default.
+        """
+        self.db_path = db_path or DB_PATH
+        self.lock = threading.RLock()
+        self.load()
+
+    def load(self):
+        """
+        Rebuild the index from the inventory table.
+        """
+        conn = connect(self.db_path)
+        c = conn.cursor()
+        c.execute("SELECT id, blood_type, quantity, expiration_date FROM inventory WHERE quantity > 0")
+        rows = c.fetchall()
+        conn.close()
+        with self.lock:
+            self.lots = {}
+            self.heaps = {}
+            self.totals = {}
+            for lot_id, blood_type, quantity, expiration_date in rows:
+                self.track(lot_id, blood_type, quantity, expiration_date)
+            for heap in self.heaps.values():
+                heapq.heapify(heap)
+
+    def track(self, lot_id, blood_type, quantity, expiration_date, push=False):
+        """
+        Add a lot to the in-memory index.
+        """
+        self.lots[lot_id] = [blood_type, quantity, expiration_date]
+        heap = self.heaps.setdefault(blood_type, [])
+        if push:
+            heapq.heappush(heap, (expiration_date, lot_id))
+        else:
+            heap.append((expiration_date, lot_id))
+        tree = self.totals.setdefault(blood_type, FenwickTree(MAX_DATE_ORDINAL))
+        tree.add(date_ordinal(expiration_date), quantity)
+
+    def track_lots(self, lots):
+        """
+        Add lots already inserted into the inventory table to the index, in
+        O(log n) each instead of reloading the table.
+
+        Parameters:
+        lots (list): (lot_id, blood_type, quantity, expiration_date) tuples, as
+                     returned by insert_donations.
+        """
+        with self.lock:
+            for lot_id, blood_type, quantity, expiration_date in lots:
+                self.track(lot_id, blood_type, quantity, expiration_date, push=True)
+
+    def add_lot(self, blood_type, quantity, expiration_date):
+        """
+        Add a lot of blood to the inventory.
+
+        Parameters:
+        blood_type (str): The blood type of the lot.
+        quantity (int): The number of units in the lot.
+        expiration_date (str): The date the lot expires (YYYY-MM-DD).
+
+        Returns:
+        int: The ID of the new lot.
+        """
+        quantity = int(quantity)
+        if quantity <= 0:
+            raise ValueError("Quantity must be a positive number of units.")
+        date_ordinal(expiration_date)
+        conn = connect(self.db_path)
+        c = conn.cursor()
+        c.execute("INSERT INTO inventory (blood_type, quantity, expiration_date) VALUES (?, ?, ?)",
+                  (blood_type, quantity, expiration_date))
+        lot_id = c.lastrowid
+        conn.commit()
+        conn.close()
+        with self.lock:
+            self.track(lot_id, blood_type, quantity, expiration_date, push=True)
+        return lot_id
+
+    def available(self, blood_type, not_expiring_before):
+        """
+        Count the units of a blood type that do not expire before a date, in
+        O(log n) without touching the database.
+
+        Parameters:
+        blood_type (str): The blood type.
+        not_expiring_before (str): The date (YYYY-MM-DD).
+
+        Returns:
+        int: The number of units.
+        """
+        tree = self.totals.get(blood_type)
+        if tree is None:
+            return 0
+        with self.lock:
+            return tree.prefix_sum(MAX_DATE_ORDINAL - 1) - tree.prefix_sum(date_ordinal(not_expiring_before) - 1)
+
+    def allocate(self, blood_type, quantity, on_date=None):
+        """
+        Issue units of a blood type, taking them from the lots that expire first.
+        Lots that have expired by on_date are never issued.
+
+        The lots are chosen from the in-memory index, and each write only
+        succeeds if the lot still holds the units the index expects. If another
+        index or connection has issued from a chosen lot in the meantime, the
+        writes are rolled back, the index is reloaded and the issue is replanned.
+
+        Parameters:
+        blood_type (str): The blood type.
+        quantity (int): The number of units to issue.
+        on_date (str): The date of issue (YYYY-MM-DD), today by default.
+
+        Returns:
+        list: A list of (lot_id, units, expiration_date) tuples, in the order taken.
+
+        Raises:
+        ValueError: If fewer than quantity usable units are in stock, or the lots
+                    kept changing for ALLOCATE_ATTEMPTS attempts.
+        """
+        quantity = int(quantity)
+        on_date = on_date or datetime.now().strftime('%Y-%m-%d')
+        for attempt in range(ALLOCATE_ATTEMPTS):
+            taken = self.try_allocate(blood_type, quantity, on_date)
+            if taken is not None:
+                logging.info(f"Issued {quantity} units of {blood_type} from lots {[lot[0] for lot in taken]}")
+                return taken
+            logging.warning(f"Inventory changed while issuing {blood_type}; reloading")
+            self.load()
+        raise ValueError(f"The {blood_type} stock kept changing; try issuing again.")
+
+    def try_allocate(self, blood_type, quantity, on_date):
+        """
+        Make one attempt at allocate().
+
+        Returns:
+        list: The lots taken, or None if the table no longer matches the index.
+        """
+        with self.lock:
+            if quantity <= 0 or self.available(blood_type, on_date) < quantity:
+                raise ValueError(f"Not enough {blood_type} units in stock to issue {quantity}.")
+            heap = self.heaps[blood_type]
+            taken = []
+            skipped = []
+            remaining = quantity
+            while remaining:
+                expiration_date, lot_id = heapq.heappop(heap)
+                if expiration_date < on_date:
+                    skipped.append((expiration_date, lot_id))
+                    continue
+                units = min(remaining, self.lots[lot_id][1])
+                taken.append((lot_id, units, expiration_date))
+                remaining -= units
+
+            conn = connect(self.db_path)
+            c = conn.cursor()
+            try:
+                for lot_id, units, expiration_date in taken:
+                    if units == self.lots[lot_id][1]:
+                        c.execute("DELETE FROM inventory WHERE id = ? AND quantity = ?", (lot_id, units))
+                    else:
+                        c.execute("UPDATE inventory SET quantity = quantity - ? WHERE id = ? AND quantity >= ?", (units, lot_id, units))
+                    if c.rowcount != 1:
+                        conn.rollback()
+                        return None
+                conn.commit()
+            except sqlite3.Error:
+                for expiration_date, lot_id in skipped + [(lot[2], lot[0]) for lot in taken]:
+                    heapq.heappush(heap, (expiration_date, lot_id))
+                raise
+            finally:
+                conn.close()
+
+            for entry in skipped:
+                heapq.heappush(heap, entry)
+            tree = self.totals[blood_type]
+            for lot_id, units, expiration_date in taken:
+                tree.add(date_ordinal(expiration_date), -units)
+                self.lots[lot_id][1] -= units
+                if self.lots[lot_id][1]:
+                    heapq.heappush(heap, (expiration_date, lot_id))
+                else:
+                    del self.lots[lot_id]
+        return taken
+
+    def discard_expired(self, on_date=None):
+        """
+        Remove the lots that have expired by a date from the inventory.
+
+        Parameters:
+        on_date (str): The date (YYYY-MM-DD), today by default.
+
+        Returns:
+        int: The number of units discarded.
+        """
+        on_date = on_date or datetime.now().strftime('%Y-%m-%d')
+        discarded = 0
+        with self.lock:
+            conn = connect(self.db_path)
+            c = conn.cursor()
+            for blood_type in self.heaps:
+                c.execute("DELETE FROM inventory WHERE blood_type = ? AND expiration_date < ?", (blood_type, on_date))
+            conn.commit()
+            conn.close()
+            for blood_type, heap in self.heaps.items():
+                while heap and heap[0][0] < on_date:
+                    expiration_date, lot_id = heapq.heappop(heap)
+                    quantity = self.lots.pop(lot_id)[1]
+                    self.totals[blood_type].add(date_ordinal(expiration_date), -quantity)
+                    discarded += quantity
+        logging.info(f"Discarded {discarded} expired units")
+        return discarded
+
+# Read a CSV file in chunks
+def read_csv_chunks(file_path, chunk_size):
+    """
+    Read a CSV file with a header row in chunks, without loading the whole file.
+
+    Parameters:
+    file_path (str): The file path of the CSV file.
+    chunk_size (int): The maximum number of rows per chunk.
+
+    Yields:
+    list: A list of (line_number, row) tuples.
+    """
+    with open(file_path, mode='r', newline='') as file:
+        reader = csv.reader(file)
+        next(reader, None)  # Skip the header row
+        chunk = []
+        for row in reader:
+            chunk.append((reader.line_num, row))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+# Validate many dates at once
+def validate_dates(dates):
+    """
+    Validate a batch of date strings, parsing each distinct value only once.
+
+    Parameters:
+    dates (iterable): The date strings to validate.
+
+    Returns:
+    set: The date strings that are valid.
+    """
+    return {date for date in set(dates) if validate_date(date)}
+
+# Summarise a CSV import
+def import_summary(imported, rejected, elapsed):
+    """
+    Build the result of a CSV import and log it.
+
+    Parameters:
+    imported (int): The number of rows written to the database.
+    rejected (list): A list of (line_number, row, reason) tuples for skipped rows.
+    elapsed (float): The time the import took, in seconds.
+
+    Returns:
+    dict: The imported and rejected counts, the rejected rows, and rows/sec.
+    """
+    summary = {
+        "imported": imported,
+        "rejected": len(rejected),
+        "rejected_rows": rejected,
+        "seconds": elapsed,
+        "rows_per_sec": (imported + len(rejected)) / elapsed if elapsed else 0.0,
+    }
+    logging.info(f"Imported {imported} rows, rejected {len(rejected)}, {summary['rows_per_sec']:.0f} rows/sec")
+    return summary
+
+# Find donor IDs by name and contact
+class DonorLookup:
+    def __init__(self, conn):
+        """
+        Initialize the DonorLookup class.
+
+        Lookups go through the (name, contact) index and every answer, including
+        "not found", is cached, so a batch naming the same donors many times only
+        queries each of them once. Use a new lookup for each batch.
+
+        Parameters:
+        conn (sqlite3.Connection): The database connection.
+        """
+        self.conn = conn
+        self.cache = {}
+
+    def resolve(self, name, contact=None):
+        """
+        Find the ID of the donor with a name, and contact if one is given.
+
+        Parameters:
+        name (str): The donor's name.
+        contact (str): The donor's contact, to tell donors with the same name apart.
+
+        Returns:
+        int: The donor ID, or None if no donor or more than one donor matches.
+        """
+        key = (name, contact or None)
+        if key not in self.cache:
+            if contact:
+                c = self.conn.execute("SELECT id FROM donors WHERE name = ? AND contact = ? LIMIT 2", key)
+            else:
+                c = self.conn.execute("SELECT id FROM donors WHERE name = ? LIMIT 2", (name,))
+            rows = c.fetchall()
+            self.cache[key] = rows[0][0] if len(rows) == 1 else None
+        return self.cache[key]
+
+# Insert donations and the inventory lots they produce
+def insert_donations(conn, donations):
+    """
+    Insert donations and add each one to the inventory as a lot that expires
+    BLOOD_SHELF_LIFE_DAYS after the donation. The donations are inserted with
+    executemany; the lots one at a time, to learn their IDs. The caller owns the
+    transaction.
+
+    Parameters:
+    conn (sqlite3.Connection): The database connection.
+    donations (list): (donor_id, blood_type, quantity, date) tuples.
+
+    Returns:
+    list: (lot_id, blood_type, quantity, expiration_date) tuples for the new lots,
+          to pass to InventoryIndex.track_lots once the transaction commits.
+    """
+    conn.executemany("INSERT INTO donations (donor_id, blood_type, quantity, date) VALUES (?, ?, ?, ?)", donations)
+    lots = []
+    for donor_id, blood_type, quantity, date in donations:
+        expiration_date = (datetime.strptime(date, '%Y-%m-%d') + timedelta(days=BLOOD_SHELF_LIFE_DAYS)).strftime('%Y-%m-%d')
+        lot_id = conn.execute("INSERT INTO inventory (blood_type, quantity, expiration_date) VALUES (?, ?, ?)",
+                              (blood_type, quantity, expiration_date)).lastrowid
+        lots.append((lot_id, blood_type, quantity, expiration_date))
+    return lots
+
+# Record a single donation
+def mark_donation(donor_id, date, blood_type, quantity, db_path=None, inventory=None):
+    """
+    Record a donation and add it to the inventory in one transaction.
+
+    Parameters:
+    donor_id (int): The ID of the donor.
+    date (str): The date of the donation (YYYY-MM-DD).
+    blood_type (str): The blood type donated.
+    quantity (int): The number of units donated.
+    db_path (str): The path to the blood bank database, DB_PATH by default.
+    inventory (InventoryIndex): Given the new lot once the donation is stocked.
+    """
+    conn = connect(db_path)
+    try:
+        with conn:
+            lots = insert_donations(conn, [(int(donor_id), blood_type, int(quantity), date)])
+    finally:
+        conn.close()
+    if inventory:
+        inventory.track_lots(lots)
+    logging.info(f"Donation recorded: Donor ID: {donor_id}, Date: {date}, Blood Type: {blood_type}, Quantity: {quantity}")
+
+# Import donations from CSV
+def import_donations_from_csv(file_path, chunk_size=IMPORT_CHUNK_SIZE, db_path=None, inventory=None, progress_callback=None):
+    """
+    Import a batch of donations, such as a mobile drive's intake sheet, from a CSV
+    file with the columns donor name, contact, blood type, quantity and date.
+
+    Donors are found by name, and by contact when the name is shared. Every valid
+    donation and its inventory lot are written in one transaction, so the batch is
+    stocked completely or not at all. Rows with an unknown donor or a bad value
+    are rejected instead of aborting the import.
+
+    Parameters:
+    file_path (str): The file path of the CSV file.
+    chunk_size (int): The number of rows read and written at a time.
+    db_path (str): The path to the blood bank database, DB_PATH by default.
+    inventory (InventoryIndex): Given the new lots once the donations are stocked.
+    progress_callback (callable): Called with the number of rows read after each chunk.
+
+    Returns:
+    dict: The import summary (see import_summary).
+    """
+    start = time.perf_counter()
+    conn = connect(db_path)
+    donors = DonorLookup(conn)
+    imported = 0
+    rejected = []
+    lots = []
+    try:
+        with conn:
+            for chunk in read_csv_chunks(file_path, chunk_size):
+                valid_dates = validate_dates(row[4] for _, row in chunk if len(row) == 5)
+                rows = []
+                for line_number, row in chunk:
+                    if len(row) != 5:
+                        rejected.append((line_number, row, "expected donor name, contact, blood type, quantity and date"))
+                        continue
+                    name, contact, blood_type, quantity, date = row
+                    donor_id = donors.resolve(name, contact)
+                    if donor_id is None:
+                        rejected.append((line_number, row, "no single donor matches the name and contact"))
+                    elif not validate_blood_type(blood_type):
+                        rejected.append((line_number, row, "invalid blood type"))
+                    elif not quantity.strip().isdigit() or int(quantity) <= 0:
+                        rejected.append((line_number, row, "invalid quantity"))
+                    elif date not in valid_dates:
+                        rejected.append((line_number, row, "invalid date"))
+                    else:
+                        rows.append((donor_id, blood_type, int(quantity), date))
+                lots.extend(insert_donations(conn, rows))
+                imported += len(rows)
+                if progress_callback:
+                    progress_callback(imported + len(rejected))
+    finally:
+        conn.close()
+    if inventory:
+        inventory.track_lots(lots)
+    logging.info(f"Donations imported from {file_path}")
+    return import_summary(imported, rejected, time.perf_counter() - start)
+
+# Check the arguments passed to the repositories
+def checked_blood_type(blood_type):
+    """
+    Return a blood type unchanged, or raise ValueError if it is not valid.
+    """
+    if not validate_blood_type(blood_type):
+        raise ValueError(f"Invalid blood type: {blood_type!r}")
+    return blood_type
+
+def checked_date(date_text):
+    """
+    Return a YYYY-MM-DD date unchanged, or raise ValueError if it is not valid.
+    """
+    if not validate_date(date_text):
+        raise ValueError(f"Invalid date, expected YYYY-MM-DD: {date_text!r}")
+    return date_text
+
+def checked_quantity(quantity):
+    """
+    Return a quantity as a positive int, or raise ValueError if it is not one.
+    """
+    if not str(quantity).strip().isdigit() or int(quantity) <= 0:
+        raise ValueError(f"Invalid quantity, expected a positive whole number: {quantity!r}")
+    return int(quantity)
+
+class Repository:
+    def __init__(self, db_path=None):
+        """
+        Initialize the Repository class, the base of the data access classes.
+
+        A repository holds one connection for its lifetime and never touches Tk, so
+        it can be used from scripts, the command line and benchmarks as well as the
+        GUI. Use it as a context manager, or call close() when done.
+
+        Parameters:
+        db_path (str): The path to the blood bank database, DB_PATH by default.
+        """
+        self.db_path = db_path or DB_PATH
+        self.conn = connect(self.db_path)
+
+    def close(self):
+        """
+        Close the repository's connection.
+        """
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class DonorRepository(Repository):
+    def add(self, name, blood_type, contact):
+        """
+        Add a donor.
+
+        Parameters:
+        name (str): The donor's name.
+        blood_type (str): The donor's blood type.
+        contact (str): The donor's contact details.
+
+        Returns:
+        int: The ID of the new donor.
+        """
+        if not validate_name(name):
+            raise ValueError("The donor's name must not be empty.")
+        with self.conn:
+            c = self.conn.execute("INSERT INTO donors (name, blood_type, contact) VALUES (?, ?, ?)",
+                                  (name, checked_blood_type(blood_type), contact))
+        return c.lastrowid
+
+    def add_many(self, donors):
+        """
+        Add many donors in one transaction with executemany.
+
+        Parameters:
+        donors (list): (name, blood_type, contact) tuples, already validated.
+        """
+        with self.conn:
+            self.conn.executemany("INSERT INTO donors (name, blood_type, contact) VALUES (?, ?, ?)", donors)
+
+    def update(self, donor_id, name, blood_type, contact):
+        """
+        Update a donor's details.
+
+        Parameters:
+        donor_id (int): The ID of the donor.
+        name (str): The donor's name.
+        blood_type (str): The donor's blood type.
+        contact (str): The donor's contact details.
+        """
+        with self.conn:
+            self.conn.execute("UPDATE donors SET name = ?, blood_type = ?, contact = ? WHERE id = ?",
+                              (name, checked_blood_type(blood_type), contact, int(donor_id)))
+
+    def delete(self, donor_id):
+        """
+        Delete a donor.
+
+        Parameters:
+        donor_id (int): The ID of the donor.
+        """
+        with self.conn:
+            self.conn.execute("DELETE FROM donors WHERE id = ?", (int(donor_id),))
+
+    def get(self, donor_id):
+        """
+        Get a donor by ID.
+
+        Parameters:
+        donor_id (int): The ID of the donor.
+
+        Returns:
+        tuple: (donor_id, name, blood_type, contact), or None if there is no such donor.
+        """
+        return self.conn.execute("SELECT id, name, blood_type, contact FROM donors WHERE id = ?", (int(donor_id),)).fetchone()
+
+    def list_all(self):
+        """
+        Get every donor.
+
+        Returns:
+        list: (donor_id, name, blood_type, contact) tuples, by ID.
+        """
+        return self.conn.execute("SELECT id, name, blood_type, contact FROM donors ORDER BY id").fetchall()
+
+    def find_by_name(self, name):
+        """
+        Find donors by exact name, through the name index.
+
+        Parameters:
+        name (str): The name to look for.
+
+        Returns:
+        list: (donor_id, name, blood_type, contact) tuples, by ID.
+        """
+        return self.conn.execute("SELECT id, name, blood_type, contact FROM donors WHERE name = ? ORDER BY id", (name,)).fetchall()
+
+    def search(self, query):
+        """
+        Find donors whose name or contact is exactly the query, through the name
+        and contact indexes.
+
+        Parameters:
+        query (str): The name or contact to look for.
+
+        Returns:
+        list: (donor_id, name, blood_type, contact) tuples, by ID.
+        """
+        return self.conn.execute("""SELECT id, name, blood_type, contact FROM donors WHERE name = ?
+                                    UNION SELECT id, name, blood_type, contact FROM donors WHERE contact = ?
+                                    ORDER BY id""", (query, query)).fetchall()
+
+    def eligible_for(self, recipient_type, on_date=None, limit=50):
+        """
+        Find compatible donors who can donate (see find_eligible_donors).
+        """
+        return find_eligible_donors(recipient_type, on_date, limit, self.db_path)
+
+    def recall_batches(self, start_date, end_date, batch_size=EMAIL_BATCH_SIZE):
+        """
+        Yield the donors who become eligible in a window in batches (see get_recall_batches).
+        """
+        return get_recall_batches(checked_date(start_date), checked_date(end_date), batch_size, self.db_path)
+
+    def import_csv(self, file_path, chunk_size=IMPORT_CHUNK_SIZE, progress_callback=None):
+        """
+        Import donors from a CSV file with the columns name, blood type and contact.
+
+        Rows are inserted with executemany, one transaction per chunk. Rows with a
+        missing name or a bad blood type are rejected instead of aborting the import.
+
+        Parameters:
+        file_path (str): The file path of the CSV file.
+        chunk_size (int): The number of rows written per transaction.
+        progress_callback (callable): Called with the number of rows read after each chunk.
+
+        Returns:
+        dict: The import summary (see import_summary).
+        """
+        start = time.perf_counter()
+        imported = 0
+        rejected = []
+        for chunk in read_csv_chunks(file_path, chunk_size):
+            rows = []
+            for line_number, row in chunk:
+                if len(row) != 3 or not validate_name(row[0]):
+                    rejected.append((line_number, row, "expected name, blood type and contact"))
+                elif not validate_blood_type(row[1]):
+                    rejected.append((line_number, row, "invalid blood type"))
+                else:
+                    rows.append((row[0], row[1], row[2]))
+            self.add_many(rows)
+            imported += len(rows)
+            if progress_callback:
+                progress_callback(imported + len(rejected))
+        logging.info(f"Donors imported from {file_path}")
+        return import_summary(imported, rejected, time.perf_counter() - start)
+
+class DonationRepository(Repository):
+    def record(self, donor_id, date, blood_type, quantity, inventory=None):
+        """
+        Record a donation and stock it in the inventory in one transaction.
+
+        Parameters:
+        donor_id (int): The ID of the donor.
+        date (str): The date of the donation (YYYY-MM-DD).
+        blood_type (str): The blood type donated.
+        quantity (int): The number of units donated.
+        inventory (InventoryIndex): Given the new lot once the donation is stocked.
+        """
+        with self.conn:
+            lots = insert_donations(self.conn, [(int(donor_id), checked_blood_type(blood_type), checked_quantity(quantity), checked_date(date))])
+        if inventory:
+            inventory.track_lots(lots)
+
+    def update(self, donation_id, donor_id, date, blood_type, quantity):
+        """
+        Correct a recorded donation. The inventory lot it produced is not changed.
+
+        Parameters:
+        donation_id (int): The ID of the donation.
+        donor_id (int): The ID of the donor.
+        date (str): The date of the donation (YYYY-MM-DD).
+        blood_type (str): The blood type donated.
+        quantity (int): The number of units donated.
+        """
+        with self.conn:
+            self.conn.execute("UPDATE donations SET donor_id = ?, date = ?, blood_type = ?, quantity = ? WHERE id = ?",
+                              (int(donor_id), checked_date(date), checked_blood_type(blood_type), checked_quantity(quantity), int(donation_id)))
+
+    def delete(self, donation_id):
+        """
+        Delete a donation record.
+
+        Parameters:
+        donation_id (int): The ID of the donation.
+        """
+        with self.conn:
+            self.conn.execute("DELETE FROM donations WHERE id = ?", (int(donation_id),))
+
+    def list_all(self):
+        """
+        Get every donation.
+
+        Returns:
+        list: (donation_id, donor_id, date, blood_type, quantity) tuples, by ID.
+        """
+        return self.conn.execute("SELECT id, donor_id, date, blood_type, quantity FROM donations ORDER BY id").fetchall()
+
+    def report(self, start_date, end_date):
+        """
+        Get the donations made in a date range, through the date index.
+
+        Parameters:
+        start_date (str): The start date (YYYY-MM-DD).
+        end_date (str): The end date (YYYY-MM-DD), inclusive.
+
+        Returns:
+        list: (donation_id, donor_id, date, blood_type, quantity) tuples, by date.
+        """
+        return self.conn.execute("""SELECT id, donor_id, date, blood_type, quantity FROM donations
+                                    WHERE date BETWEEN ? AND ? ORDER BY date, id""",
+                                 (checked_date(start_date), checked_date(end_date))).fetchall()
+
+    def export_csv(self, start_date, end_date, file_path):
+        """
+        Write the donations made in a date range to a CSV file.
+
+        Parameters:
+        start_date (str): The start date (YYYY-MM-DD).
+        end_date (str): The end date (YYYY-MM-DD), inclusive.
+        file_path (str): The file path of the CSV file.
+
+        Returns:
+        int: The number of donations written.
+        """
+        rows = self.report(start_date, end_date)
+        with open(file_path, mode='w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(["Donation ID", "Donor ID", "Date", "Blood Type", "Quantity"])
+            writer.writerows(rows)
+        return len(rows)
+
+    def import_csv(self, file_path, chunk_size=IMPORT_CHUNK_SIZE, inventory=None, progress_callback=None):
+        """
+        Import and stock a batch of donations (see import_donations_from_csv).
+        """
+        return import_donations_from_csv(file_path, chunk_size, self.db_path, inventory, progress_callback)
+
+class InventoryRepository(Repository):
+    def __init__(self, db_path=None):
+        """
+        Initialize the InventoryRepository class.
+
+        Lots are added and issued through an InventoryIndex, loaded on first use, so
+        that first-expiring-first-out issuing and stock counts stay in step with
+        the table.
+
+        Parameters:
+        db_path (str): The path to the blood bank database, DB_PATH by default.
+        """
+        super().__init__(db_path)
+        self._index = None
+
+    @property
+    def index(self):
+        """
+        The InventoryIndex for the database, loaded on first use.
+        """
+        if self._index is None:
+            self._index = InventoryIndex(self.db_path)
+        return self._index
+
+    def add_lot(self, blood_type, quantity, expiration_date):
+        """
+        Add a lot of blood to the inventory.
+
+        Parameters:
+        blood_type (str): The blood type of the lot.
+        quantity (int): The number of units in the lot.
+        expiration_date (str): The date the lot expires (YYYY-MM-DD).
+
+        Returns:
+        int: The ID of the new lot.
+        """
+        return self.index.add_lot(checked_blood_type(blood_type), checked_quantity(quantity), checked_date(expiration_date))
+
+    def issue(self, blood_type, quantity, on_date=None):
+        """
+        Issue units first-expiring-first-out (see InventoryIndex.allocate).
+        """
+        return self.index.allocate(checked_blood_type(blood_type), checked_quantity(quantity), on_date and checked_date(on_date))
+
+    def available(self, blood_type, not_expiring_before):
+        """
+        Count the units of a blood type that last until a date (see InventoryIndex.available).
+        """
+        return self.index.available(blood_type, checked_date(not_expiring_before))
+
+    def discard_expired(self, on_date=None):
+        """
+        Remove expired lots (see InventoryIndex.discard_expired).
+        """
+        return self.index.discard_expired(on_date and checked_date(on_date))
+
+    def reload(self):
+        """
+        Bring the in-memory index back in step after the table was changed elsewhere.
+        """
+        if self._index is not None:
+            self._index.load()
+
+    def list_lots(self):
+        """
+        Get every lot in the inventory.
+
+        Returns:
+        list: (lot_id, blood_type, quantity, expiration_date) tuples, by blood type and expiry.
+        """
+        return self.conn.execute("""SELECT id, blood_type, quantity, expiration_date FROM inventory
+                                    ORDER BY blood_type, expiration_date""").fetchall()
+
+    def stock_levels(self, on_date=None):
+        """
+        Get the stock dashboard (see get_stock_levels).
+        """
+        return get_stock_levels(on_date and checked_date(on_date), self.db_path)
+
+    def compatible_lots(self, recipient_type, on_date=None, limit=None):
+        """
+        Find the lots a recipient can receive (see find_compatible_inventory).
+        """
+        return find_compatible_inventory(recipient_type, on_date and checked_date(on_date), limit, self.db_path)
+
+# Data functions used by the GUI, each on a short-lived repository
+def add_donor(name, blood_type, contact):
+    """
+    Add a donor and return its ID (see DonorRepository.add).
+    """
+    with DonorRepository() as donors:
+        return donors.add(name, blood_type, contact)
+
+def update_donor(donor_id, name, blood_type, contact):
+    """
+    Update a donor's details (see DonorRepository.update).
+    """
+    with DonorRepository() as donors:
+        donors.update(donor_id, name, blood_type, contact)
+
+def delete_donor(donor_id):
+    """
+    Delete a donor (see DonorRepository.delete).
+    """
+    with DonorRepository() as donors:
+        donors.delete(donor_id)
+
+def search_donor(query):
+    """
+    Find donors by exact name or contact (see DonorRepository.search).
+    """
+    with DonorRepository() as donors:
+        return donors.search(query)
+
+def get_all_donors():
+    """
+    Get every donor (see DonorRepository.list_all).
+    """
+    with DonorRepository() as donors:
+        return donors.list_all()
+
+def import_donors_from_csv(file_path):
+    """
+    Import donors from a CSV file (see DonorRepository.import_csv).
+    """
+    with DonorRepository() as donors:
+        return donors.import_csv(file_path)
+
+def get_all_donations():
+    """
+    Get every donation (see DonationRepository.list_all).
+    """
+    with DonationRepository() as donations:
+        return donations.list_all()
+
+def update_donation(donation_id, donor_id, date, blood_type, quantity):
+    """
+    Correct a recorded donation (see DonationRepository.update).
+    """
+    with DonationRepository() as donations:
+        donations.update(donation_id, donor_id, date, blood_type, quantity)
+
+def delete_donation(donation_id):
+    """
+    Delete a donation record (see DonationRepository.delete).
+    """
+    with DonationRepository() as donations:
+        donations.delete(donation_id)
+
+def generate_donation_report(start_date, end_date):
+    """
+    Get the donations made in a date range (see DonationRepository.report).
+    """
+    with DonationRepository() as donations:
+        return donations.report(start_date, end_date)
+
+def export_donation_report_to_csv(start_date, end_date, file_path):
+    """
+    Write the donations made in a date range to a CSV file (see DonationRepository.export_csv).
+    """
+    with DonationRepository() as donations:
+        return donations.export_csv(start_date, end_date, file_path)
+
+# Read the changes logged after a sequence number
+def get_changes(since_seq=0, limit=REPLICATION_BATCH_SIZE, db_path=None):
+    """
+    Get the changes logged after a sequence number, oldest first.
+
+    Parameters:
+    since_seq (int): The last sequence number already applied, 0 for everything.
+    limit (int): The most changes to return.
+    db_path (str): The path to the blood bank database, DB_PATH by default.
+
+    Returns:
+    list: (seq, table_name, row_id, operation, row) tuples. row is a dict of
+          column values, or None for deletions.
+    """
+    conn = connect(db_path)
     c = conn.cursor()
-    c.execute("SELECT * FROM inventory")
-    rows = c.fetchall()
+    c.execute("""SELECT seq, table_name, row_id, operation, row_data FROM change_log
+                 WHERE seq > ? ORDER BY seq LIMIT ?""", (since_seq, limit))
+    changes = [(seq, table_name, row_id, operation, json.loads(row_data) if row_data else None)
+               for seq, table_name, row_id, operation, row_data in c.fetchall()]
     conn.close()
-    for row in rows:
-        tree_inventory.insert("", "end", values=row)
-
-# View donations in a table
-def view_donations():
-    for i in tree_donations.get_children():
-        tree_donations.delete(i)
-    conn = sqlite3.connect('blood_bank.db')
+    return changes
+
+# Find how far a replica has been synchronised
+def get_replica_seq(replica_path, source='primary'):
+    """
+    Get the sequence number of the last change applied to a replica.
+
+    Parameters:
+    replica_path (str): The path to the replica database.
+    source (str): The name of the database the replica copies.
+
+    Returns:
+    int: The last sequence number applied, 0 if none has been.
+    """
+    conn = connect(replica_path)
     c = conn.cursor()
-    c.execute("SELECT * FROM donations")
-    rows = c.fetchall()
+    c.execute("CREATE TABLE IF NOT EXISTS replication_state (source TEXT PRIMARY KEY, last_seq INTEGER NOT NULL)")
+    c.execute("SELECT last_seq FROM replication_state WHERE source = ?", (source,))
+    row = c.fetchone()
     conn.close()
-    for row in rows:
-        tree_donations.insert("", "end", values=row)
-
-# Clear entry fields
-def clear_entries():
-    entry_name.delete(0, tk.END)
-    entry_blood_type.delete(0, tk.END)
-    entry_contact.delete(0, tk.END)
-    entry_quantity.delete(0, tk.END)
-    entry_expiration_date.delete(0, tk.END)
-    entry_date.delete(0, tk.END)
-
-# Create the main application window
-root = tk.Tk()
-root.title("Blood Bank Management System")
+    return row[0] if row else 0
 
-# Initialize the database
-init_db()
-
-# Create and place widgets
-frame = ttk.Frame(root, padding="10")
-frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-
-ttk.Label(frame, text="Name:").grid(row=0, column=0, sticky=tk.W, pady=5)
-entry_name = ttk.Entry(frame)
-entry_name.grid(row=0, column=1, pady=5)
-
-ttk.Label(frame, text="Blood Type:").grid(row=1, column=0, sticky=tk.W, pady=5)
-entry_blood_type = ttk.Entry(frame)
-entry_blood_type.grid(row=1, column=1, pady=5)
-
-ttk.Label(frame, text="Contact:").grid(row=2, column=0, sticky=tk.W, pady=5)
-entry_contact = ttk.Entry(frame)
-entry_contact.grid(row=2, column=1, pady=5)
-
-ttk.Label(frame, text="Quantity:").grid(row=3, column=0, sticky=tk.W, pady=5)
-entry_quantity = ttk.Entry(frame)
-entry_quantity.grid(row=3, column=1, pady=5)
-
-ttk.Label(frame, text="Expiration Date (YYYY-MM-DD):").grid(row=4, column=0, sticky=tk.W, pady=5)
-entry_expiration_date = ttk.Entry(frame)
-entry_expiration_date.grid(row=4, column=1, pady=5)
-
-ttk.Label(frame, text="Date (YYYY-MM-DD):").grid(row=5, column=0, sticky=tk.W, pady=5)
-entry_date = ttk.Entry(frame)
-entry_date.grid(row=5, column=1, pady=5)
-
-ttk.Button(frame, text="Add Donor", command=add_donor).grid(row=6, column=0, columnspan=2, pady=5)
-ttk.Button(frame, text="Update Donor", command=update_donor).grid(row=7, column=0, columnspan=2, pady=5)
-ttk.Button(frame, text="Delete Donor", command=delete_donor).grid(row=8, column=0, columnspan=2, pady=5)
-ttk.Button(frame, text="Search Donor", command=search_donor).grid(row=9, column=0, columnspan=2, pady=5)
-ttk.Button(frame, text="Add Blood", command=add_blood).grid(row=10, column=0, columnspan=2, pady=5)
-ttk.Button(frame, text="Update Inventory", command=update_inventory).grid(row=11, column=0, columnspan=2, pady=5)
-ttk.Button(frame, text="Record Donation", command=record_donation).grid(row=12, column=0, columnspan=2, pady=5)
-
-# Create treeviews for displaying tables
-tree_donors = ttk.Treeview(frame, columns=("ID", "Name", "Blood Type", "Contact"), show='headings')
-tree_donors.heading("ID", text="ID")
-tree_donors.heading("Name", text="Name")
-tree_donors.heading("Blood Type", text="Blood Type")
-tree_donors.heading("Contact", text="Contact")
-tree_donors.grid(row=13, column=0, columnspan=2, pady=5)
-
-tree_inventory = ttk.Treeview(frame, columns=("ID", "Blood Type", "Quantity", "Expiration Date"), show='headings')
-tree_inventory.heading("ID", text="ID")
-tree_inventory.heading("Blood Type", text="Blood Type")
-tree_inventory.heading("Quantity", text="Quantity")
-tree_inventory.heading("Expiration Date", text="Expiration Date")
-tree_inventory.grid(row=14, column=0, columnspan=2, pady=5)
-
-tree_donations = ttk.Treeview(frame, columns=("ID", "Donor ID", "Blood Type", "Quantity", "Date"), show='headings')
-tree_donations.heading("ID", text="ID")
-tree_donations.heading("Donor ID", text="Donor ID")
-tree_donations.heading("Blood Type", text="Blood Type")
-tree_donations.heading("Quantity", text="Quantity")
-tree_donations.heading("Date", text="Date")
-tree_donations.grid(row=15, column=0, columnspan=2, pady=5)
-
-# View initial data
-view_donors()
-view_inventory()
-view_donations()
-
-# Run the application
-root.mainloop()
+# Apply logged changes to a replica
+def apply_changes(changes, replica_path, source='primary'):
+    """
+    Apply changes to a replica in one transaction, together with the sequence
+    number reached, so an interrupted sync resumes where it stopped. Changes the
+    replica already has are skipped.
 
-# User authentication functions
-def hash_password(password):
+    Rows are upserted, which fires the replica's own triggers, so its summary
+    tables and change log stay consistent with its data.
+
+    Parameters:
+    changes (list): (seq, table_name, row_id, operation, row) tuples, oldest first (see get_changes).
+    replica_path (str): The path to the replica database, created by init_db.
+    source (str): The name of the database the changes come from.
+
+    Returns:
+    int: The number of changes applied.
+    """
+    last_seq = get_replica_seq(replica_path, source)
+    upserts = {table: f"""INSERT INTO {table} ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})
+                          ON CONFLICT(id) DO UPDATE SET {", ".join(f"{column} = excluded.{column}" for column in columns[1:])}"""
+               for table, columns in REPLICATED_TABLES.items()}
+    applied = 0
+    conn = connect(replica_path)
+    try:
+        with conn:
+            c = conn.cursor()
+            for seq, table_name, row_id, operation, row in changes:
+                if seq <= last_seq:
+                    continue
+                if table_name not in REPLICATED_TABLES:
+                    raise ValueError(f"Change {seq} is for a table that is not replicated: {table_name!r}")
+                if operation == 'delete':
+                    c.execute(f"DELETE FROM {table_name} WHERE id = ?", (row_id,))
+                elif operation in ('insert', 'update'):
+                    c.execute(upserts[table_name], [row.get(column) for column in REPLICATED_TABLES[table_name]])
+                else:
+                    raise ValueError(f"Change {seq} has an unknown operation: {operation!r}")
+                last_seq = seq
+                applied += 1
+            c.execute("""INSERT INTO replication_state (source, last_seq) VALUES (?, ?)
+                         ON CONFLICT(source) DO UPDATE SET last_seq = excluded.last_seq""", (source, last_seq))
+    finally:
+        conn.close()
+    return applied
+
+# Bring a replica up to date
+def replicate(replica_path, db_path=None, batch_size=REPLICATION_BATCH_SIZE, source='primary'):
+    """
+    Copy the changes made since a replica's last sync to it, batch by batch,
+    creating the replica if it does not exist.
+
+    Parameters:
+    replica_path (str): The path to the replica database.
+    db_path (str): The path to the blood bank database, DB_PATH by default.
+    batch_size (int): The number of changes applied per transaction.
+    source (str): The name the replica records for this database.
+
+    Returns:
+    int: The number of changes applied.
+    """
+    init_db(replica_path)
+    applied = 0
+    while True:
+        changes = get_changes(get_replica_seq(replica_path, source), batch_size, db_path)
+        if not changes:
+            break
+        applied += apply_changes(changes, replica_path, source)
+    logging.info(f"Replicated {applied} changes to {replica_path}")
+    return applied
+
+# Write logged changes to a file
+def export_changes(file_path, since_seq=0, db_path=None, compress=None, batch_size=REPLICATION_BATCH_SIZE):
+    """
+    Write the changes logged after a sequence number to a JSON Lines file, one
+    change per line, to ship to a replica that cannot open this database.
+
+    Parameters:
+    file_path (str): The file path where the changes will be saved.
+    since_seq (int): The last sequence number the replica has (see get_replica_seq).
+    db_path (str): The path to the blood bank database, DB_PATH by default.
+    compress (bool): Whether to gzip the file. Defaults to True for paths ending in .gz.
+    batch_size (int): The number of changes read at a time.
+
+    Returns:
+    int: The number of changes written.
     """
-    Hash a password using SHA-256.
+    if compress is None:
+        compress = file_path.endswith('.gz')
+    opener = gzip.open if compress else open
+    written = 0
+    with opener(file_path, mode='wt') as file:
+        while True:
+            changes = get_changes(since_seq, batch_size, db_path)
+            if not changes:
+                break
+            for change in changes:
+                file.write(json.dumps(change) + "\n")
+            written += len(changes)
+            since_seq = changes[-1][0]
+    logging.info(f"Exported {written} changes to {file_path}")
+    return written
+
+# Apply a file of changes to a replica
+def import_changes(file_path, replica_path, source='primary', batch_size=REPLICATION_BATCH_SIZE):
+    """
+    Apply a file written by export_changes to a replica, creating the replica if
+    it does not exist. Importing the same file twice applies it once.
+
+    Parameters:
+    file_path (str): The file path of the changes, gzipped if it ends in .gz.
+    replica_path (str): The path to the replica database.
+    source (str): The name of the database the changes come from.
+    batch_size (int): The number of changes applied per transaction.
+
+    Returns:
+    int: The number of changes applied.
+    """
+    init_db(replica_path)
+    opener = gzip.open if file_path.endswith('.gz') else open
+    applied = 0
+    batch = []
+    with opener(file_path, mode='rt') as file:
+        for line in file:
+            batch.append(json.loads(line))
+            if len(batch) >= batch_size:
+                applied += apply_changes(batch, replica_path, source)
+                batch = []
+    applied += apply_changes(batch, replica_path, source)
+    logging.info(f"Applied {applied} changes from {file_path} to {replica_path}")
+    return applied
+
+# Drop change log entries every replica has applied
+def prune_change_log(up_to_seq, db_path=None):
+    """
+    Delete the change log entries up to a sequence number, once every replica has
+    applied them (see get_replica_seq). A replica created after pruning must start
+    from a copy of the database file instead of sequence 0.
+
+    Parameters:
+    up_to_seq (int): The last sequence number to delete.
+    db_path (str): The path to the blood bank database, DB_PATH by default.
+
+    Returns:
+    int: The number of entries deleted.
+    """
+    conn = connect(db_path)
+    with conn:
+        deleted = conn.execute("DELETE FROM change_log WHERE seq <= ?", (up_to_seq,)).rowcount
+    conn.close()
+    return deleted
+
+# Read the stock dashboard from the summary tables
+def get_stock_levels(on_date=None, db_path=None):
+    """
+    Get the stock dashboard: for each blood type, the unexpired units in stock, the
+    units expiring within each of EXPIRY_WINDOWS_DAYS, and the donations received.
+
+    Reads only the trigger-maintained summary tables, which hold one row per blood
+    type and expiration date, so the cost does not grow with the inventory or the
+    donation history.
 
     Parameters:
-    password (str): The password to hash.
+    on_date (str): The date to measure expiry from (YYYY-MM-DD), today by default.
+    db_path (str): The path to the blood bank database, DB_PATH by default.
 
     Returns:
-    str: The hashed password.
+    list: A list of (blood_type, units, expiring..., donations, donated_units)
+          tuples, one for each blood type, with one expiring column per window.
     """
-    return hashlib.sha256(password.encode()).hexdigest()
+    on_date = on_date or datetime.now().strftime('%Y-%m-%d')
+    start = datetime.strptime(on_date, '%Y-%m-%d')
+    window_ends = [(start + timedelta(days=days)).strftime('%Y-%m-%d') for days in EXPIRY_WINDOWS_DAYS]
+    conn = connect(db_path)
+    c = conn.cursor()
+    c.execute(f"""SELECT blood_type, SUM(units), {", ".join("SUM(CASE WHEN expiration_date < ? THEN units ELSE 0 END)" for _ in window_ends)}
+                  FROM inventory_by_expiry WHERE expiration_date >= ? GROUP BY blood_type""", (*window_ends, on_date))
+    stock = {row[0]: row[1:] for row in c.fetchall()}
+    c.execute("SELECT blood_type, donations, units FROM donation_totals")
+    donated = {row[0]: row[1:] for row in c.fetchall()}
+    conn.close()
+    blood_types = BLOOD_TYPES + sorted((set(stock) | set(donated)) - set(BLOOD_TYPES))
+    empty_stock = (0,) * (len(EXPIRY_WINDOWS_DAYS) + 1)
+    return [(blood_type, *stock.get(blood_type, empty_stock), *donated.get(blood_type, (0, 0))) for blood_type in blood_types]
+
+# Patch a Treeview to show rows, touching only the rows that changed
+def sync_treeview(tree, rows, key=lambda row: row[0]):
+    """
+    Make a Treeview show the given rows by inserting, updating, deleting and moving
+    only the items that differ from what it shows now, instead of rebuilding it.
+
+    Parameters:
+    tree (ttk.Treeview): The Treeview to update. Its items must only be changed
+                         through this function.
+    rows (list): The rows to show, in order.
+    key (callable): Returns the unique key of a row, used as its item ID.
+    """
+    shown = _treeview_rows.setdefault(str(tree), {})
+    wanted = {str(key(row)): tuple(row) for row in rows}
+    for iid in [iid for iid in shown if iid not in wanted]:
+        tree.delete(iid)
+        del shown[iid]
+    for index, (iid, values) in enumerate(wanted.items()):
+        if iid not in shown:
+            tree.insert("", index, iid=iid, values=values)
+        elif shown[iid] != values:
+            tree.item(iid, values=values)
+        shown[iid] = values
+    order = tuple(wanted)
+    if tuple(tree.get_children()) != order:
+        for index, iid in enumerate(order):
+            tree.move(iid, "", index)
+
+# Tkinter GUI for donors, inventory and donations
+class InventoryWindow:
+    def __init__(self, root, db_path=None):
+        """
+        Initialize the InventoryWindow class.
+
+        The window only reads its entry fields and shows results; all database work
+        goes through the repositories.
+
+        Parameters:
+        root (tk.Tk): The root window.
+        db_path (str): The path to the blood bank database, DB_PATH by default.
+        """
+        self.root = root
+        self.root.title("Blood Bank Management System")
+
+        # Initialize the database
+        init_db(db_path)
+        self.donors = DonorRepository(db_path)
+        self.donations = DonationRepository(db_path)
+        self.inventory = InventoryRepository(db_path)
+
+        self.create_widgets()
+
+        # View initial data
+        self.view_donors()
+        self.view_inventory()
+        self.view_donations()
 
+    def create_widgets(self):
+        frame = ttk.Frame(self.root, padding="10")
+        frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+
+        ttk.Label(frame, text="Name:").grid(row=0, column=0, sticky=tk.W, pady=5)
+        self.entry_name = ttk.Entry(frame)
+        self.entry_name.grid(row=0, column=1, pady=5)
+
+        ttk.Label(frame, text="Blood Type:").grid(row=1, column=0, sticky=tk.W, pady=5)
+        self.entry_blood_type = ttk.Entry(frame)
+        self.entry_blood_type.grid(row=1, column=1, pady=5)
+
+        ttk.Label(frame, text="Contact:").grid(row=2, column=0, sticky=tk.W, pady=5)
+        self.entry_contact = ttk.Entry(frame)
+        self.entry_contact.grid(row=2, column=1, pady=5)
+
+        ttk.Label(frame, text="Quantity:").grid(row=3, column=0, sticky=tk.W, pady=5)
+        self.entry_quantity = ttk.Entry(frame)
+        self.entry_quantity.grid(row=3, column=1, pady=5)
+
+        ttk.Label(frame, text="Expiration Date (YYYY-MM-DD):").grid(row=4, column=0, sticky=tk.W, pady=5)
+        self.entry_expiration_date = ttk.Entry(frame)
+        self.entry_expiration_date.grid(row=4, column=1, pady=5)
+
+        ttk.Label(frame, text="Date (YYYY-MM-DD):").grid(row=5, column=0, sticky=tk.W, pady=5)
+        self.entry_date = ttk.Entry(frame)
+        self.entry_date.grid(row=5, column=1, pady=5)
+
+        ttk.Button(frame, text="Add Donor", command=self.add_donor).grid(row=6, column=0, columnspan=2, pady=5)
+        ttk.Button(frame, text="Update Donor", command=self.update_donor).grid(row=7, column=0, columnspan=2, pady=5)
+        ttk.Button(frame, text="Delete Donor", command=self.delete_donor).grid(row=8, column=0, columnspan=2, pady=5)
+        ttk.Button(frame, text="Search Donor", command=self.search_donor).grid(row=9, column=0, columnspan=2, pady=5)
+        ttk.Button(frame, text="Add Blood", command=self.add_blood).grid(row=10, column=0, columnspan=2, pady=5)
+        ttk.Button(frame, text="Issue Blood", command=self.update_inventory).grid(row=11, column=0, columnspan=2, pady=5)
+        ttk.Button(frame, text="Record Donation", command=self.record_donation).grid(row=12, column=0, columnspan=2, pady=5)
+
+        # Create treeviews for displaying tables
+        self.tree_donors = ttk.Treeview(frame, columns=("ID", "Name", "Blood Type", "Contact"), show='headings')
+        self.tree_donors.heading("ID", text="ID")
+        self.tree_donors.heading("Name", text="Name")
+        self.tree_donors.heading("Blood Type", text="Blood Type")
+        self.tree_donors.heading("Contact", text="Contact")
+        self.tree_donors.grid(row=13, column=0, columnspan=2, pady=5)
+
+        self.tree_inventory = ttk.Treeview(frame, columns=("ID", "Blood Type", "Quantity", "Expiration Date"), show='headings')
+        self.tree_inventory.heading("ID", text="ID")
+        self.tree_inventory.heading("Blood Type", text="Blood Type")
+        self.tree_inventory.heading("Quantity", text="Quantity")
+        self.tree_inventory.heading("Expiration Date", text="Expiration Date")
+        self.tree_inventory.grid(row=14, column=0, columnspan=2, pady=5)
+
+        self.tree_donations = ttk.Treeview(frame, columns=("ID", "Donor ID", "Date", "Blood Type", "Quantity"), show='headings')
+        self.tree_donations.heading("ID", text="ID")
+        self.tree_donations.heading("Donor ID", text="Donor ID")
+        self.tree_donations.heading("Date", text="Date")
+        self.tree_donations.heading("Blood Type", text="Blood Type")
+        self.tree_donations.heading("Quantity", text="Quantity")
+        self.tree_donations.grid(row=15, column=0, columnspan=2, pady=5)
+
+        stock_columns = ("Blood Type", "Units", *[f"Expiring {days}d" for days in EXPIRY_WINDOWS_DAYS], "Donations", "Donated Units")
+        self.tree_stock = ttk.Treeview(frame, columns=stock_columns, show='headings', height=len(BLOOD_TYPES))
+        for column in stock_columns:
+            self.tree_stock.heading(column, text=column)
+        self.tree_stock.grid(row=16, column=0, columnspan=2, pady=5)
+
+    # Add a new donor
+    def add_donor(self):
+        try:
+            self.donors.add(self.entry_name.get(), self.entry_blood_type.get(), self.entry_contact.get())
+        except ValueError as e:
+            messagebox.showwarning("Input error", str(e))
+            return
+        messagebox.showinfo("Success", "Donor added successfully!")
+        self.clear_entries()
+        self.view_donors()
+
+    # Update donor information
+    def update_donor(self):
+        name = self.entry_name.get()
+        try:
+            for donor_id, *_ in self.donors.find_by_name(name):
+                self.donors.update(donor_id, name, self.entry_blood_type.get(), self.entry_contact.get())
+        except ValueError as e:
+            messagebox.showwarning("Input error", str(e))
+            return
+        messagebox.showinfo("Success", "Donor information updated successfully!")
+        self.clear_entries()
+        self.view_donors()
+
+    # Delete a donor
+    def delete_donor(self):
+        for donor_id, *_ in self.donors.find_by_name(self.entry_name.get()):
+            self.donors.delete(donor_id)
+        messagebox.showinfo("Success", "Donor deleted successfully!")
+        self.clear_entries()
+        self.view_donors()
+
+    # Search for a donor by name
+    def search_donor(self):
+        rows = self.donors.find_by_name(self.entry_name.get())
+        if rows:
+            messagebox.showinfo("Donor Found", f"Name: {rows[0][1]}, Blood Type: {rows[0][2]}, Contact: {rows[0][3]}")
+        else:
+            messagebox.showinfo("Donor Not Found", "No donor found with the given name.")
+
+    # Add blood to inventory
+    def add_blood(self):
+        try:
+            self.inventory.add_lot(self.entry_blood_type.get(), self.entry_quantity.get(), self.entry_expiration_date.get())
+        except ValueError as e:
+            messagebox.showwarning("Input error", str(e))
+            return
+        messagebox.showinfo("Success", "Blood added to inventory successfully!")
+        self.clear_entries()
+        self.view_inventory()
+
+    # Issue blood from inventory, first-expiring lots first
+    def update_inventory(self):
+        blood_type = self.entry_blood_type.get()
+        quantity = self.entry_quantity.get()
+        try:
+            taken = self.inventory.issue(blood_type, quantity)
+        except ValueError as e:
+            messagebox.showwarning("Inventory error", str(e))
+            return
+        lots = ", ".join(f"lot {lot_id}: {units} (expires {expiration_date})" for lot_id, units, expiration_date in taken)
+        messagebox.showinfo("Success", f"Issued {quantity} units of {blood_type} from {lots}.")
+        self.clear_entries()
+        self.view_inventory()
+
+    # Record a donation
+    def record_donation(self):
+        donor_id = DonorLookup(self.donors.conn).resolve(self.entry_name.get(), self.entry_contact.get())
+        if donor_id is None:
+            messagebox.showwarning("Input error", "No single donor matches that name and contact.")
+            return
+        try:
+            self.donations.record(donor_id, self.entry_date.get(), self.entry_blood_type.get(), self.entry_quantity.get(),
+                                  inventory=self.inventory.index)
+        except ValueError as e:
+            messagebox.showwarning("Input error", str(e))
+            return
+        messagebox.showinfo("Success", "Donation recorded successfully!")
+        self.clear_entries()
+        self.view_donations()
+        self.view_inventory()
+
+    # View donors in a table
+    def view_donors(self):
+        sync_treeview(self.tree_donors, self.donors.list_all())
+
+    # View inventory in a table
+    def view_inventory(self):
+        sync_treeview(self.tree_inventory, self.inventory.list_lots())
+        self.view_stock_levels()
+
+    # View donations in a table
+    def view_donations(self):
+        sync_treeview(self.tree_donations, self.donations.list_all())
+        self.view_stock_levels()
+
+    # View the stock dashboard
+    def view_stock_levels(self):
+        sync_treeview(self.tree_stock, self.inventory.stock_levels())
+
+    # Clear entry fields
+    def clear_entries(self):
+        self.entry_name.delete(0, tk.END)
+        self.entry_blood_type.delete(0, tk.END)
+        self.entry_contact.delete(0, tk.END)
+        self.entry_quantity.delete(0, tk.END)
+        self.entry_expiration_date.delete(0, tk.END)
+        self.entry_date.delete(0, tk.END)
+
+if __name__ == "__main__":
+    # Create the main application window
+    root = tk.Tk()
+    app = InventoryWindow(root)
+    root.mainloop()
+
+# User authentication functions
 def register_user(username, password, role):
     """
     Register a new user.
@@ -288,7 +1706,7 @@ def register_user(username, password, role):
     role (str): The role of the user (admin, staff, donor).
     """
     hashed_password = hash_password(password)
-    conn = sqlite3.connect('blood_bank.db')
+    conn = connect()
     c = conn.cursor()
     c.execute("INSERT INTO users (username, password, role) VALUES (?, ?, ?)", (username, hashed_password, role))
     conn.commit()
@@ -296,22 +1714,13 @@ def register_user(username, password, role):
 
 def login_user(username, password):
     """
-    Log in a user.
-
-    Parameters:
-    username (str): The username of the user.
-    password (str): The password of the user.
-
-    Returns:
-    tuple: A tuple containing the user information if login is successful, None otherwise.
+    Log in a user (see passwords.login_user). Call this off the Tk thread.
     """
-    hashed_password = hash_password(password)
-    conn = sqlite3.connect('blood_bank.db')
-    c = conn.cursor()
-    c.execute("SELECT id, username, role FROM users WHERE username = ? AND password = ?", (username, hashed_password))
-    user = c.fetchone()
-    conn.close()
-    return user
+    conn = connect()
+    try:
+        return passwords.login_user(conn, username, password)
+    finally:
+        conn.close()
 
 # Tkinter GUI for user authentication
 class AuthApp:
@@ -328,6 +1737,7 @@ class AuthApp:
         self.username = tk.StringVar()
         self.password = tk.StringVar()
         self.role = tk.StringVar()
+        self.results = queue.Queue()
 
         self.create_widgets()
 
@@ -341,8 +1751,46 @@ class AuthApp:
         tk.Entry(self.root, textvariable=self.password, show='*').grid(row=1, column=1, padx=10, pady=10)
         tk.Label(self.root, text="Role:").grid(row=2, column=0, padx=10, pady=10)
         tk.Entry(self.root, textvariable=self.role).grid(row=2, column=1, padx=10, pady=10)
-        tk.Button(self.root, text="Register", command=self.register_user).grid(row=3, column=0, padx=10, pady=10)
-        tk.Button(self.root, text="Login", command=self.login_user).grid(row=3, column=1, padx=10, pady=10)
+        self.register_button = tk.Button(self.root, text="Register", command=self.register_user)
+        self.register_button.grid(row=3, column=0, padx=10, pady=10)
+        self.login_button = tk.Button(self.root, text="Login", command=self.login_user)
+        self.login_button.grid(row=3, column=1, padx=10, pady=10)
+
+    def run_in_background(self, func, args, on_done):
+        """
+        Run func(*args) on a worker thread, since password hashing is slow, and pass
+        its result to on_done on the Tk thread.
+
+        Parameters:
+        func (callable): The function to run.
+        args (tuple): The arguments for func.
+        on_done (callable): Called with the result of func.
+        """
+        def work():
+            try:
+                self.results.put((on_done, func(*args)))
+            except Exception as e:
+                self.results.put((None, e))
+        self.register_button.config(state=tk.DISABLED)
+        self.login_button.config(state=tk.DISABLED)
+        threading.Thread(target=work, daemon=True).start()
+        self.root.after(50, self.check_results)
+
+    def check_results(self):
+        """
+        Deliver the result of the background work once it is ready.
+        """
+        try:
+            on_done, result = self.results.get_nowait()
+        except queue.Empty:
+            self.root.after(50, self.check_results)
+            return
+        self.register_button.config(state=tk.NORMAL)
+        self.login_button.config(state=tk.NORMAL)
+        if on_done is None:
+            messagebox.showerror("Error", str(result))
+        else:
+            on_done(result)
 
     def register_user(self):
         """
@@ -352,8 +1800,8 @@ class AuthApp:
         password = self.password.get()
         role = self.role.get()
         if username and password and role:
-            register_user(username, password, role)
-            messagebox.showinfo("Success", "User registered successfully.")
+            self.run_in_background(register_user, (username, password, role),
+                                   lambda result: messagebox.showinfo("Success", "User registered successfully."))
         else:
             messagebox.showwarning("Input error", "Please fill in all fields.")
 
@@ -364,56 +1812,154 @@ class AuthApp:
         username = self.username.get()
         password = self.password.get()
         if username and password:
-            user = login_user(username, password)
-            if user:
-                messagebox.showinfo("Success", f"Welcome, {user[1]}!")
-                # Proceed to the main application
-                self.root.destroy()
-                main_app = BloodBankApp(tk.Tk())
-                main_app.root.mainloop()
-            else:
-                messagebox.showwarning("Login error", "Invalid username or password.")
+            self.run_in_background(login_user, (username, password), self.finish_login)
         else:
             messagebox.showwarning("Input error", "Please fill in all fields.")
 
+    def finish_login(self, user):
+        """
+        Open the main application after a successful login.
+
+        Parameters:
+        user (tuple): The user information from login_user, or None if it failed.
+        """
+        if user:
+            messagebox.showinfo("Success", f"Welcome, {user[1]}!")
+            # Proceed to the main application
+            self.root.destroy()
+            main_app = BloodBankApp(tk.Tk())
+            main_app.root.mainloop()
+        else:
+            messagebox.showwarning("Login error", "Invalid username or password.")
+
 if __name__ == "__main__":
     init_db()
     root = tk.Tk()
     auth_app = AuthApp(root)
     root.mainloop()
 
+# Total donations by blood type in date buckets
+def get_donation_buckets(start_date, end_date, bucket='month', db_path=None):
+    """
+    Get the donations and units received for each blood type in each day, week or
+    month of a date range, or in buckets of a custom number of days.
+
+    The totals are grouped from the trigger-maintained donations_by_day table,
+    which has at most one row per day and blood type, so the cost does not grow
+    with the number of donations. Results are cached until a donation is added,
+    changed or deleted, which the donation_generation counter records.
+
+    Parameters:
+    start_date (str): The start date (YYYY-MM-DD).
+    end_date (str): The end date (YYYY-MM-DD), inclusive.
+    bucket (str or int): 'day', 'week' (starting Monday), 'month', or a number of days
+                         counted from the start date.
+    db_path (str): The path to the blood bank database, DB_PATH by default.
+
+    Returns:
+    list: (bucket_start, blood_type, donations, units) tuples, by bucket and blood type.
+    """
+    if bucket not in DONATION_BUCKETS and not (isinstance(bucket, int) and bucket > 0):
+        raise ValueError(f"Invalid bucket, expected one of {', '.join(DONATION_BUCKETS)} or a number of days: {bucket!r}")
+    key = (db_path or DB_PATH, start_date, end_date, bucket)
+    conn = connect(db_path)
+    try:
+        generation = conn.execute("SELECT generation FROM donation_generation").fetchone()[0]
+        cached = _report_cache.get(key)
+        if cached and cached[0] == generation:
+            return cached[1]
+        if bucket in DONATION_BUCKETS:
+            rows = conn.execute(f"""SELECT {DONATION_BUCKETS[bucket]} AS bucket_start, blood_type, SUM(donations), SUM(units)
+                                    FROM donations_by_day WHERE date BETWEEN ? AND ?
+                                    GROUP BY bucket_start, blood_type ORDER BY bucket_start, blood_type""",
+                                (start_date, end_date)).fetchall()
+        else:
+            daily_rows = conn.execute("""SELECT date, blood_type, donations, units FROM donations_by_day
+                                         WHERE date BETWEEN ? AND ?""", (start_date, end_date)).fetchall()
+            rows = bin_donations(daily_rows, start_date, bucket)
+    finally:
+        conn.close()
+    _report_cache[key] = (generation, rows)
+    while len(_report_cache) > REPORT_CACHE_SIZE:
+        del _report_cache[next(iter(_report_cache))]
+    return rows
+
+# Add up daily donation totals in buckets of a number of days
+def bin_donations(daily_rows, start_date, days, use_numpy=True):
+    """
+    Add up daily donation totals in buckets of a number of days, with NumPy when it
+    is installed.
+
+    Parameters:
+    daily_rows (list): (date, blood_type, donations, units) tuples, one per day and blood type.
+    start_date (str): The date the first bucket starts (YYYY-MM-DD).
+    days (int): The number of days in each bucket.
+    use_numpy (bool): Whether to use NumPy if it is installed.
+
+    Returns:
+    list: (bucket_start, blood_type, donations, units) tuples, by bucket and blood type.
+    """
+    np = None
+    if use_numpy:
+        try:
+            import numpy as np
+        except ImportError:
+            pass
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    if np is not None and daily_rows:
+        dates, blood_types, donations, units = zip(*daily_rows)
+        offsets = (np.array(dates, dtype='datetime64[D]') - np.datetime64(start_date, 'D')).astype(np.int64) // days
+        type_names, type_indexes = np.unique(np.array(blood_types), return_inverse=True)
+        cells = offsets * len(type_names) + type_indexes
+        size = (int(offsets.max()) + 1) * len(type_names)
+        donation_sums = np.bincount(cells, weights=donations, minlength=size)
+        unit_sums = np.bincount(cells, weights=units, minlength=size)
+        totals = {}
+        for cell in np.flatnonzero(donation_sums):
+            bucket_index, type_index = divmod(int(cell), len(type_names))
+            totals[(bucket_index, str(type_names[type_index]))] = (int(donation_sums[cell]), int(unit_sums[cell]))
+    else:
+        totals = {}
+        for date_text, blood_type, donations, units in daily_rows:
+            bucket_index = (datetime.strptime(date_text, '%Y-%m-%d') - start).days // days
+            previous = totals.get((bucket_index, blood_type), (0, 0))
+            totals[(bucket_index, blood_type)] = (previous[0] + donations, previous[1] + units)
+    return [((start + timedelta(days=bucket_index * days)).strftime('%Y-%m-%d'), blood_type, donations, units)
+            for (bucket_index, blood_type), (donations, units) in sorted(totals.items())]
+
 # Generate donation chart
-def generate_donation_chart(start_date, end_date):
+def generate_donation_chart(start_date, end_date, bucket='month'):
     """
-    Generate a donation chart for a specific date range.
+    Generate a donation chart for a specific date range, with one bar per bucket
+    stacked by blood type.
 
     Parameters:
     start_date (str): The start date of the report.
     end_date (str): The end date of the report.
+    bucket (str or int): The bucket size (see get_donation_buckets).
 
     Returns:
     Figure: A Matplotlib figure containing the donation chart.
     """
-    conn = sqlite3.connect('blood_bank.db')
-    c = conn.cursor()
-    c.execute("SELECT donors.name, donations.date, donations.quantity FROM donations JOIN donors ON donations.donor_id = donors.id WHERE donations.date BETWEEN ? AND ?", (start_date, end_date))
-    records = c.fetchall()
-    conn.close()
+    import matplotlib.pyplot as plt
 
-    donation_data = {}
-    for record in records:
-        donor_name = record[0]
-        quantity = record[2]
-        if donor_name not in donation_data:
-            donation_data[donor_name] = 0
-        donation_data[donor_name] += quantity
+    buckets = get_donation_buckets(start_date, end_date, bucket)
+    labels = sorted({row[0] for row in buckets})
+    positions = {label: index for index, label in enumerate(labels)}
+    units_by_type = {}
+    for bucket_start, blood_type, donations, units in buckets:
+        units_by_type.setdefault(blood_type, [0] * len(labels))[positions[bucket_start]] = units
 
     fig, ax = plt.subplots()
-    for donor, data in donation_data.items():
-        ax.bar(donor, data, color='b')
+    bottoms = [0] * len(labels)
+    for blood_type in sorted(units_by_type, key=lambda name: BLOOD_TYPES.index(name) if name in BLOOD_TYPES else len(BLOOD_TYPES)):
+        heights = units_by_type[blood_type]
+        ax.bar(labels, heights, bottom=bottoms, label=blood_type)
+        bottoms = [bottom + height for bottom, height in zip(bottoms, heights)]
 
     ax.set_ylabel('Quantity of Blood Donated')
     ax.set_title('Donation Report')
+    ax.tick_params(axis='x', labelrotation=45)
     ax.legend()
 
     return fig
@@ -431,6 +1977,9 @@ class ReportApp:
 
         self.start_date = tk.StringVar()
         self.end_date = tk.StringVar()
+        self.bucket = tk.StringVar(value='month')
+        self.bucket_days = tk.StringVar()
+        self.chart = None
 
         self.create_widgets()
 
@@ -442,23 +1991,38 @@ class ReportApp:
         tk.Entry(self.root, textvariable=self.start_date).grid(row=0, column=1, padx=10, pady=10)
         tk.Label(self.root, text="End Date:").grid(row=1, column=0, padx=10, pady=10)
         tk.Entry(self.root, textvariable=self.end_date).grid(row=1, column=1, padx=10, pady=10)
-        tk.Button(self.root, text="Generate Chart", command=self.generate_chart).grid(row=2, column=1, padx=10, pady=10)
+        tk.Label(self.root, text="Group By:").grid(row=2, column=0, padx=10, pady=10)
+        tk.OptionMenu(self.root, self.bucket, *DONATION_BUCKETS).grid(row=2, column=1, padx=10, pady=10)
+        tk.Label(self.root, text="Or Every N Days:").grid(row=3, column=0, padx=10, pady=10)
+        tk.Entry(self.root, textvariable=self.bucket_days).grid(row=3, column=1, padx=10, pady=10)
+        tk.Button(self.root, text="Generate Chart", command=self.generate_chart).grid(row=4, column=1, padx=10, pady=10)
 
         self.canvas = tk.Canvas(self.root, width=800, height=400)
-        self.canvas.grid(row=3, column=0, columnspan=2, padx=10, pady=10)
+        self.canvas.grid(row=5, column=0, columnspan=2, padx=10, pady=10)
 
     def generate_chart(self):
         """
         Generate and display the donation chart.
         """
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
         start_date = self.start_date.get()
         end_date = self.end_date.get()
+        bucket_days = self.bucket_days.get().strip()
+        if bucket_days and not (bucket_days.isdigit() and int(bucket_days) > 0):
+            messagebox.showwarning("Input error", "Please enter a whole number of days to group by.")
+            return
+        bucket = int(bucket_days) if bucket_days else self.bucket.get()
         if start_date and end_date:
             if validate_date(start_date) and validate_date(end_date):
-                fig = generate_donation_chart(start_date, end_date)
-                canvas = FigureCanvasTkAgg(fig, master=self.canvas)
-                canvas.draw()
-                canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
+                fig = generate_donation_chart(start_date, end_date, bucket)
+                if self.chart:
+                    self.chart.get_tk_widget().destroy()
+                    plt.close(self.chart.figure)
+                self.chart = FigureCanvasTkAgg(fig, master=self.canvas)
+                self.chart.draw()
+                self.chart.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
             else:
                 messagebox.showwarning("Input error", "Please enter valid dates in YYYY-MM-DD format.")
         else:
@@ -470,34 +2034,8 @@ if __name__ == "__main__":
     report_app = ReportApp(root)
     root.mainloop()
 
-# Send email notifications
-def send_email_notification(to_email, subject, body):
-    """
-    Send an email notification.
-
-    Parameters:
-    to_email (str): The recipient's email address.
-    subject (str): The subject of the email.
-    body (str): The body of the email.
-    """
-    from_email = "your_email@example.com"
-    from_password = "your_password"
-
-    msg = MIMEMultipart()
-    msg['From'] = from_email
-    msg['To'] = to_email
-    msg['Subject'] = subject
-
-    msg.attach(MIMEText(body, 'plain'))
-
-    server = smtplib.SMTP('smtp.example.com', 587)
-    server.starttls()
-    server.login(from_email, from_password)
-    text = msg.as_string()
-    server.sendmail(from_email, to_email, text)
-    server.quit()
-
-def send_donation_reminder(donor_email, donor_name, date):
+# Email notifications
+def send_donation_reminder(donor_email, donor_name, date, dispatcher=None):
     """
     Send a donation reminder to a donor.
 
@@ -505,12 +2043,16 @@ def send_donation_reminder(donor_email, donor_name, date):
     donor_email (str): The donor's email address.
     donor_name (str): The donor's name.
     date (str): The date of the donation.
+    dispatcher (NotificationDispatcher): Queue the email on this dispatcher instead of sending it directly.
     """
     subject = "Donation Reminder"
     body = f"Dear {donor_name},\n\nThis is a reminder that your donation for {date} has not been marked. Please contact the blood bank for more information.\n\nBest regards,\nBlood Bank System"
-    send_email_notification(donor_email, subject, body)
+    if dispatcher:
+        dispatcher.send(donor_email, subject, body)
+    else:
+        send_email_notification(donor_email, subject, body)
 
-def send_donation_update(donor_email, donor_name, date, quantity):
+def send_donation_update(donor_email, donor_name, date, quantity, dispatcher=None):
     """
     Send a donation update to a donor.
 
@@ -519,10 +2061,87 @@ def send_donation_update(donor_email, donor_name, date, quantity):
     donor_name (str): The donor's name.
     date (str): The date of the donation.
     quantity (int): The quantity of blood donated.
+    dispatcher (NotificationDispatcher): Queue the email on this dispatcher instead of sending it directly.
     """
     subject = "Donation Update"
     body = f"Dear {donor_name},\n\nYour donation for {date} has been marked as {quantity} units of blood.\n\nBest regards,\nBlood Bank System"
-    send_email_notification(donor_email, subject, body)
+    if dispatcher:
+        dispatcher.send(donor_email, subject, body)
+    else:
+        send_email_notification(donor_email, subject, body)
+
+def send_eligibility_reminder(donor_email, donor_name, eligible_date, dispatcher=None):
+    """
+    Tell a donor they can donate again.
+
+    Parameters:
+    donor_email (str): The donor's email address.
+    donor_name (str): The donor's name.
+    eligible_date (str): The first date the donor may donate again.
+    dispatcher (NotificationDispatcher): Queue the email on this dispatcher instead of sending it directly.
+    """
+    subject = "You Can Donate Again"
+    body = f"Dear {donor_name},\n\nThank you for your last donation. You are eligible to donate blood again from {eligible_date}. Please contact the blood bank to book an appointment.\n\nBest regards,\nBlood Bank System"
+    if dispatcher:
+        dispatcher.send(donor_email, subject, body)
+    else:
+        send_email_notification(donor_email, subject, body)
+
+# Find donors who become eligible to donate again in a date window
+def get_recall_batches(start_date, end_date, batch_size=EMAIL_BATCH_SIZE, db_path=None):
+    """
+    Yield the donors whose next eligible date falls in a window, in batches.
+
+    A single range query over the next_eligible_date index finds them, and rows are
+    fetched one batch at a time, so a large campaign is never held in memory.
+
+    Parameters:
+    start_date (str): The start of the window (YYYY-MM-DD).
+    end_date (str): The end of the window (YYYY-MM-DD), inclusive.
+    batch_size (int): The number of donors in each batch.
+    db_path (str): The path to the blood bank database, DB_PATH by default.
+
+    Yields:
+    list: (donor_id, name, contact, next_eligible_date) tuples, earliest eligible first.
+    """
+    conn = connect(db_path)
+    c = conn.cursor()
+    try:
+        c.execute("""SELECT id, name, contact, next_eligible_date FROM donors
+                     WHERE next_eligible_date BETWEEN ? AND ? ORDER BY next_eligible_date, id""", (start_date, end_date))
+        while True:
+            batch = c.fetchmany(batch_size)
+            if not batch:
+                break
+            yield batch
+    finally:
+        conn.close()
+
+# Send recall reminders to donors who become eligible in a date window
+def send_recall_reminders(start_date, end_date, dispatcher, db_path=None):
+    """
+    Queue a reminder for every donor who becomes eligible to donate again in a
+    window. Donors whose contact is not an email address are skipped.
+
+    Parameters:
+    start_date (str): The start of the window (YYYY-MM-DD).
+    end_date (str): The end of the window (YYYY-MM-DD), inclusive.
+    dispatcher (NotificationDispatcher): The dispatcher that sends the emails.
+    db_path (str): The path to the blood bank database, DB_PATH by default.
+
+    Returns:
+    tuple: The number of reminders queued and the number of donors skipped.
+    """
+    queued = skipped = 0
+    for batch in get_recall_batches(start_date, end_date, dispatcher.batch_size, db_path):
+        for donor_id, name, contact, eligible_date in batch:
+            if validate_email(contact):
+                send_eligibility_reminder(contact, name, eligible_date, dispatcher)
+                queued += 1
+            else:
+                skipped += 1
+    logging.info(f"Recall reminders for {start_date} to {end_date}: {queued} queued, {skipped} skipped")
+    return queued, skipped
 
 class NotificationApp:
     def __init__(self, root):
@@ -539,6 +2158,9 @@ class NotificationApp:
         self.donor_name = tk.StringVar()
         self.date = tk.StringVar()
         self.quantity = tk.StringVar()
+        self.recall_start = tk.StringVar()
+        self.recall_end = tk.StringVar()
+        self.dispatcher = NotificationDispatcher()
 
         self.create_widgets()
 
@@ -556,6 +2178,11 @@ class NotificationApp:
         tk.Entry(self.root, textvariable=self.quantity).grid(row=3, column=1, padx=10, pady=10)
         tk.Button(self.root, text="Send Reminder", command=self.send_reminder).grid(row=4, column=0, padx=10, pady=10)
         tk.Button(self.root, text="Send Update", command=self.send_update).grid(row=4, column=1, padx=10, pady=10)
+        tk.Label(self.root, text="Eligible From:").grid(row=5, column=0, padx=10, pady=10)
+        tk.Entry(self.root, textvariable=self.recall_start).grid(row=5, column=1, padx=10, pady=10)
+        tk.Label(self.root, text="Eligible To:").grid(row=6, column=0, padx=10, pady=10)
+        tk.Entry(self.root, textvariable=self.recall_end).grid(row=6, column=1, padx=10, pady=10)
+        tk.Button(self.root, text="Send Recall Reminders", command=self.send_recall).grid(row=7, column=0, columnspan=2, padx=10, pady=10)
 
     def send_reminder(self):
         """
@@ -566,8 +2193,8 @@ class NotificationApp:
         date = self.date.get()
         if donor_email and donor_name and date:
             if validate_date(date):
-                send_donation_reminder(donor_email, donor_name, date)
-                messagebox.showinfo("Success", "Reminder sent successfully.")
+                send_donation_reminder(donor_email, donor_name, date, self.dispatcher)
+                messagebox.showinfo("Success", "Reminder queued for sending.")
             else:
                 messagebox.showwarning("Input error", "Please enter a valid date in YYYY-MM-DD format.")
         else:
@@ -583,13 +2210,28 @@ class NotificationApp:
         quantity = self.quantity.get()
         if donor_email and donor_name and date and quantity:
             if validate_date(date):
-                send_donation_update(donor_email, donor_name, date, quantity)
-                messagebox.showinfo("Success", "Update sent successfully.")
+                send_donation_update(donor_email, donor_name, date, quantity, self.dispatcher)
+                messagebox.showinfo("Success", "Update queued for sending.")
             else:
                 messagebox.showwarning("Input error", "Please enter a valid date in YYYY-MM-DD format.")
         else:
             messagebox.showwarning("Input error", "Please fill in all fields.")
 
+    def send_recall(self):
+        """
+        Remind every donor who becomes eligible to donate again in the window.
+        """
+        start_date = self.recall_start.get()
+        end_date = self.recall_end.get()
+        if start_date and end_date:
+            if validate_date(start_date) and validate_date(end_date):
+                queued, skipped = send_recall_reminders(start_date, end_date, self.dispatcher)
+                messagebox.showinfo("Success", f"{queued} recall reminders queued for sending, {skipped} donors without an email address skipped.")
+            else:
+                messagebox.showwarning("Input error", "Please enter valid dates in YYYY-MM-DD format.")
+        else:
+            messagebox.showwarning("Input error", "Please fill in the eligibility window.")
+
 if __name__ == "__main__":
     init_db()
     root = tk.Tk()
@@ -611,7 +2253,7 @@ def advanced_search_donors(name=None, blood_type=None, donation_status=None, sta
     Returns:
     list: A list of tuples containing donor information that matches the criteria.
     """
-    conn = sqlite3.connect('blood_bank.db')
+    conn = connect()
     c = conn.cursor()
 
     query = "SELECT DISTINCT donors.id, donors.name, donors.blood_type FROM donors"
@@ -639,6 +2281,109 @@ def advanced_search_donors(name=None, blood_type=None, donation_status=None, sta
     conn.close()
     return donors
 
+# Build the donor/recipient compatibility bitmasks
+def build_compatibility_masks():
+    """
+    Build, for each recipient blood type, a bitmask of the donor types it can
+    receive, with bit i standing for BLOOD_TYPES[i]. A donor is compatible when
+    the recipient has every antigen (A, B, Rh D) that the donor's red cells carry.
+
+    Returns:
+    dict: The bitmask of compatible donor types for each recipient type.
+    """
+    antigens = {}
+    for blood_type in BLOOD_TYPES:
+        group, rh = blood_type[:-1], blood_type[-1]
+        antigens[blood_type] = ('A' in group) | ('B' in group) << 1 | (rh == '+') << 2
+    masks = {}
+    for recipient in BLOOD_TYPES:
+        masks[recipient] = 0
+        for i, donor in enumerate(BLOOD_TYPES):
+            if antigens[donor] & ~antigens[recipient] == 0:
+                masks[recipient] |= 1 << i
+    return masks
+
+COMPATIBLE_DONOR_MASKS = build_compatibility_masks()
+
+# List the donor blood types a recipient can receive
+def compatible_donor_types(recipient_type):
+    """
+    Get the blood types a recipient can safely receive red cells from.
+
+    Parameters:
+    recipient_type (str): The recipient's blood type.
+
+    Returns:
+    list: The compatible donor blood types.
+
+    Raises:
+    ValueError: If the blood type is not recognised.
+    """
+    if recipient_type not in COMPATIBLE_DONOR_MASKS:
+        raise ValueError(f"Unknown blood type: {recipient_type}")
+    mask = COMPATIBLE_DONOR_MASKS[recipient_type]
+    return [blood_type for i, blood_type in enumerate(BLOOD_TYPES) if mask >> i & 1]
+
+# Find compatible blood in the inventory
+def find_compatible_inventory(recipient_type, on_date=None, limit=None, db_path=None):
+    """
+    Find the unexpired inventory lots a recipient can receive, soonest to expire first.
+
+    Parameters:
+    recipient_type (str): The recipient's blood type.
+    on_date (str): The date the blood is needed (YYYY-MM-DD), today by default.
+    limit (int): The most lots to return, or None for all of them.
+    db_path (str): The path to the blood bank database, DB_PATH by default.
+
+    Returns:
+    list: A list of (lot_id, blood_type, quantity, expiration_date) tuples.
+    """
+    donor_types = compatible_donor_types(recipient_type)
+    on_date = on_date or datetime.now().strftime('%Y-%m-%d')
+    conn = connect(db_path)
+    c = conn.cursor()
+    c.execute(f"""SELECT id, blood_type, quantity, expiration_date FROM inventory
+                  WHERE blood_type IN ({", ".join("?" * len(donor_types))}) AND expiration_date >= ? AND quantity > 0
+                  ORDER BY expiration_date, id LIMIT ?""", (*donor_types, on_date, -1 if limit is None else limit))
+    lots = c.fetchall()
+    conn.close()
+    return lots
+
+# Find donors who can give blood to a recipient
+def find_eligible_donors(recipient_type, on_date=None, limit=50, db_path=None):
+    """
+    Find compatible donors who are eligible to donate, longest since their last
+    donation first; donors who have never donated come first of all.
+
+    Each compatible type is read in order from the (blood_type, last_donation_date)
+    index and cut off at the limit, all in one compound query, so the lookup
+    touches at most limit rows per type however many donors there are.
+
+    Parameters:
+    recipient_type (str): The recipient's blood type.
+    on_date (str): The date the blood is needed (YYYY-MM-DD), today by default.
+    limit (int): The most donors to return.
+    db_path (str): The path to the blood bank database, DB_PATH by default.
+
+    Returns:
+    list: A list of (donor_id, name, blood_type, contact, last_donation_date) tuples.
+    """
+    donor_types = compatible_donor_types(recipient_type)
+    on_date = on_date or datetime.now().strftime('%Y-%m-%d')
+    last_eligible = (datetime.strptime(on_date, '%Y-%m-%d') - timedelta(days=DONATION_INTERVAL_DAYS)).strftime('%Y-%m-%d')
+    per_type = """SELECT * FROM (SELECT id, name, blood_type, contact, last_donation_date FROM donors
+                      WHERE blood_type = ? AND (last_donation_date IS NULL OR last_donation_date <= ?)
+                      ORDER BY last_donation_date LIMIT ?)"""
+    params = []
+    for blood_type in donor_types:
+        params += [blood_type, last_eligible, limit]
+    conn = connect(db_path)
+    c = conn.cursor()
+    c.execute(" UNION ALL ".join([per_type] * len(donor_types)) + " ORDER BY last_donation_date, id LIMIT ?", (*params, limit))
+    donors = c.fetchall()
+    conn.close()
+    return donors
+
 class AdvancedSearchApp:
     def __init__(self, root):
         """
@@ -835,117 +2580,122 @@ if __name__ == "__main__":
     validation_app = ValidationApp(root)
     root.mainloop()
 
-# Unit tests
-class TestBloodBankSystem(unittest.TestCase):
-    def setUp(self):
-        """
-        Set up the test environment.
-        """
-        self.conn = sqlite3.connect(':memory:')
-        self.c = self.conn.cursor()
-        self.c.execute('''CREATE TABLE donors (
-                            id INTEGER PRIMARY KEY,
-                            name TEXT NOT NULL,
-                            blood_type TEXT NOT NULL,
-                            contact TEXT NOT NULL)''')
-        self.c.execute('''CREATE TABLE inventory (
-                            id INTEGER PRIMARY KEY,
-                            blood_type TEXT NOT NULL,
-                            quantity INTEGER NOT NULL,
-                            expiration_date TEXT NOT NULL)''')
-        self.c.execute('''CREATE TABLE donations (
-                            id INTEGER PRIMARY KEY,
-                            donor_id INTEGER,
-                            blood_type TEXT NOT NULL,
-                            quantity INTEGER NOT NULL,
-                            date TEXT NOT NULL,
-                            FOREIGN KEY(donor_id) REFERENCES donors(id))''')
-        self.c.execute('''CREATE TABLE users (
-                            id INTEGER PRIMARY KEY,
-                            username TEXT NOT NULL UNIQUE,
-                            password TEXT NOT NULL,
-                            role TEXT NOT NULL)''')
-        self.conn.commit()
-
-    def tearDown(self):
-        """
-        Tear down the test environment.
-        """
-        self.conn.close()
-
-    def test_add_donor(self):
-        """
-        Test adding a donor.
-        """
-        add_donor("John Doe", "A+", "john.doe@example.com")
-        self.c.execute("SELECT * FROM donors WHERE name = ? AND blood_type = ? AND contact = ?", ("John Doe", "A+", "john.doe@example.com"))
-        donor = self.c.fetchone()
-        self.assertIsNotNone(donor)
-
-    def test_mark_donation(self):
-        """
-        Test marking a donation.
-        """
-        add_donor("Jane Smith", "B+", "jane.smith@example.com")
-        self.c.execute("SELECT id FROM donors WHERE name = ? AND blood_type = ? AND contact = ?", ("Jane Smith", "B+", "jane.smith@example.com"))
-        donor_id = self.c.fetchone()[0]
-        mark_donation(donor_id, "2023-10-01", "A+", 1)
-        self.c.execute("SELECT * FROM donations WHERE donor_id = ? AND date = ? AND blood_type = ? AND quantity = ?", (donor_id, "2023-10-01", "A+", 1))
-        donation = self.c.fetchone()
-        self.assertIsNotNone(donation)
-
-    def test_validate_date(self):
-        """
-        Test date validation.
-        """
-        self.assertTrue(validate_date("2023-10-01"))
-        self.assertFalse(validate_date("01-10-2023"))
+# Fill a database with generated donors, donations and inventory
+def seed_database(db_path, n_donors, n_lots=5000):
+    """
+    Create the tables and fill them with generated data for benchmarks and trials.
+    Each donor gets one donation in 2023, and the lots expire through October and
+    November 2023.
 
-    def test_register_user(self):
-        """
-        Test registering a user.
-        """
-        register_user("admin", "password123", "admin")
-        self.c.execute("SELECT * FROM users WHERE username = ? AND role = ?", ("admin", "admin"))
-        user = self.c.fetchone()
-        self.assertIsNotNone(user)
+    Parameters:
+    db_path (str): The path to the database to fill.
+    n_donors (int): The number of donors to create, each with one past donation.
+    n_lots (int): The number of inventory lots to create.
+    """
+    init_db(db_path)
+    conn = connect(db_path)
+    c = conn.cursor()
+    c.executemany("INSERT INTO donors (name, blood_type, contact) VALUES (?, ?, ?)",
+                  ((f"Donor {i}", BLOOD_TYPES[i % len(BLOOD_TYPES)], f"donor{i}@example.com") for i in range(n_donors)))
+    c.executemany("INSERT INTO donations (donor_id, blood_type, quantity, date) VALUES (?, ?, 1, ?)",
+                  ((i + 1, BLOOD_TYPES[i % len(BLOOD_TYPES)], (datetime(2023, 1, 1) + timedelta(days=i % 365)).strftime('%Y-%m-%d'))
+                   for i in range(n_donors)))
+    c.executemany("INSERT INTO inventory (blood_type, quantity, expiration_date) VALUES (?, ?, ?)",
+                  ((BLOOD_TYPES[i % len(BLOOD_TYPES)], 1 + i % 5, (datetime(2023, 10, 1) + timedelta(days=i % 42)).strftime('%Y-%m-%d'))
+                   for i in range(n_lots)))
+    conn.commit()
+    conn.close()
 
-    def test_login_user(self):
-        """
-        Test logging in a user.
-        """
-        register_user("staff", "password123", "staff")
-        user = login_user("staff", "password123")
-        self.assertIsNotNone(user)
-        self.assertEqual(user[2], "staff")
+# Benchmark emergency compatibility lookups
+def benchmark_compatibility_lookup(n_donors=1000000, repeat=20):
+    """
+    Time compatible inventory and donor lookups for every recipient type on a
+    freshly populated temporary database.
 
-    def test_validate_email(self):
-        """
-        Test email validation.
-        """
-        self.assertTrue(validate_email("test@example.com"))
-        self.assertFalse(validate_email("invalid-email"))
+    Parameters:
+    n_donors (int): The number of donors to create, each with one past donation.
+    repeat (int): How many times to run the lookups for each recipient type.
 
-if __name__ == '__main__':
-    unittest.main()
+    Returns:
+    dict: The average and worst milliseconds per lookup.
+    """
+    import tempfile
+
+    timings = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, 'blood_bank.db')
+        seed_database(db_path, n_donors)
+        for recipient_type in BLOOD_TYPES:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                find_compatible_inventory(recipient_type, "2023-10-15", limit=50, db_path=db_path)
+                find_eligible_donors(recipient_type, "2023-10-15", db_path=db_path)
+                timings.append((time.perf_counter() - start) * 1000)
+    results = {"average_ms": sum(timings) / len(timings), "worst_ms": max(timings)}
+    logging.info(f"Compatibility lookup benchmark: {results}")
+    return results
+
+# Benchmark the repository operations
+def benchmark_repositories(n_donors=1000000, repeat=100):
+    """
+    Time each repository operation against a freshly seeded temporary database
+    (see seed_database), with no GUI involved.
 
-# Internationalization
-localedir = 'locales'
-lang = gettext.translation('blood_bank', localedir, languages=['en'])
-lang.install()
+    Parameters:
+    n_donors (int): The number of donors to seed, each with one past donation.
+    repeat (int): How many times to run each operation.
 
-def _(text):
+    Returns:
+    dict: The average milliseconds per call of each operation.
     """
-    Translate text using gettext.
+    import tempfile
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, 'blood_bank.db')
+        seed_database(db_path, n_donors)
+        with DonorRepository(db_path) as donors, DonationRepository(db_path) as donations, InventoryRepository(db_path) as inventory:
+            inventory.index  # load the index before timing
+            operations = {
+                "donor_add": lambda i: donors.add(f"New Donor {i}", BLOOD_TYPES[i % len(BLOOD_TYPES)], f"new{i}@example.com"),
+                "donor_get": lambda i: donors.get(1 + i * 7919 % n_donors),
+                "donor_search": lambda i: donors.search(f"donor{i * 7919 % n_donors}@example.com"),
+                "donor_eligible": lambda i: donors.eligible_for(BLOOD_TYPES[i % len(BLOOD_TYPES)], "2023-10-15"),
+                "donation_record": lambda i: donations.record(1 + i, "2023-10-15", BLOOD_TYPES[(1 + i) % len(BLOOD_TYPES)], 1),
+                "donation_report_day": lambda i: donations.report("2023-06-01", "2023-06-01"),
+                "inventory_add_lot": lambda i: inventory.add_lot(BLOOD_TYPES[i % len(BLOOD_TYPES)], 2, "2023-11-30"),
+                "inventory_issue": lambda i: inventory.issue(BLOOD_TYPES[i % len(BLOOD_TYPES)], 1, "2023-10-15"),
+                "inventory_stock_levels": lambda i: inventory.stock_levels("2023-10-15"),
+                "inventory_compatible": lambda i: inventory.compatible_lots(BLOOD_TYPES[i % len(BLOOD_TYPES)], "2023-10-15", limit=50),
+            }
+            for name, operation in operations.items():
+                start = time.perf_counter()
+                for i in range(repeat):
+                    operation(i)
+                results[name] = (time.perf_counter() - start) * 1000 / repeat
+    logging.info(f"Repository benchmark: {results}")
+    return results
+
+# Benchmark a cold start of the application
+def benchmark_startup(window=False, budget_ms=STARTUP_BUDGET_MS):
+    """
+    Time a cold start of this module in a fresh interpreter.
 
     Parameters:
-    text (str): The text to translate.
+    window (bool): Also open the InventoryWindow and wait until it is drawn. Needs a display.
+    budget_ms (float): The most the start may take.
 
     Returns:
-    str: The translated text.
+    dict: The startup benchmark results.
     """
-    return lang.gettext(text)
+    open_window = "app.InventoryWindow(root)" if window else None
+    return startup.benchmark_startup(__file__, LAZY_MODULES, open_window, budget_ms)
+
+if __name__ == '__main__':
+    import unittest
+    unittest.main(module='test_blood_bank')
 
+# Internationalization
 class InternationalizationApp:
     def __init__(self, root):
         """
@@ -957,7 +2707,7 @@ class InternationalizationApp:
         self.root = root
         self.root.title(_("Internationalization"))
 
-        self.language = tk.StringVar(value="en")
+        self.language = tk.StringVar(value=translations.current_language)
 
         self.create_widgets()
 
@@ -973,12 +2723,7 @@ class InternationalizationApp:
         """
         Change the language of the application.
         """
-        selected_language = self.language.get()
-        lang.install()
-        lang = gettext.translation('blood_bank', localedir, languages=[selected_language])
-        lang.install()
-        self.root.title(_("Internationalization"))
-        self.create_widgets()
+        set_language(self.language.get(), self.root)
 
 if __name__ == "__main__":
     init_db()
@@ -1066,6 +2811,8 @@ class BloodBankApp:
         self.end_date = tk.StringVar()
         self.donation_id = tk.IntVar()
         self.csv_file_path = tk.StringVar()
+        # Donations are stocked through this index, loaded on first use
+        self.inventory = InventoryRepository()
 
         self.create_widgets()
 
@@ -1226,7 +2973,11 @@ class BloodBankApp:
         blood_type = self.blood_type.get()
         contact = self.contact.get()
         if name and blood_type and contact:
-            add_donor(name, blood_type, contact)
+            try:
+                add_donor(name, blood_type, contact)
+            except ValueError as e:
+                messagebox.showwarning("Input error", str(e))
+                return
             messagebox.showinfo("Success", "Donor added successfully!")
             self.refresh_donors()
         else:
@@ -1236,13 +2987,21 @@ class BloodBankApp:
         """
         Mark a donation.
         """
-        donor_id = self.donor_id.get()
+        try:
+            donor_id = self.donor_id.get()
+            quantity = self.quantity.get()
+        except tk.TclError:
+            messagebox.showwarning("Input error", "Donor ID and quantity must be whole numbers.")
+            return
         date = self.date.get()
         blood_type = self.blood_type.get()
-        quantity = self.quantity.get()
         if donor_id and date and blood_type and quantity:
             if validate_date(date):
-                mark_donation(donor_id, date, blood_type, quantity)
+                try:
+                    mark_donation(donor_id, date, blood_type, quantity, inventory=self.inventory.index)
+                except ValueError as e:
+                    messagebox.showwarning("Input error", str(e))
+                    return
                 messagebox.showinfo("Success", "Donation marked successfully!")
                 self.refresh_donations()
             else:
@@ -1272,12 +3031,20 @@ class BloodBankApp:
         """
         Update the information of an existing donor.
         """
-        donor_id = self.donor_id.get()
+        try:
+            donor_id = self.donor_id.get()
+        except tk.TclError:
+            messagebox.showwarning("Input error", "Donor ID must be a whole number.")
+            return
         name = self.donor_name.get()
         blood_type = self.blood_type.get()
         contact = self.contact.get()
         if donor_id and name and blood_type and contact:
-            update_donor(donor_id, name, blood_type, contact)
+            try:
+                update_donor(donor_id, name, blood_type, contact)
+            except ValueError as e:
+                messagebox.showwarning("Input error", str(e))
+                return
             messagebox.showinfo("Success", "Donor information updated successfully!")
             self.refresh_donors()
         else:
@@ -1341,14 +3108,22 @@ class BloodBankApp:
         """
         Update an existing donation.
         """
-        donation_id = self.donation_id.get()
-        donor_id = self.donor_id.get()
+        try:
+            donation_id = self.donation_id.get()
+            donor_id = self.donor_id.get()
+            quantity = self.quantity.get()
+        except tk.TclError:
+            messagebox.showwarning("Input error", "Donation ID, donor ID and quantity must be whole numbers.")
+            return
         date = self.date.get()
         blood_type = self.blood_type.get()
-        quantity = self.quantity.get()
         if donation_id and donor_id and date and blood_type and quantity:
             if validate_date(date):
-                update_donation(donation_id, donor_id, date, blood_type, quantity)
+                try:
+                    update_donation(donation_id, donor_id, date, blood_type, quantity)
+                except ValueError as e:
+                    messagebox.showwarning("Input error", str(e))
+                    return
                 messagebox.showinfo("Success", "Donation updated successfully!")
                 self.refresh_donations()
             else:
@@ -1390,8 +3165,9 @@ class BloodBankApp:
         """
         file_path = self.csv_file_path.get()
         if file_path:
-            import_donations_from_csv(file_path)
-            messagebox.showinfo("Success", "Donations imported successfully!")
+            summary = import_donations_from_csv(file_path, inventory=self.inventory.index)
+            messagebox.showinfo("Success", f"Imported {summary['imported']} donations and stocked them in the inventory, "
+                                           f"rejected {summary['rejected']} rows ({summary['rows_per_sec']:.0f} rows/sec).")
             self.refresh_donations()
         else:
             messagebox.showwarning("Input error", "Please enter a valid file path.")
@@ -0,0 +1,222 @@
+import argparse
+import logging
+import sys
+
+import blood_bank
+
+# Print rows as tab-separated lines
+def print_rows(rows):
+    """
+    Print rows as tab-separated lines.
+
+    Parameters:
+    rows (list): The rows to print.
+    """
+    for row in rows:
+        print("\t".join(str(value) for value in row))
+
+# Print an import summary
+def print_summary(summary):
+    """
+    Print the summary of a CSV import.
+
+    Parameters:
+    summary (dict): The import summary (see blood_bank.import_summary).
+    """
+    print(f"Imported {summary['imported']} rows in {summary['seconds']:.2f}s, rejected {summary['rejected']}.")
+    for line_number, row, reason in summary['rejected_rows']:
+        print(f"Line {line_number}: {reason}: {row}", file=sys.stderr)
+
+def run_init(args):
+    blood_bank.init_db(args.db)
+    print(f"Initialized {args.db}")
+
+def run_add_donor(args):
+    with blood_bank.DonorRepository(args.db) as donors:
+        print(donors.add(args.name, args.blood_type, args.contact))
+
+def run_import_donors(args):
+    with blood_bank.DonorRepository(args.db) as donors:
+        print_summary(donors.import_csv(args.file, args.chunk_size))
+
+def run_import_donations(args):
+    with blood_bank.DonationRepository(args.db) as donations:
+        print_summary(donations.import_csv(args.file, args.chunk_size))
+
+def run_add_blood(args):
+    with blood_bank.InventoryRepository(args.db) as inventory:
+        print(inventory.add_lot(args.blood_type, args.quantity, args.expiration_date))
+
+def run_issue(args):
+    with blood_bank.InventoryRepository(args.db) as inventory:
+        print_rows(inventory.issue(args.blood_type, args.quantity, args.date))
+
+def run_stock(args):
+    with blood_bank.InventoryRepository(args.db) as inventory:
+        print_rows(inventory.stock_levels(args.date))
+
+def run_match(args):
+    with blood_bank.InventoryRepository(args.db) as inventory, blood_bank.DonorRepository(args.db) as donors:
+        print("Compatible blood:")
+        print_rows(inventory.compatible_lots(args.recipient_type, args.date, args.limit))
+        print("Eligible donors:")
+        print_rows(donors.eligible_for(args.recipient_type, args.date, args.limit))
+
+def run_recall(args):
+    if args.send:
+        dispatcher = blood_bank.NotificationDispatcher()
+        queued, skipped = blood_bank.send_recall_reminders(args.start_date, args.end_date, dispatcher, args.db)
+        dispatcher.close()
+        print(f"Queued {queued} reminders, skipped {skipped} donors without an email address.")
+        return
+    with blood_bank.DonorRepository(args.db) as donors:
+        for batch in donors.recall_batches(args.start_date, args.end_date):
+            print_rows(batch)
+
+def run_report(args):
+    with blood_bank.DonationRepository(args.db) as donations:
+        if args.output:
+            print(f"Wrote {donations.export_csv(args.start_date, args.end_date, args.output)} donations to {args.output}")
+        else:
+            print_rows(donations.report(args.start_date, args.end_date))
+
+def run_replicate(args):
+    print(f"Applied {blood_bank.replicate(args.replica, args.db)} changes to {args.replica}")
+
+def run_replica_seq(args):
+    print(blood_bank.get_replica_seq(args.db))
+
+def run_export_changes(args):
+    print(f"Wrote {blood_bank.export_changes(args.file, args.since, args.db)} changes to {args.file}")
+
+def run_import_changes(args):
+    print(f"Applied {blood_bank.import_changes(args.file, args.db)} changes to {args.db}")
+
+def run_prune_changes(args):
+    print(f"Deleted {blood_bank.prune_change_log(args.up_to, args.db)} change log entries")
+
+def run_seed(args):
+    blood_bank.seed_database(args.db, args.donors, args.lots)
+    print(f"Seeded {args.db} with {args.donors} donors and {args.lots} lots")
+
+def run_benchmark(args):
+    for name, milliseconds in blood_bank.benchmark_repositories(args.donors, args.repeat).items():
+        print(f"{name}\t{milliseconds:.3f} ms")
+
+# Build the command line parser
+def build_parser():
+    """
+    Build the command line parser.
+
+    Returns:
+    argparse.ArgumentParser: The parser, with one subcommand per operation.
+    """
+    parser = argparse.ArgumentParser(description="Blood bank batch operations, without the GUI.")
+    parser.add_argument("--db", default=blood_bank.DB_PATH, help="path to the blood bank database")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("init", help="create the tables")
+    command.set_defaults(run=run_init)
+
+    command = commands.add_parser("add-donor", help="add a donor and print its ID")
+    command.add_argument("name")
+    command.add_argument("blood_type")
+    command.add_argument("contact")
+    command.set_defaults(run=run_add_donor)
+
+    command = commands.add_parser("import-donors", help="import donors from a CSV file (name, blood type, contact)")
+    command.add_argument("file")
+    command.add_argument("--chunk-size", type=int, default=blood_bank.IMPORT_CHUNK_SIZE)
+    command.set_defaults(run=run_import_donors)
+
+    command = commands.add_parser("import-donations", help="import donations from a CSV file (donor name, contact, blood type, quantity, date)")
+    command.add_argument("file")
+    command.add_argument("--chunk-size", type=int, default=blood_bank.IMPORT_CHUNK_SIZE)
+    command.set_defaults(run=run_import_donations)
+
+    command = commands.add_parser("add-blood", help="add a lot to the inventory and print its ID")
+    command.add_argument("blood_type")
+    command.add_argument("quantity")
+    command.add_argument("expiration_date")
+    command.set_defaults(run=run_add_blood)
+
+    command = commands.add_parser("issue", help="issue units first-expiring-first-out and print the lots used")
+    command.add_argument("blood_type")
+    command.add_argument("quantity")
+    command.add_argument("--date", help="the date of issue (YYYY-MM-DD), today by default")
+    command.set_defaults(run=run_issue)
+
+    command = commands.add_parser("stock", help="print the stock dashboard")
+    command.add_argument("--date", help="the date to measure expiry from (YYYY-MM-DD), today by default")
+    command.set_defaults(run=run_stock)
+
+    command = commands.add_parser("match", help="print compatible blood and eligible donors for a recipient")
+    command.add_argument("recipient_type")
+    command.add_argument("--date", help="the date of need (YYYY-MM-DD), today by default")
+    command.add_argument("--limit", type=int, default=50)
+    command.set_defaults(run=run_match)
+
+    command = commands.add_parser("recall", help="list, or with --send email, donors who become eligible in a window")
+    command.add_argument("start_date")
+    command.add_argument("end_date")
+    command.add_argument("--send", action="store_true", help="queue reminder emails instead of listing the donors")
+    command.set_defaults(run=run_recall)
+
+    command = commands.add_parser("report", help="print or export the donations made in a date range")
+    command.add_argument("start_date")
+    command.add_argument("end_date")
+    command.add_argument("--output", help="write the report to this CSV file")
+    command.set_defaults(run=run_report)
+
+    command = commands.add_parser("replicate", help="copy the changes made since the last sync to a replica database")
+    command.add_argument("replica")
+    command.set_defaults(run=run_replicate)
+
+    command = commands.add_parser("replica-seq", help="print the last change sequence number applied to this replica")
+    command.set_defaults(run=run_replica_seq)
+
+    command = commands.add_parser("export-changes", help="write the changes after a sequence number to a JSON Lines file (.gz to compress)")
+    command.add_argument("file")
+    command.add_argument("--since", type=int, default=0, help="the replica's last sequence number (see replica-seq)")
+    command.set_defaults(run=run_export_changes)
+
+    command = commands.add_parser("import-changes", help="apply a file written by export-changes to this replica")
+    command.add_argument("file")
+    command.set_defaults(run=run_import_changes)
+
+    command = commands.add_parser("prune-changes", help="delete change log entries every replica has applied")
+    command.add_argument("up_to", type=int, help="the lowest sequence number reached by every replica")
+    command.set_defaults(run=run_prune_changes)
+
+    command = commands.add_parser("seed", help="fill the database with generated data")
+    command.add_argument("--donors", type=int, default=1000000)
+    command.add_argument("--lots", type=int, default=5000)
+    command.set_defaults(run=run_seed)
+
+    command = commands.add_parser("benchmark", help="time each repository operation on a seeded temporary database")
+    command.add_argument("--donors", type=int, default=1000000)
+    command.add_argument("--repeat", type=int, default=100)
+    command.set_defaults(run=run_benchmark)
+    return parser
+
+def main(argv=None):
+    """
+    Run one command.
+
+    Parameters:
+    argv (list): The command line arguments, sys.argv by default.
+
+    Returns:
+    int: The exit status.
+    """
+    args = build_parser().parse_args(argv)
+    try:
+        args.run(args)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
@@ -0,0 +1,215 @@
+import logging
+import queue
+import threading
+import time
+
+# Email notifications shared by the applications. smtplib and email are imported
+# where they are used, so importing this module stays cheap.
+
+# Email settings
+SMTP_HOST = 'smtp.example.com'
+SMTP_PORT = 587
+SMTP_USERNAME = "your_email@example.com"
+SMTP_PASSWORD = "your_password"
+EMAIL_BATCH_SIZE = 50
+EMAIL_RATE_LIMIT = 10  # messages per second
+EMAIL_MAX_RETRIES = 3
+EMAIL_IDLE_TIMEOUT = 30  # seconds before an idle SMTP session is closed
+
+# Build an email message
+def build_email_message(from_email, to_email, subject, body):
+    """
+    Build a plain text email message.
+
+    Parameters:
+    from_email (str): The sender's email address.
+    to_email (str): The recipient's email address.
+    subject (str): The subject of the email.
+    body (str): The body of the email.
+
+    Returns:
+    MIMEMultipart: The email message.
+    """
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
+    msg = MIMEMultipart()
+    msg['From'] = from_email
+    msg['To'] = to_email
+    msg['Subject'] = subject
+
+    msg.attach(MIMEText(body, 'plain'))
+    return msg
+
+# Send email notifications
+def send_email_notification(to_email, subject, body):
+    """
+    Send an email notification over its own SMTP session. Use a
+    NotificationDispatcher to send more than a handful of messages.
+
+    Parameters:
+    to_email (str): The recipient's email address.
+    subject (str): The subject of the email.
+    body (str): The body of the email.
+    """
+    import smtplib
+
+    msg = build_email_message(SMTP_USERNAME, to_email, subject, body)
+
+    server = smtplib.SMTP(SMTP_HOST, SMTP_PORT)
+    server.starttls()
+    server.login(SMTP_USERNAME, SMTP_PASSWORD)
+    text = msg.as_string()
+    server.sendmail(SMTP_USERNAME, to_email, text)
+    server.quit()
+    logging.info(f"Email sent to {to_email}")
+
+class NotificationDispatcher:
+    def __init__(self, host=SMTP_HOST, port=SMTP_PORT, username=SMTP_USERNAME, password=SMTP_PASSWORD, use_tls=True,
+                 from_email=None, batch_size=EMAIL_BATCH_SIZE, rate_limit=EMAIL_RATE_LIMIT, max_retries=EMAIL_MAX_RETRIES,
+                 idle_timeout=EMAIL_IDLE_TIMEOUT):
+        """
+        Initialize the NotificationDispatcher class.
+
+        Queued messages are sent by a background thread over one authenticated SMTP
+        session, which is reused for every batch and closed after idle_timeout
+        seconds without work. Failed sends are retried on a fresh session.
+
+        Parameters:
+        host (str): The SMTP server host.
+        port (int): The SMTP server port.
+        username (str): The SMTP login, or None to skip login.
+        password (str): The SMTP password.
+        use_tls (bool): Whether to upgrade the session with STARTTLS.
+        from_email (str): The sender address. Defaults to the username.
+        batch_size (int): The most messages taken off the queue at once.
+        rate_limit (float): The most messages sent per second.
+        max_retries (int): The number of retries for a message before giving up.
+        idle_timeout (float): Seconds to keep an idle session open.
+        """
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.from_email = from_email or username
+        self.batch_size = batch_size
+        self.min_interval = 1.0 / rate_limit if rate_limit else 0.0
+        self.max_retries = max_retries
+        self.idle_timeout = idle_timeout
+
+        self.queue = queue.Queue()
+        self.server = None
+        self.next_send_time = 0.0
+        self.sent = 0
+        self.failed = []
+        self.thread = threading.Thread(target=self.run, name="mailer", daemon=True)
+        self.thread.start()
+
+    def send(self, to_email, subject, body):
+        """
+        Queue an email for sending.
+
+        Parameters:
+        to_email (str): The recipient's email address.
+        subject (str): The subject of the email.
+        body (str): The body of the email.
+        """
+        self.queue.put((to_email, subject, body))
+
+    def flush(self):
+        """
+        Wait until every queued email has been sent or has failed.
+        """
+        self.queue.join()
+
+    def close(self):
+        """
+        Send the remaining emails, then close the SMTP session and stop the thread.
+        """
+        self.queue.put(None)
+        self.thread.join()
+
+    def connect(self):
+        """
+        Open and authenticate the SMTP session.
+        """
+        import smtplib
+
+        self.server = smtplib.SMTP(self.host, self.port, timeout=30)
+        if self.use_tls:
+            self.server.starttls()
+        if self.username:
+            self.server.login(self.username, self.password)
+
+    def disconnect(self):
+        """
+        Close the SMTP session, if one is open.
+        """
+        import smtplib
+
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except (smtplib.SMTPException, OSError):
+                self.server.close()
+            self.server = None
+
+    def run(self):
+        """
+        Send queued emails in batches until the dispatcher is closed.
+        """
+        stopping = False
+        while not stopping:
+            try:
+                item = self.queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                self.disconnect()
+                item = self.queue.get()
+            batch = []
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            if item is None:
+                stopping = True
+                self.queue.task_done()
+            for to_email, subject, body in batch:
+                self.send_with_retries(to_email, subject, body)
+                self.queue.task_done()
+            logging.info(f"Email batch sent: {len(batch)} messages, {self.sent} sent, {len(self.failed)} failed so far")
+        self.disconnect()
+
+    def send_with_retries(self, to_email, subject, body):
+        """
+        Send one email on the shared session, reconnecting and retrying on failure.
+        """
+        import smtplib
+
+        msg = build_email_message(self.from_email, to_email, subject, body).as_string()
+        for attempt in range(self.max_retries + 1):
+            delay = self.next_send_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self.next_send_time = time.monotonic() + self.min_interval
+            try:
+                if self.server is None:
+                    self.connect()
+                self.server.sendmail(self.from_email, to_email, msg)
+                self.sent += 1
+                return
+            except smtplib.SMTPRecipientsRefused as e:
+                # The server will never accept this address, so retrying won't help
+                self.failed.append((to_email, e))
+                return
+            except (smtplib.SMTPException, OSError) as e:
+                self.disconnect()
+                if attempt == self.max_retries:
+                    logging.error(f"Giving up on email to {to_email}: {e}")
+                    self.failed.append((to_email, e))
+                    return
+                time.sleep(0.5 * 2 ** attempt)
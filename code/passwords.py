@@ -0,0 +1,253 @@
+import hashlib
+import hmac
+import logging
+import os
+import threading
+
+# Password hashing shared by the applications. New passwords are hashed with
+# PASSWORD_HASHER; hashes made by any other hasher in PASSWORD_HASHERS still
+# verify and are replaced the next time their user logs in.
+
+# Password settings
+PBKDF2_ITERATIONS = 600000
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+PASSWORD_SALT_BYTES = 16
+LOGIN_CACHE_SIZE = 128
+
+_verifier_key = os.urandom(32)
+_verifier_cache = {}
+_verifier_lock = threading.Lock()
+_dummy_hash = None
+
+class PBKDF2Hasher:
+    algorithm = 'pbkdf2_sha256'
+
+    def __init__(self, iterations=PBKDF2_ITERATIONS):
+        """
+        Initialize the PBKDF2Hasher class.
+
+        Parameters:
+        iterations (int): The number of PBKDF2-HMAC-SHA256 iterations.
+        """
+        self.iterations = iterations
+
+    def hash(self, password, salt=None):
+        """
+        Hash a password with a random salt.
+
+        Parameters:
+        password (str): The password to hash.
+        salt (bytes): The salt, or None for a new random one.
+
+        Returns:
+        str: The encoded hash, 'pbkdf2_sha256$iterations$salt$hash'.
+        """
+        salt = salt or os.urandom(PASSWORD_SALT_BYTES)
+        digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, self.iterations)
+        return f"{self.algorithm}${self.iterations}${salt.hex()}${digest.hex()}"
+
+    def verify(self, password, encoded):
+        """
+        Check a password against an encoded hash in constant time.
+
+        Parameters:
+        password (str): The password to check.
+        encoded (str): The encoded hash from hash().
+
+        Returns:
+        bool: True if the password matches, False otherwise.
+        """
+        _, iterations, salt, digest = encoded.split('$')
+        candidate = hashlib.pbkdf2_hmac('sha256', password.encode(), bytes.fromhex(salt), int(iterations))
+        return hmac.compare_digest(candidate.hex(), digest)
+
+    def needs_rehash(self, encoded):
+        """
+        Check whether an encoded hash was made with weaker settings than this hasher.
+        """
+        parts = encoded.split('$')
+        return parts[0] != self.algorithm or int(parts[1]) != self.iterations
+
+class ScryptHasher:
+    algorithm = 'scrypt'
+
+    def __init__(self, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P):
+        """
+        Initialize the ScryptHasher class.
+
+        Parameters:
+        n (int): The CPU/memory cost, a power of two.
+        r (int): The block size.
+        p (int): The parallelization factor.
+        """
+        self.n = n
+        self.r = r
+        self.p = p
+
+    def derive(self, password, salt, n, r, p):
+        """
+        Run scrypt with enough memory allowed for the given cost.
+        """
+        return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r * p)
+
+    def hash(self, password, salt=None):
+        """
+        Hash a password with a random salt.
+
+        Parameters:
+        password (str): The password to hash.
+        salt (bytes): The salt, or None for a new random one.
+
+        Returns:
+        str: The encoded hash, 'scrypt$n$r$p$salt$hash'.
+        """
+        salt = salt or os.urandom(PASSWORD_SALT_BYTES)
+        digest = self.derive(password, salt, self.n, self.r, self.p)
+        return f"{self.algorithm}${self.n}${self.r}${self.p}${salt.hex()}${digest.hex()}"
+
+    def verify(self, password, encoded):
+        """
+        Check a password against an encoded hash in constant time.
+
+        Parameters:
+        password (str): The password to check.
+        encoded (str): The encoded hash from hash().
+
+        Returns:
+        bool: True if the password matches, False otherwise.
+        """
+        _, n, r, p, salt, digest = encoded.split('$')
+        candidate = self.derive(password, bytes.fromhex(salt), int(n), int(r), int(p))
+        return hmac.compare_digest(candidate.hex(), digest)
+
+    def needs_rehash(self, encoded):
+        """
+        Check whether an encoded hash was made with weaker settings than this hasher.
+        """
+        parts = encoded.split('$')
+        return parts[0] != self.algorithm or [int(value) for value in parts[1:4]] != [self.n, self.r, self.p]
+
+class LegacySHA256Hasher:
+    algorithm = 'sha256'
+
+    def hash(self, password, salt=None):
+        """
+        Hash a password the way it used to be stored: unsalted SHA-256 hex.
+        Only kept to check old hashes; never used for new ones.
+        """
+        return hashlib.sha256(password.encode()).hexdigest()
+
+    def verify(self, password, encoded):
+        """
+        Check a password against an unsalted SHA-256 hash in constant time.
+        """
+        return hmac.compare_digest(self.hash(password), encoded)
+
+    def needs_rehash(self, encoded):
+        """
+        Legacy hashes are always replaced.
+        """
+        return True
+
+# The hasher used for new passwords. Hashes made by any other hasher are
+# replaced with one from this hasher the next time their user logs in.
+PASSWORD_HASHER = PBKDF2Hasher()
+PASSWORD_HASHERS = {hasher.algorithm: hasher for hasher in (PBKDF2Hasher(), ScryptHasher(), LegacySHA256Hasher())}
+
+# Find the hasher that made an encoded hash
+def identify_hasher(encoded):
+    """
+    Find the hasher that made an encoded password hash.
+
+    Parameters:
+    encoded (str): The stored password hash.
+
+    Returns:
+    object: The hasher. Unprefixed hashes are legacy SHA-256 hashes.
+    """
+    if '$' not in encoded:
+        return PASSWORD_HASHERS['sha256']
+    return PASSWORD_HASHERS[encoded.split('$', 1)[0]]
+
+def hash_password(password):
+    """
+    Hash a password with the current password hasher.
+
+    Parameters:
+    password (str): The password to hash.
+
+    Returns:
+    str: The encoded hash, including its algorithm, parameters and salt.
+    """
+    return PASSWORD_HASHER.hash(password)
+
+# Check a password against its stored hash
+def verify_password(password, encoded):
+    """
+    Check a password against a stored hash.
+
+    Successful checks are remembered as a keyed HMAC of the password, so a user
+    logging in again with an unchanged hash skips the slow hash. A wrong password
+    never matches the cache and always goes through the slow hash.
+
+    Parameters:
+    password (str): The password to check.
+    encoded (str): The stored password hash.
+
+    Returns:
+    tuple: (matches, needs_rehash), where needs_rehash is True when the stored
+           hash should be replaced by one from the current hasher.
+    """
+    hasher = identify_hasher(encoded)
+    needs_rehash = PASSWORD_HASHER.needs_rehash(encoded)
+    verifier = hmac.new(_verifier_key, password.encode(), hashlib.sha256).digest()
+    cached = _verifier_cache.get(encoded)
+    if cached is not None and hmac.compare_digest(cached, verifier):
+        return True, needs_rehash
+    if not hasher.verify(password, encoded):
+        return False, False
+    with _verifier_lock:
+        _verifier_cache[encoded] = verifier
+        while len(_verifier_cache) > LOGIN_CACHE_SIZE:
+            del _verifier_cache[next(iter(_verifier_cache))]
+    return True, needs_rehash
+
+# Log in a user
+def login_user(conn, username, password):
+    """
+    Log in a user from a users table with id, username, role and password columns.
+
+    The user is looked up by username alone, through the index on the unique
+    username column, and the password is then checked against the stored hash.
+    Unknown usernames are checked against a dummy hash from the current hasher,
+    made again whenever PASSWORD_HASHER changes, so that they take as long as
+    wrong passwords. Hashes from an older hasher are upgraded on success. The
+    check is deliberately slow, so call this off the Tk thread.
+
+    Parameters:
+    conn (sqlite3.Connection): The application's database connection.
+    username (str): The username of the user.
+    password (str): The password of the user.
+
+    Returns:
+    tuple: (id, username, role) if login is successful, None otherwise.
+    """
+    global _dummy_hash
+    rows = conn.execute("SELECT id, username, role, password FROM users WHERE username = ?", (username,)).fetchall()
+    if not rows:
+        dummy_hash = _dummy_hash
+        if dummy_hash is None or PASSWORD_HASHER.needs_rehash(dummy_hash):
+            dummy_hash = _dummy_hash = hash_password(os.urandom(16).hex())
+        identify_hasher(dummy_hash).verify(password, dummy_hash)
+        return None
+    user = rows[0]
+    matches, needs_rehash = verify_password(password, user[3])
+    if not matches:
+        return None
+    if needs_rehash:
+        with conn:
+            conn.execute("UPDATE users SET password = ? WHERE id = ? AND password = ?", (hash_password(password), user[0], user[3]))
+        logging.info(f"Password hash upgraded for user: {username}")
+    return user[:3]
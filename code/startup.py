@@ -0,0 +1,77 @@
+import logging
+import os
+import time
+
+# Startup benchmark shared by the applications. The start is timed in a fresh
+# interpreter, so modules the test run has already imported don't hide its cost.
+
+# Startup settings
+STARTUP_BUDGET_MS = 500  # time for a fresh interpreter to import an application and draw its main window
+
+# Check whether a window can be opened
+def has_display():
+    """
+    Check whether tkinter can open a window here.
+
+    Returns:
+    bool: True if a Tk root window could be created.
+    """
+    import tkinter as tk
+
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return False
+    root.destroy()
+    return True
+
+# Benchmark a cold start of an application
+def benchmark_startup(path, lazy_modules, open_window=None, budget_ms=STARTUP_BUDGET_MS):
+    """
+    Time a cold start in a fresh interpreter run with python -X importtime, and
+    list any of lazy_modules that the start loaded.
+
+    Parameters:
+    path (str): The application script to import.
+    lazy_modules (tuple): Top-level modules the start should not load.
+    open_window (str): Code that opens the main window in root, with the application
+                       imported as app, or None to time the import alone. Needs a display.
+    budget_ms (float): The most the start may take.
+
+    Returns:
+    dict: The milliseconds spent importing the application, the milliseconds until
+          the interpreter finished, the lazy modules loaded, whether a window was
+          opened and whether the start was within budget.
+    """
+    import subprocess
+    import sys
+    import tempfile
+
+    module = os.path.splitext(os.path.basename(path))[0]
+    code = f"import {module} as app"
+    if open_window:
+        code += f"; root = app.tk.Tk(); {open_window}; root.update(); root.destroy()"
+    with tempfile.TemporaryDirectory() as tmpdir:
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(path)))
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=tmpdir, env=env,
+                                capture_output=True, text=True, check=True)
+        total_ms = (time.perf_counter() - start) * 1000
+    import_ms = None
+    loaded = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|')
+        name = name.strip()
+        if name == module:
+            import_ms = int(cumulative) / 1000
+        elif name.split('.')[0] in lazy_modules:
+            loaded.append(name)
+    results = {"import_ms": import_ms, "total_ms": total_ms, "lazy_modules_loaded": loaded,
+               "window": bool(open_window), "within_budget": total_ms <= budget_ms}
+    if results["within_budget"]:
+        logging.info(f"Startup benchmark: {results}")
+    else:
+        logging.warning(f"Startup took {total_ms:.0f} ms, over the {budget_ms} ms budget: {results}")
+    return results
@@ -0,0 +1,523 @@
+import sqlite3
+import hashlib
+import unittest
+import csv
+import gzip
+import os
+import socketserver
+import tempfile
+import threading
+import attendance
+from attendance import (MIGRATIONS, TaskExecutor, add_student, advanced_search_students, benchmark_startup,
+    close_connection, delete_attendance, export_attendance_report_to_csv, fts_query, get_attendance_page,
+    get_attendance_summary, get_connection, get_student_attendance, get_students_page, import_attendance_from_csv,
+    login_user, mark_attendance, register_user, run_migrations, search_student, send_attendance_reminders,
+    update_attendance, validate_date, validate_email)
+from notifications import NotificationDispatcher
+from passwords import PBKDF2Hasher, ScryptHasher, identify_hasher
+import passwords
+from startup import has_display
+from translations import DEFAULT_LANGUAGE, _, set_language
+import translations
+
+# Unit tests for the attendance system. Run them with python -m unittest test_attendance, or with python attendance.py
+class StandInSMTPHandler(socketserver.StreamRequestHandler):
+    """
+    Just enough of an SMTP server to accept messages in tests.
+    """
+    def handle(self):
+        self.server.sessions += 1
+        self.wfile.write(b"220 localhost ESMTP\r\n")
+        for line in self.rfile:
+            command = line.decode().strip().upper()
+            if command == "DATA":
+                self.wfile.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                data = []
+                for data_line in self.rfile:
+                    if data_line == b".\r\n":
+                        break
+                    data.append(data_line)
+                self.server.messages.append(b"".join(data))
+                self.wfile.write(b"250 OK\r\n")
+            elif command == "QUIT":
+                self.wfile.write(b"221 Bye\r\n")
+                return
+            else:
+                self.wfile.write(b"250 OK\r\n")
+
+class TestAttendanceSystem(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up the test environment.
+        """
+        self.old_db_path = attendance.DB_PATH
+        attendance.DB_PATH = ':memory:'
+        self.conn = get_connection()
+        self.c = self.conn.cursor()
+        self.c.execute('''CREATE TABLE students (
+                            id INTEGER PRIMARY KEY,
+                            name TEXT NOT NULL,
+                            roll_number TEXT NOT NULL)''')
+        self.c.execute('''CREATE TABLE attendance (
+                            id INTEGER PRIMARY KEY,
+                            student_id INTEGER,
+                            date TEXT,
+                            status TEXT,
+                            FOREIGN KEY(student_id) REFERENCES students(id))''')
+        self.c.execute('''CREATE TABLE users (
+                            id INTEGER PRIMARY KEY,
+                            username TEXT NOT NULL UNIQUE,
+                            password TEXT NOT NULL,
+                            role TEXT NOT NULL)''')
+        self.conn.commit()
+        run_migrations(self.conn)
+        # Keep password hashing cheap in tests
+        self.old_hasher = passwords.PASSWORD_HASHER
+        passwords.PASSWORD_HASHER = PBKDF2Hasher(iterations=1000)
+
+    def tearDown(self):
+        """
+        Tear down the test environment.
+        """
+        close_connection()
+        attendance.DB_PATH = self.old_db_path
+        passwords.PASSWORD_HASHER = self.old_hasher
+
+    def test_add_student(self):
+        """
+        Test adding a student.
+        """
+        add_student("John Doe", "12345")
+        self.c.execute("SELECT * FROM students WHERE name = ? AND roll_number = ?", ("John Doe", "12345"))
+        student = self.c.fetchone()
+        self.assertIsNotNone(student)
+
+    def test_mark_attendance(self):
+        """
+        Test marking attendance.
+        """
+        add_student("Jane Smith", "67890")
+        self.c.execute("SELECT id FROM students WHERE name = ? AND roll_number = ?", ("Jane Smith", "67890"))
+        student_id = self.c.fetchone()[0]
+        mark_attendance(student_id, "2023-10-01", "Present")
+        self.c.execute("SELECT * FROM attendance WHERE student_id = ? AND date = ? AND status = ?", (student_id, "2023-10-01", "Present"))
+        attendance = self.c.fetchone()
+        self.assertIsNotNone(attendance)
+
+    def test_startup_defers_heavy_imports(self):
+        """
+        Test that importing the module skips the lazy modules.
+        """
+        results = benchmark_startup()
+        self.assertFalse(results["window"])
+        self.assertEqual(results["lazy_modules_loaded"], [])
+
+    def test_startup_window_defers_heavy_imports(self):
+        """
+        Test that opening the main window skips the lazy modules.
+        """
+        if not has_display():
+            self.skipTest("no display to open the main window on")
+        results = benchmark_startup(window=True)
+        self.assertTrue(results["window"])
+        self.assertEqual(results["lazy_modules_loaded"], [])
+
+    def test_language_switch_relabels_in_place(self):
+        """
+        Test that switching language relabels existing widgets, loads each catalogue once
+        and forgets widgets that are gone.
+        """
+        import gc
+        import gettext
+
+        class DictCatalog(gettext.NullTranslations):
+            def __init__(self, messages):
+                super().__init__()
+                self.messages = messages
+            def gettext(self, message):
+                return self.messages.get(message, message)
+
+        class FakeWidget:
+            def __init__(self, path, children=(), **options):
+                self.path = path
+                self.children = list(children)
+                self.options = options
+            def __str__(self):
+                return self.path
+            def keys(self):
+                return list(self.options)
+            def cget(self, option):
+                return self.options[option]
+            def configure(self, **options):
+                self.options.update(options)
+            def winfo_children(self):
+                return self.children
+
+        class FakeWindow(FakeWidget):
+            def title(self, text=None):
+                if text is None:
+                    return self.options['title']
+                self.options['title'] = text
+
+        def restore_language():
+            set_language(DEFAULT_LANGUAGE)
+            for cache in (translations._catalogs, translations._translations, translations._messages):
+                cache.pop('fr', None)
+            translations._widget_messages.clear()
+        self.addCleanup(restore_language)
+
+        translations._catalogs['fr'] = DictCatalog({"Name:": "Nom :", "Save": "Enregistrer", "Help": "Aide"})
+        label = FakeWidget(".name", text="Name:")
+        bound = FakeWidget(".status", text="", textvariable="PY_VAR0")
+        root = FakeWindow(".", [label, bound], title="Help")
+        set_language('fr', root)
+        self.assertEqual((root.title(), label.cget('text'), bound.cget('text')), ("Aide", "Nom :", ""))
+        button = FakeWidget(".save", text=_("Save"))
+        root.children.append(button)
+        set_language(DEFAULT_LANGUAGE, root)
+        self.assertEqual((root.title(), label.cget('text'), button.cget('text')), ("Help", "Name:", "Save"))
+        set_language('fr', root)
+        self.assertEqual(button.cget('text'), "Enregistrer")
+        self.assertIs(translations.get_catalog('fr'), translations._catalogs['fr'])
+
+        # A destroyed widget's message is forgotten
+        self.assertIn(button, translations._widget_messages)
+        root.children.remove(button)
+        del button
+        gc.collect()
+        self.assertEqual(len(translations._widget_messages), 2)
+
+    def test_validate_date(self):
+        """
+        Test date validation.
+        """
+        self.assertTrue(validate_date("2023-10-01"))
+        self.assertFalse(validate_date("01-10-2023"))
+
+    def test_register_user(self):
+        """
+        Test registering a user.
+        """
+        register_user("admin", "password123", "admin")
+        self.c.execute("SELECT * FROM users WHERE username = ? AND role = ?", ("admin", "admin"))
+        user = self.c.fetchone()
+        self.assertIsNotNone(user)
+
+    def test_login_user(self):
+        """
+        Test logging in a user.
+        """
+        register_user("teacher", "password123", "teacher")
+        user = login_user("teacher", "password123")
+        self.assertIsNotNone(user)
+        self.assertEqual(user[2], "teacher")
+
+    def test_password_hashes_are_salted(self):
+        """
+        Test that password hashes are salted, encode their parameters and verify.
+        """
+        for hasher in (PBKDF2Hasher(iterations=1000), ScryptHasher(n=2 ** 10)):
+            first, second = hasher.hash("password123"), hasher.hash("password123")
+            self.assertNotEqual(first, second)
+            self.assertTrue(first.startswith(hasher.algorithm + "$"))
+            self.assertTrue(identify_hasher(first).verify("password123", first))
+            self.assertFalse(identify_hasher(first).verify("password124", first))
+
+    def test_login_upgrades_legacy_hash(self):
+        """
+        Test that logging in replaces an unsalted SHA-256 hash with the current hash.
+        """
+        legacy_hash = hashlib.sha256(b"password123").hexdigest()
+        self.c.execute("INSERT INTO users (username, password, role) VALUES (?, ?, ?)", ("legacy", legacy_hash, "teacher"))
+        self.conn.commit()
+        self.assertIsNone(login_user("legacy", "wrong"))
+        self.assertEqual(login_user("legacy", "password123"), (1, "legacy", "teacher"))
+        stored_hash = self.c.execute("SELECT password FROM users WHERE username = 'legacy'").fetchone()[0]
+        self.assertTrue(stored_hash.startswith("pbkdf2_sha256$1000$"))
+        self.assertEqual(login_user("legacy", "password123"), (1, "legacy", "teacher"))
+        self.assertIsNone(login_user("legacy", "wrong"))
+        self.assertIsNone(login_user("nobody", "password123"))
+
+    def test_login_looks_up_username_by_index(self):
+        """
+        Test that login finds the user through the unique username index.
+        """
+        plan = self.query_plan("SELECT id, username, role, password FROM users WHERE username = ?", ("admin",))
+        self.assertIn("USING INDEX sqlite_autoindex_users_1", plan)
+
+    def test_validate_email(self):
+        """
+        Test email validation.
+        """
+        self.assertTrue(validate_email("test@example.com"))
+        self.assertFalse(validate_email("invalid-email"))
+
+    def test_import_attendance_from_csv(self):
+        """
+        Test importing attendance records, rejecting rows with bad dates.
+        """
+        add_student("John Doe", "12345")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            file_path = os.path.join(tmpdir, 'attendance.csv')
+            with open(file_path, mode='w', newline='') as file:
+                writer = csv.writer(file)
+                writer.writerow(["Student ID", "Date", "Status"])
+                writer.writerow([1, "2023-10-01", "Present"])
+                writer.writerow([1, "2023-10-02", "Absent"])
+                writer.writerow([1, "02-10-2023", "Present"])
+            summary = import_attendance_from_csv(file_path, chunk_size=2)
+        self.assertEqual(summary["imported"], 2)
+        self.assertEqual(summary["rejected"], 1)
+        self.assertEqual(summary["rejected_rows"][0][0], 4)
+        self.assertEqual(len(get_student_attendance(1)), 2)
+
+    def test_export_attendance_report_to_gzip(self):
+        """
+        Test exporting an attendance report to a gzipped CSV in chunks.
+        """
+        add_student("John Doe", "12345")
+        for day in range(1, 6):
+            mark_attendance(1, f"2023-10-0{day}", "Present")
+        progress = []
+        with tempfile.TemporaryDirectory() as tmpdir:
+            file_path = os.path.join(tmpdir, 'report.csv.gz')
+            rows_written = export_attendance_report_to_csv("2023-10-01", "2023-10-04", file_path, progress_callback=progress.append, chunk_size=3)
+            with gzip.open(file_path, mode='rt', newline='') as file:
+                rows = list(csv.reader(file))
+        self.assertEqual(rows_written, 4)
+        self.assertEqual(progress, [3, 4])
+        self.assertEqual(rows[0], ["Student Name", "Date", "Status"])
+        self.assertEqual(len(rows), 5)
+
+    def test_failed_export_keeps_original_error(self):
+        """
+        Test that a failed export raises its own error, not one from cleaning up.
+        """
+        add_student("John Doe", "12345")
+        mark_attendance(1, "2023-10-01", "Present")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with self.assertRaises(FileNotFoundError):
+                export_attendance_report_to_csv("2023-10-01", "2023-10-01", os.path.join(tmpdir, 'missing', 'report.csv'))
+
+            file_path = os.path.join(tmpdir, 'report.csv')
+            def fail(rows_written):
+                os.remove(file_path)
+                raise RuntimeError("cancelled")
+            with self.assertRaisesRegex(RuntimeError, "cancelled"):
+                export_attendance_report_to_csv("2023-10-01", "2023-10-01", file_path, progress_callback=fail)
+            self.assertFalse(os.path.exists(file_path))
+
+    def query_plan(self, query, params):
+        """
+        Return the EXPLAIN QUERY PLAN details of a query as one string.
+        """
+        plan = self.c.execute("EXPLAIN QUERY PLAN " + query, params).fetchall()
+        return " | ".join(row[3] for row in plan)
+
+    def test_migrations_recorded(self):
+        """
+        Test that migrations are recorded and not applied twice.
+        """
+        self.assertEqual(run_migrations(self.conn), MIGRATIONS[-1][0])
+        self.c.execute("SELECT COUNT(*) FROM schema_version")
+        self.assertEqual(self.c.fetchone()[0], len(MIGRATIONS))
+
+    def test_migration_sets_aside_duplicates(self):
+        """
+        Test that the duplicates dropped by migration 1 are kept in attendance_duplicates.
+        """
+        conn = sqlite3.connect(':memory:')
+        conn.execute("CREATE TABLE students (id INTEGER PRIMARY KEY, name TEXT NOT NULL, roll_number TEXT NOT NULL)")
+        conn.execute("CREATE TABLE attendance (id INTEGER PRIMARY KEY, student_id INTEGER, date TEXT, status TEXT)")
+        conn.executemany("INSERT INTO attendance (student_id, date, status) VALUES (?, ?, ?)",
+                         [(1, "2023-10-01", "Absent"), (1, "2023-10-01", "Present"), (2, "2023-10-01", "Present")])
+        conn.commit()
+        with self.assertLogs(level='WARNING'):
+            run_migrations(conn)
+        self.assertEqual(conn.execute("SELECT id, student_id, status FROM attendance ORDER BY id").fetchall(),
+                         [(2, 1, "Present"), (3, 2, "Present")])
+        self.assertEqual(conn.execute("SELECT id, student_id, date, status FROM attendance_duplicates").fetchall(),
+                         [(1, 1, "2023-10-01", "Absent")])
+        conn.close()
+
+    def test_mark_attendance_once_per_day(self):
+        """
+        Test that marking a student twice on one date keeps a single record.
+        """
+        add_student("John Doe", "12345")
+        mark_attendance(1, "2023-10-01", "Absent")
+        mark_attendance(1, "2023-10-01", "Present")
+        self.assertEqual(get_student_attendance(1), [("2023-10-01", "Present")])
+
+    def test_student_attendance_uses_index(self):
+        """
+        Test that looking up a student's attendance uses the (student_id, date) index.
+        """
+        plan = self.query_plan("SELECT date, status FROM attendance WHERE student_id = ?", (1,))
+        self.assertIn("USING INDEX idx_attendance_student_date", plan)
+
+    def test_report_uses_date_index(self):
+        """
+        Test that the date range report searches attendance by the date index.
+        """
+        plan = self.query_plan("SELECT students.name, attendance.date, attendance.status FROM attendance JOIN students ON attendance.student_id = students.id WHERE attendance.date BETWEEN ? AND ?", ("2023-10-01", "2023-10-31"))
+        self.assertIn("SEARCH attendance USING INDEX idx_attendance_date", plan)
+        self.assertIn("SEARCH students USING INTEGER PRIMARY KEY", plan)
+
+    def test_roll_number_lookup_uses_index(self):
+        """
+        Test that looking up a student by roll number uses the roll number index.
+        """
+        plan = self.query_plan("SELECT id, name FROM students WHERE roll_number = ?", ("12345",))
+        self.assertIn("USING INDEX idx_students_roll_number", plan)
+
+    def test_attendance_summary_tracks_changes(self):
+        """
+        Test that the attendance summary follows marks, updates and deletes.
+        """
+        add_student("John Doe", "12345")
+        add_student("Jane Smith", "67890")
+        for day in range(1, 29):
+            mark_attendance(1, f"2023-02-{day:02d}", "Present" if day % 4 else "Absent")
+        mark_attendance(1, "2023-01-31", "Present")
+        mark_attendance(2, "2023-03-01", "Absent")
+        mark_attendance(1, "2023-02-01", "Absent")
+        record_id = lambda date: self.c.execute("SELECT id FROM attendance WHERE student_id = 1 AND date = ?", (date,)).fetchone()[0]
+        update_attendance(record_id("2023-02-02"), 2, "2023-02-02", "Present")
+        delete_attendance(record_id("2023-02-03"))
+
+        for start_date, end_date in [("2023-01-01", "2023-03-31"), ("2023-01-31", "2023-03-01"), ("2023-02-10", "2023-02-20")]:
+            self.c.execute("SELECT students.name, SUM(status = 'Present'), SUM(status = 'Absent') FROM attendance JOIN students ON attendance.student_id = students.id WHERE date BETWEEN ? AND ? GROUP BY students.id ORDER BY students.name", (start_date, end_date))
+            self.assertEqual(get_attendance_summary(start_date, end_date), self.c.fetchall())
+
+    def test_search_student_modes(self):
+        """
+        Test prefix, substring and LIKE student searches, and that the index follows changes.
+        """
+        add_student("John Doe", "12345")
+        add_student("Jane Smith", "67890")
+        add_student("Johnny Appleseed", "A-100")
+        ids = lambda students: sorted(student[0] for student in students)
+        self.assertEqual(ids(search_student("joh", "prefix")), [1, 3])
+        self.assertEqual(ids(search_student("jo do", "prefix")), [1])
+        self.assertEqual(ids(search_student("A-100", "prefix")), [3])
+        self.assertEqual(ids(search_student("ohn", "substring")), [1, 3])
+        self.assertEqual(ids(search_student("ohn D", "substring")), [1])
+        self.assertEqual(ids(search_student("jo")), [1, 3])
+        self.assertEqual(ids(search_student("ohn", "like")), [1, 3])
+        self.assertEqual(search_student('"', "prefix"), [])
+        self.c.execute("UPDATE students SET name = 'Jon Doe' WHERE id = 1")
+        self.c.execute("DELETE FROM students WHERE id = 3")
+        self.conn.commit()
+        self.assertEqual(search_student("joh", "prefix"), [])
+        self.assertEqual(ids(search_student("Jon", "substring")), [1])
+
+    def test_advanced_search_uses_trigram_index(self):
+        """
+        Test that advanced search matches names through the trigram index.
+        """
+        add_student("John Doe", "12345")
+        add_student("Jane Smith", "67890")
+        mark_attendance(1, "2023-10-01", "Present")
+        mark_attendance(2, "2023-10-01", "Present")
+        self.assertEqual(advanced_search_students(name="ohn"), [(1, "John Doe", "12345")])
+        self.assertEqual(advanced_search_students(name="e", attendance_status="Present"), [(1, "John Doe", "12345"), (2, "Jane Smith", "67890")])
+        plan = self.query_plan("SELECT id FROM students WHERE students.id IN (SELECT rowid FROM students_trigram WHERE students_trigram MATCH ?)", (fts_query("ohn", column="name"),))
+        self.assertIn("VIRTUAL TABLE INDEX", plan)
+
+    def test_keyset_pages(self):
+        """
+        Test paging through students and attendance records by ID.
+        """
+        for i in range(5):
+            student_id = add_student(f"Student {i}", str(i))
+            mark_attendance(student_id, "2023-10-01", "Present")
+        first_page = get_students_page(0, 2)
+        self.assertEqual([student[0] for student in first_page], [1, 2])
+        self.assertEqual([student[0] for student in get_students_page(first_page[-1][0], 2)], [3, 4])
+        self.assertEqual([record[0] for record in get_attendance_page(4, 2)], [5])
+        plan = self.query_plan("SELECT attendance.id, students.name, attendance.date, attendance.status FROM attendance JOIN students ON attendance.student_id = students.id WHERE attendance.id > ? ORDER BY attendance.id LIMIT ?", (0, 2))
+        self.assertIn("SEARCH attendance USING INTEGER PRIMARY KEY (rowid>?)", plan)
+
+    def test_task_executor(self):
+        """
+        Test that background tasks deliver results and can be cancelled.
+        """
+        class Root:
+            def after(self, ms, func):
+                return None
+
+            def after_cancel(self, after_id):
+                pass
+
+        executor = TaskExecutor(Root())
+        events = []
+        started = threading.Event()
+        release = threading.Event()
+
+        def work(progress_callback):
+            progress_callback(1)
+            started.set()
+            release.wait(5)
+            progress_callback(2)
+            return "finished"
+
+        executor.submit(lambda: "done", on_done=events.append)
+        task = executor.submit(work, progress=True, on_done=events.append, on_progress=events.append,
+                               on_cancel=lambda: events.append("cancelled"))
+        started.wait(5)
+        task.cancel()
+        release.set()
+        executor.pool.shutdown(wait=True)
+        executor.poll()
+        self.assertCountEqual(events, ["done", "cancelled"])
+
+    def test_notification_dispatcher_reuses_session(self):
+        """
+        Test that queued emails are all sent over a single SMTP session.
+        """
+        server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), StandInSMTPHandler)
+        server.daemon_threads = True
+        server.sessions = 0
+        server.messages = []
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            dispatcher = NotificationDispatcher(host="127.0.0.1", port=server.server_address[1], username=None,
+                                                use_tls=False, from_email="attendance@example.com",
+                                                batch_size=2, rate_limit=None)
+            students = [(f"student{i}@example.com", f"Student {i}") for i in range(5)]
+            send_attendance_reminders(students, "2023-10-01", dispatcher)
+            dispatcher.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual(dispatcher.sent, 5)
+        self.assertEqual(len(server.messages), 5)
+        self.assertEqual(server.sessions, 1)
+
+    def test_connection_reused_within_thread(self):
+        """
+        Test that a thread gets the same connection on every call.
+        """
+        self.assertIs(get_connection(), self.conn)
+
+    def test_connection_per_thread(self):
+        """
+        Test that each thread gets its own connection.
+        """
+        other = []
+        thread = threading.Thread(target=lambda: other.append(get_connection()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], self.conn)
+
+    def test_connection_uses_wal(self):
+        """
+        Test that file databases are opened in WAL mode.
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            attendance.DB_PATH = os.path.join(tmpdir, 'attendance.db')
+            mode = get_connection().execute("PRAGMA journal_mode").fetchone()[0]
+            close_connection()
+        self.assertEqual(mode, "wal")
+
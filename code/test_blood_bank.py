@@ -0,0 +1,495 @@
+import tkinter as tk
+from tkinter import messagebox
+import sqlite3
+import hashlib
+import unittest
+import contextlib
+import csv
+import io
+import os
+import tempfile
+import blood_bank_cli
+import blood_bank
+from blood_bank import (BLOOD_TYPES, BloodBankApp, DonationRepository, DonorRepository, InventoryIndex,
+    InventoryRepository, REPLICATED_TABLES, add_donor, benchmark_startup, bin_donations, compatible_donor_types,
+    connect, delete_donation, delete_donor, export_changes, find_compatible_inventory, find_eligible_donors,
+    get_all_donations, get_all_donors, get_changes, get_donation_buckets, get_recall_batches, get_replica_seq,
+    get_stock_levels, import_changes, import_donations_from_csv, init_db, login_user, mark_donation,
+    prune_change_log, register_user, replicate, send_recall_reminders, sync_treeview, update_donor, validate_date,
+    validate_email)
+from passwords import PBKDF2Hasher, ScryptHasher, hash_password, identify_hasher, verify_password
+import passwords
+from startup import has_display
+
+# Unit tests for the blood bank management system. Run them with python -m unittest test_blood_bank, or with python blood_bank.py
+class TestBloodBankSystem(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up the test environment.
+        """
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.saved_db_path = blood_bank.DB_PATH
+        blood_bank.DB_PATH = os.path.join(self.tmpdir.name, 'blood_bank.db')
+        init_db()
+        self.conn = connect()
+        self.c = self.conn.cursor()
+
+    def tearDown(self):
+        """
+        Tear down the test environment.
+        """
+        self.conn.close()
+        blood_bank.DB_PATH = self.saved_db_path
+        self.tmpdir.cleanup()
+
+    def test_add_donor(self):
+        """
+        Test adding a donor.
+        """
+        add_donor("John Doe", "A+", "john.doe@example.com")
+        self.c.execute("SELECT * FROM donors WHERE name = ? AND blood_type = ? AND contact = ?", ("John Doe", "A+", "john.doe@example.com"))
+        donor = self.c.fetchone()
+        self.assertIsNotNone(donor)
+
+    def test_mark_donation(self):
+        """
+        Test marking a donation.
+        """
+        add_donor("Jane Smith", "B+", "jane.smith@example.com")
+        self.c.execute("SELECT id FROM donors WHERE name = ? AND blood_type = ? AND contact = ?", ("Jane Smith", "B+", "jane.smith@example.com"))
+        donor_id = self.c.fetchone()[0]
+        mark_donation(donor_id, "2023-10-01", "A+", 1)
+        self.c.execute("SELECT * FROM donations WHERE donor_id = ? AND date = ? AND blood_type = ? AND quantity = ?", (donor_id, "2023-10-01", "A+", 1))
+        donation = self.c.fetchone()
+        self.assertIsNotNone(donation)
+
+    def test_repositories_work_without_gui(self):
+        """
+        Test donor, donation and inventory operations through the repositories.
+        """
+        with DonorRepository() as donors, DonationRepository() as donations, InventoryRepository() as inventory:
+            donor_id = donors.add("Ann Lee", "O-", "ann@example.com")
+            donors.update(donor_id, "Ann Lee", "O-", "ann.lee@example.com")
+            self.assertEqual(donors.search("ann.lee@example.com"), [(donor_id, "Ann Lee", "O-", "ann.lee@example.com")])
+            self.assertRaises(ValueError, donors.add, "Bob", "Z+", "bob@example.com")
+            donations.record(donor_id, "2023-10-01", "O-", 2)
+            self.assertRaises(ValueError, donations.record, donor_id, "01-10-2023", "O-", 1)
+            self.assertEqual(donations.report("2023-10-01", "2023-10-31"), [(1, donor_id, "2023-10-01", "O-", 2)])
+            inventory.add_lot("O-", 3, "2023-10-20")
+            self.assertEqual(inventory.issue("O-", 4, "2023-10-02"), [(2, 3, "2023-10-20"), (1, 1, "2023-11-12")])
+            self.assertEqual(inventory.stock_levels("2023-10-02")[0][:2], ("O-", 1))
+            path = os.path.join(self.tmpdir.name, "report.csv")
+            self.assertEqual(donations.export_csv("2023-10-01", "2023-10-31", path), 1)
+        self.assertEqual(len(get_all_donations()), 1)
+        delete_donor(donor_id)
+        self.assertEqual(get_all_donors(), [])
+
+    def test_donation_buckets(self):
+        """
+        Test that donations are totalled by bucket and the cache sees new donations.
+        """
+        donor_id = add_donor("Ann Lee", "O-", "ann@example.com")
+        for date, blood_type, quantity in [("2023-10-02", "O-", 1), ("2023-10-03", "O-", 2), ("2023-10-03", "A+", 1), ("2023-11-20", "O-", 1)]:
+            mark_donation(donor_id, date, blood_type, quantity)
+        self.assertEqual(get_donation_buckets("2023-10-01", "2023-11-30", 'month'),
+                         [("2023-10-01", "A+", 1, 1), ("2023-10-01", "O-", 2, 3), ("2023-11-01", "O-", 1, 1)])
+        self.assertEqual(get_donation_buckets("2023-10-01", "2023-10-31", 'week'),
+                         [("2023-10-02", "A+", 1, 1), ("2023-10-02", "O-", 2, 3)])
+        self.assertEqual(get_donation_buckets("2023-10-01", "2023-11-30", 30),
+                         [("2023-10-01", "A+", 1, 1), ("2023-10-01", "O-", 2, 3), ("2023-10-31", "O-", 1, 1)])
+        daily_rows = [("2023-10-02", "O-", 1, 1), ("2023-10-03", "O-", 1, 2), ("2023-10-03", "A+", 1, 1), ("2023-11-20", "O-", 1, 1)]
+        self.assertEqual(bin_donations(daily_rows, "2023-10-01", 30), bin_donations(daily_rows, "2023-10-01", 30, use_numpy=False))
+        mark_donation(donor_id, "2023-11-21", "O-", 1)
+        self.assertEqual(get_donation_buckets("2023-10-01", "2023-11-30", 'month')[-1], ("2023-11-01", "O-", 2, 2))
+        self.assertRaises(ValueError, get_donation_buckets, "2023-10-01", "2023-11-30", 'year')
+
+    def test_startup_defers_heavy_imports(self):
+        """
+        Test that importing the module skips the lazy modules.
+        """
+        results = benchmark_startup()
+        self.assertFalse(results["window"])
+        self.assertEqual(results["lazy_modules_loaded"], [])
+
+    def test_startup_window_defers_heavy_imports(self):
+        """
+        Test that opening the main window skips the lazy modules.
+        """
+        if not has_display():
+            self.skipTest("no display to open the main window on")
+        results = benchmark_startup(window=True)
+        self.assertTrue(results["window"])
+        self.assertEqual(results["lazy_modules_loaded"], [])
+
+    def test_replicate_ships_only_new_changes(self):
+        """
+        Test that replicas catch up from the change log, directly and through a file.
+        """
+        def snapshot(db_path):
+            conn = sqlite3.connect(db_path)
+            rows = [conn.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY id").fetchall()
+                    for table, columns in REPLICATED_TABLES.items()]
+            conn.close()
+            return rows
+
+        donor_id = add_donor("Ann Lee", "O-", "ann@example.com")
+        mark_donation(donor_id, "2023-10-01", "O-", 2)
+        replica = os.path.join(self.tmpdir.name, "replica.db")
+        applied = replicate(replica)
+        self.assertEqual(snapshot(replica), snapshot(blood_bank.DB_PATH))
+
+        update_donor(donor_id, "Ann Lee", "O-", "ann.lee@example.com")
+        with InventoryRepository() as inventory:
+            inventory.issue("O-", 1, "2023-10-02")
+        delete_donation(1)
+        self.assertEqual(replicate(replica), 4)
+        self.assertEqual(replicate(replica), 0)
+        self.assertEqual(snapshot(replica), snapshot(blood_bank.DB_PATH))
+        self.assertEqual(get_stock_levels("2023-10-02", replica), get_stock_levels("2023-10-02"))
+
+        changes = os.path.join(self.tmpdir.name, "changes.jsonl.gz")
+        self.assertEqual(export_changes(changes), applied + 4)
+        remote = os.path.join(self.tmpdir.name, "remote.db")
+        self.assertEqual(import_changes(changes, remote), applied + 4)
+        self.assertEqual(import_changes(changes, remote), 0)
+        self.assertEqual(snapshot(remote), snapshot(blood_bank.DB_PATH))
+        self.assertEqual(prune_change_log(get_replica_seq(replica)), applied + 4)
+        self.assertEqual(get_changes(), [])
+
+    def test_validate_date(self):
+        """
+        Test date validation.
+        """
+        self.assertTrue(validate_date("2023-10-01"))
+        self.assertFalse(validate_date("01-10-2023"))
+
+    def test_register_user(self):
+        """
+        Test registering a user.
+        """
+        register_user("admin", "password123", "admin")
+        self.c.execute("SELECT * FROM users WHERE username = ? AND role = ?", ("admin", "admin"))
+        user = self.c.fetchone()
+        self.assertIsNotNone(user)
+
+    def test_login_user(self):
+        """
+        Test logging in a user.
+        """
+        register_user("staff", "password123", "staff")
+        user = login_user("staff", "password123")
+        self.assertIsNotNone(user)
+        self.assertEqual(user[2], "staff")
+
+    def test_unknown_user_is_checked_with_the_current_hasher(self):
+        """
+        Test that unknown usernames are checked against a dummy hash from the current hasher, even after it changes.
+        """
+        self.addCleanup(setattr, passwords, 'PASSWORD_HASHER', passwords.PASSWORD_HASHER)
+        for hasher in (PBKDF2Hasher(iterations=1000), ScryptHasher(n=2 ** 10)):
+            passwords.PASSWORD_HASHER = hasher
+            self.assertIsNone(login_user("nobody", "password123"))
+            self.assertIs(identify_hasher(passwords._dummy_hash), passwords.PASSWORD_HASHERS[hasher.algorithm])
+            self.assertFalse(hasher.needs_rehash(passwords._dummy_hash))
+
+    def test_password_hashes_are_salted(self):
+        """
+        Test that password hashes are salted, encode their parameters and verify.
+        """
+        for hasher in (PBKDF2Hasher(iterations=1000), ScryptHasher(n=2 ** 10)):
+            first, second = hasher.hash("password123"), hasher.hash("password123")
+            self.assertNotEqual(first, second)
+            self.assertTrue(first.startswith(hasher.algorithm + "$"))
+            self.assertTrue(identify_hasher(first).verify("password123", first))
+            self.assertFalse(identify_hasher(first).verify("password124", first))
+
+    def test_legacy_hash_needs_rehash(self):
+        """
+        Test that unsalted SHA-256 hashes still verify and are marked for upgrade.
+        """
+        legacy_hash = hashlib.sha256(b"password123").hexdigest()
+        self.assertEqual(verify_password("password123", legacy_hash), (True, True))
+        self.assertEqual(verify_password("password124", legacy_hash), (False, False))
+        self.assertFalse(passwords.PASSWORD_HASHER.needs_rehash(hash_password("password123")))
+
+    def test_inventory_issues_first_expiring_lots(self):
+        """
+        Test that units are issued first-expiring-first-out and counted by expiry date.
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = os.path.join(tmpdir, 'blood_bank.db')
+            init_db(db_path)
+            inventory = InventoryIndex(db_path)
+            inventory.add_lot("A+", 5, "2023-10-10")
+            inventory.add_lot("A+", 3, "2023-10-05")
+            inventory.add_lot("A+", 4, "2023-09-30")
+            inventory.add_lot("B+", 2, "2023-10-20")
+            self.assertEqual(inventory.available("A+", "2023-10-01"), 8)
+            self.assertEqual(inventory.available("A+", "2023-10-06"), 5)
+            self.assertEqual(inventory.available("O-", "2023-10-01"), 0)
+
+            self.assertEqual(inventory.allocate("A+", 4, "2023-10-01"), [(2, 3, "2023-10-05"), (1, 1, "2023-10-10")])
+            self.assertRaises(ValueError, inventory.allocate, "A+", 5, "2023-10-01")
+            self.assertEqual(inventory.available("A+", "2023-10-01"), 4)
+
+            conn = sqlite3.connect(db_path)
+            rows = conn.execute("SELECT id, quantity FROM inventory WHERE blood_type = 'A+' ORDER BY id").fetchall()
+            plan = " | ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN DELETE FROM inventory WHERE blood_type = ? AND expiration_date < ?", ("A+", "2023-10-01")))
+            conn.close()
+            self.assertEqual(rows, [(1, 4), (3, 4)])
+            self.assertIn("idx_inventory_type_expiry (blood_type=? AND expiration_date<?)", plan)
+
+            self.assertEqual(InventoryIndex(db_path).available("A+", "2023-01-01"), 8)
+            self.assertEqual(inventory.discard_expired("2023-10-01"), 4)
+            self.assertEqual(inventory.available("A+", "2023-01-01"), 4)
+
+    def test_compatibility_masks(self):
+        """
+        Test the donor types each recipient type can receive.
+        """
+        self.assertEqual(compatible_donor_types("O-"), ["O-"])
+        self.assertEqual(compatible_donor_types("A+"), ["O-", "O+", "A-", "A+"])
+        self.assertEqual(compatible_donor_types("B-"), ["O-", "B-"])
+        self.assertEqual(compatible_donor_types("AB+"), BLOOD_TYPES)
+        self.assertRaises(ValueError, compatible_donor_types, "C+")
+
+    def test_find_compatible_blood(self):
+        """
+        Test that compatible lots come soonest-expiring first and donors longest-rested first.
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = os.path.join(tmpdir, 'blood_bank.db')
+            init_db(db_path)
+            conn = sqlite3.connect(db_path)
+            c = conn.cursor()
+            c.executemany("INSERT INTO donors (name, blood_type, contact) VALUES (?, ?, ?)",
+                          [("Ann", "O-", "ann@example.com"), ("Bob", "A+", "bob@example.com"), ("Cy", "B+", "cy@example.com"),
+                           ("Di", "A-", "di@example.com"), ("Ed", "O+", "ed@example.com")])
+            c.executemany("INSERT INTO donations (donor_id, blood_type, quantity, date) VALUES (?, ?, 1, ?)",
+                          [(1, "O-", "2023-09-01"), (2, "A+", "2023-05-01"), (2, "A+", "2023-06-01"), (3, "B+", "2023-01-01"), (4, "A-", "2023-01-01")])
+            c.execute("DELETE FROM donations WHERE donor_id = 4")
+            c.executemany("INSERT INTO inventory (blood_type, quantity, expiration_date) VALUES (?, ?, ?)",
+                          [("A+", 2, "2023-10-20"), ("O-", 1, "2023-10-10"), ("B+", 3, "2023-10-05"), ("O+", 1, "2023-09-01")])
+            conn.commit()
+            plan = " | ".join(row[3] for row in c.execute("EXPLAIN QUERY PLAN SELECT id FROM donors WHERE blood_type = ? AND (last_donation_date IS NULL OR last_donation_date <= ?) ORDER BY last_donation_date LIMIT ?", ("A+", "2023-08-20", 10)))
+            conn.close()
+
+            self.assertEqual(find_compatible_inventory("A+", "2023-10-01", db_path=db_path), [(2, "O-", 1, "2023-10-10"), (1, "A+", 2, "2023-10-20")])
+            donors = find_eligible_donors("A+", "2023-10-15", db_path=db_path)
+            self.assertEqual([(donor[1], donor[4]) for donor in donors], [("Di", None), ("Ed", None), ("Bob", "2023-06-01")])
+            self.assertEqual(len(find_eligible_donors("AB+", "2023-10-15", limit=2, db_path=db_path)), 2)
+            self.assertIn("idx_donors_type_last_donation (blood_type=?)", plan)
+            self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_stock_levels_follow_changes(self):
+        """
+        Test that the stock dashboard matches the inventory and donations after changes.
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = os.path.join(tmpdir, 'blood_bank.db')
+            init_db(db_path)
+            inventory = InventoryIndex(db_path)
+            inventory.add_lot("A+", 5, "2023-10-01")
+            inventory.add_lot("A+", 3, "2023-10-03")
+            inventory.add_lot("A+", 2, "2023-10-03")
+            inventory.add_lot("O-", 4, "2023-10-08")
+            inventory.add_lot("B+", 6, "2023-09-30")
+            inventory.allocate("A+", 6, "2023-10-01")
+            conn = sqlite3.connect(db_path)
+            c = conn.cursor()
+            c.executemany("INSERT INTO donations (donor_id, blood_type, quantity, date) VALUES (?, ?, ?, ?)",
+                          [(1, "A+", 1, "2023-09-01"), (2, "A+", 2, "2023-09-02"), (3, "O-", 1, "2023-09-03")])
+            c.execute("UPDATE donations SET blood_type = 'B+' WHERE id = 3")
+            c.execute("DELETE FROM donations WHERE id = 1")
+            conn.commit()
+            conn.close()
+
+            levels = {row[0]: row[1:] for row in get_stock_levels("2023-10-01", db_path)}
+            self.assertEqual(levels["A+"], (4, 0, 4, 4, 1, 2))
+            self.assertEqual(levels["O-"], (4, 0, 0, 0, 0, 0))
+            self.assertEqual(levels["B+"], (0, 0, 0, 0, 1, 1))
+            self.assertEqual(len(levels), len(BLOOD_TYPES))
+
+    def test_sync_treeview_patches_rows(self):
+        """
+        Test that only changed rows are inserted, updated, moved or deleted.
+        """
+        class RecordingTreeview:
+            def __init__(self):
+                self.items = []
+                self.calls = []
+            def insert(self, parent, index, iid, values):
+                self.items.insert(index, iid)
+                self.calls.append(("insert", iid))
+            def item(self, iid, values):
+                self.calls.append(("item", iid))
+            def delete(self, iid):
+                self.items.remove(iid)
+                self.calls.append(("delete", iid))
+            def move(self, iid, parent, index):
+                self.items.remove(iid)
+                self.items.insert(index, iid)
+            def get_children(self):
+                return tuple(self.items)
+
+        tree = RecordingTreeview()
+        sync_treeview(tree, [(1, "a"), (2, "b"), (3, "c")])
+        tree.calls.clear()
+        sync_treeview(tree, [(1, "a"), (3, "z"), (4, "d")])
+        self.assertEqual(tree.calls, [("delete", "2"), ("item", "3"), ("insert", "4")])
+        self.assertEqual(tree.get_children(), ("1", "3", "4"))
+        sync_treeview(tree, [(4, "d"), (1, "a")])
+        self.assertEqual(tree.get_children(), ("4", "1"))
+
+    def test_recall_batches_by_next_eligible_date(self):
+        """
+        Test that recall reminders go to donors who become eligible in the window.
+        """
+        class QueueingDispatcher:
+            batch_size = 2
+            def __init__(self):
+                self.sent = []
+            def send(self, to_email, subject, body):
+                self.sent.append(to_email)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = os.path.join(tmpdir, 'blood_bank.db')
+            init_db(db_path)
+            conn = sqlite3.connect(db_path)
+            c = conn.cursor()
+            c.executemany("INSERT INTO donors (name, blood_type, contact) VALUES (?, ?, ?)",
+                          [("Ann", "O-", "ann@example.com"), ("Bob", "A+", "bob@example.com"), ("Cy", "B+", "555-0100"),
+                           ("Di", "A-", "di@example.com"), ("Ed", "O+", "ed@example.com")])
+            c.executemany("INSERT INTO donations (donor_id, blood_type, quantity, date) VALUES (?, ?, 1, ?)",
+                          [(1, "O-", "2023-08-10"), (2, "A+", "2023-08-01"), (2, "A+", "2023-08-20"), (3, "B+", "2023-08-12"), (4, "A-", "2023-09-30")])
+            conn.commit()
+            self.assertEqual(c.execute("SELECT next_eligible_date FROM donors WHERE id = 2").fetchone()[0], "2023-10-15")
+            plan = " | ".join(row[3] for row in c.execute("EXPLAIN QUERY PLAN SELECT id FROM donors WHERE next_eligible_date BETWEEN ? AND ? ORDER BY next_eligible_date, id", ("2023-10-01", "2023-10-31")))
+            conn.close()
+
+            batches = list(get_recall_batches("2023-10-01", "2023-10-31", batch_size=2, db_path=db_path))
+            self.assertEqual([[donor[0] for donor in batch] for batch in batches], [[1, 3], [2]])
+            dispatcher = QueueingDispatcher()
+            self.assertEqual(send_recall_reminders("2023-10-01", "2023-10-31", dispatcher, db_path), (2, 1))
+            self.assertEqual(dispatcher.sent, ["ann@example.com", "bob@example.com"])
+            self.assertIn("USING INDEX idx_donors_next_eligible", plan)
+
+    def test_two_indexes_never_over_issue(self):
+        """
+        Test that two indexes on one database can't issue the same units.
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = os.path.join(tmpdir, 'blood_bank.db')
+            init_db(db_path)
+            first = InventoryIndex(db_path)
+            first.add_lot("O-", 5, "2023-10-10")
+            second = InventoryIndex(db_path)
+            self.assertEqual(first.allocate("O-", 3, "2023-10-01"), [(1, 3, "2023-10-10")])
+            with self.assertLogs(level='WARNING'):
+                self.assertRaises(ValueError, second.allocate, "O-", 4, "2023-10-01")
+            self.assertEqual(second.available("O-", "2023-10-01"), 2)
+            self.assertEqual(second.allocate("O-", 2, "2023-10-01"), [(1, 2, "2023-10-10")])
+            with self.assertLogs(level='WARNING'):
+                self.assertRaises(ValueError, first.allocate, "O-", 1, "2023-10-01")
+
+            conn = sqlite3.connect(db_path)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM inventory").fetchone()[0], 0)
+            self.assertRaises(sqlite3.IntegrityError, conn.execute,
+                              "INSERT INTO inventory (blood_type, quantity, expiration_date) VALUES ('O-', -1, '2023-10-10')")
+            conn.close()
+
+    def test_import_donations_stocks_inventory(self):
+        """
+        Test that imported donations are stocked as inventory lots and bad rows are rejected.
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = os.path.join(tmpdir, 'blood_bank.db')
+            init_db(db_path)
+            conn = sqlite3.connect(db_path)
+            conn.executemany("INSERT INTO donors (name, blood_type, contact) VALUES (?, ?, ?)",
+                             [("Ann", "O-", "ann@example.com"), ("Sam", "A+", "sam1@example.com"), ("Sam", "B+", "sam2@example.com")])
+            conn.commit()
+            conn.close()
+            file_path = os.path.join(tmpdir, 'drive.csv')
+            with open(file_path, 'w', newline='') as file:
+                writer = csv.writer(file)
+                writer.writerow(["Donor Name", "Contact", "Blood Type", "Quantity", "Date"])
+                writer.writerows([["Ann", "", "O-", "1", "2023-10-01"], ["Sam", "sam2@example.com", "B+", "2", "2023-10-01"],
+                                  ["Sam", "", "A+", "1", "2023-10-01"], ["Zed", "", "A+", "1", "2023-10-01"],
+                                  ["Ann", "", "O-", "x", "2023-10-01"], ["Ann", "", "O-", "1", "2023-10-02"]])
+            inventory = InventoryIndex(db_path)
+            inventory.load = lambda: self.fail("the whole inventory was reloaded")
+            summary = import_donations_from_csv(file_path, chunk_size=2, db_path=db_path, inventory=inventory)
+
+            self.assertEqual(summary["imported"], 3)
+            self.assertEqual([line_number for line_number, row, reason in summary["rejected_rows"]], [4, 5, 6])
+            self.assertEqual(inventory.available("O-", "2023-11-12"), 2)
+            self.assertEqual(inventory.available("O-", "2023-11-13"), 1)
+            self.assertEqual(inventory.available("B+", "2023-10-01"), 2)
+            mark_donation(1, "2023-10-03", "O-", 1, db_path, inventory)
+            self.assertEqual(inventory.available("O-", "2023-11-14"), 1)
+            conn = sqlite3.connect(db_path)
+            donations = conn.execute("SELECT donor_id, blood_type, quantity, date FROM donations ORDER BY id").fetchall()
+            plan = " | ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN SELECT id FROM donors WHERE name = ? AND contact = ? LIMIT 2", ("Sam", "")))
+            conn.close()
+            self.assertEqual(donations, [(1, "O-", 1, "2023-10-01"), (3, "B+", 2, "2023-10-01"), (1, "O-", 1, "2023-10-02"), (1, "O-", 1, "2023-10-03")])
+            self.assertIn("idx_donors_name_contact (name=? AND contact=?)", plan)
+
+    def test_app_warns_about_invalid_input(self):
+        """
+        Test that the main window shows a warning, instead of raising, for values the database functions reject.
+        """
+        class FakeVar:
+            def __init__(self, value):
+                self.value = value
+            def get(self):
+                if isinstance(self.value, Exception):
+                    raise self.value
+                return self.value
+
+        warnings = []
+        for name, show in (('showwarning', lambda title, message: warnings.append(message)),
+                           ('showinfo', lambda title, message: self.fail(message))):
+            self.addCleanup(setattr, messagebox, name, getattr(messagebox, name))
+            setattr(messagebox, name, show)
+
+        app = BloodBankApp.__new__(BloodBankApp)
+        app.donor_name, app.blood_type, app.contact = FakeVar("A"), FakeVar("ZZ"), FakeVar("1")
+        app.donor_id, app.donation_id, app.date = FakeVar(1), FakeVar(1), FakeVar("2024-01-01")
+        app.quantity = FakeVar(tk.TclError('expected floating-point number but got "abc"'))
+        app.inventory = InventoryRepository()
+        for handler in (app.add_donor, app.update_donor, app.mark_donation, app.update_donation):
+            handler()
+        app.quantity = FakeVar(2)
+        app.update_donation()
+        self.assertEqual(len(warnings), 5, warnings)
+        self.assertIn("whole numbers", warnings[2])
+        self.assertIn("whole numbers", warnings[3])
+        for message in warnings[:2] + warnings[4:]:
+            self.assertIn("Invalid blood type", message)
+
+    def test_cli_imports_donors(self):
+        """
+        Test importing donors end to end through the command line interface.
+        """
+        file_path = os.path.join(self.tmpdir.name, 'donors.csv')
+        with open(file_path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(["Name", "Blood Type", "Contact"])
+            writer.writerows([["Ann", "O-", "ann@example.com"], ["Bob", "Q+", "bob@example.com"], ["Cy", "A+", "cy@example.com"]])
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            status = blood_bank_cli.main(["--db", blood_bank.DB_PATH, "import-donors", file_path])
+        self.assertEqual(status, 0)
+        self.assertRegex(stdout.getvalue(), r"Imported 2 rows in [0-9.]+s, rejected 1\.")
+        self.assertIn("Line 3:", stderr.getvalue())
+        self.c.execute("SELECT name FROM donors ORDER BY id")
+        self.assertEqual(self.c.fetchall(), [("Ann",), ("Cy",)])
+
+    def test_validate_email(self):
+        """
+        Test email validation.
+        """
+        self.assertTrue(validate_email("test@example.com"))
+        self.assertFalse(validate_email("invalid-email"))
+
@@ -1,10 +1,29 @@
 import tkinter as tk
 from tkinter import messagebox, simpledialog, ttk
 import sqlite3
+from array import array
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+import unittest
+
+# Database settings
+DB_PATH = 'ticket_booking.db'
+BUSY_TIMEOUT = 30  # seconds a seller waits for another seller's booking to commit
+
+# Seat map settings
+SEAT_FREE = 0  # seat states, one byte per seat; free must be 0 so runs of free seats are runs of zero bytes
+SEAT_HELD = 1
+SEAT_SOLD = 2
+HOLD_SECONDS = 600  # how long held seats stay reserved without being confirmed
+SWEEP_INTERVAL = 5  # seconds between passes of the hold expiry sweeper
 
 # Initialize the database
-def init_db():
-    conn = sqlite3.connect('ticket_booking.db')
+def init_db(db_path=DB_PATH):
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS events (
@@ -12,7 +31,8 @@ def init_db():
             name TEXT,
             date TEXT,
             venue TEXT,
-            capacity INTEGER
+            capacity INTEGER,
+            tickets_sold INTEGER NOT NULL DEFAULT 0
         )
     ''')
     cursor.execute('''
@@ -24,9 +44,395 @@ def init_db():
             FOREIGN KEY (event_id) REFERENCES events (event_id)
         )
     ''')
+    # Databases created before tickets_sold was kept get it backfilled from their bookings
+    if 'tickets_sold' not in [column[1] for column in cursor.execute('PRAGMA table_info(events)')]:
+        cursor.execute('ALTER TABLE events ADD COLUMN tickets_sold INTEGER NOT NULL DEFAULT 0')
+        cursor.execute('''
+            UPDATE events SET tickets_sold =
+                (SELECT COALESCE(SUM(num_tickets), 0) FROM bookings WHERE bookings.event_id = events.event_id)
+        ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_bookings_event_id ON bookings (event_id)')
+    # Seat states for seated events, row after row, one byte per seat
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS seat_maps (
+            event_id INTEGER PRIMARY KEY,
+            seats_per_row INTEGER NOT NULL,
+            seats BLOB NOT NULL,
+            FOREIGN KEY (event_id) REFERENCES events (event_id)
+        )
+    ''')
+    # Held seats as packed unsigned ints; booking_id is set once the hold is confirmed
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS seat_holds (
+            hold_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_id INTEGER,
+            customer_name TEXT,
+            seats BLOB NOT NULL,
+            expires_at REAL NOT NULL,
+            booking_id INTEGER,
+            FOREIGN KEY (event_id) REFERENCES events (event_id),
+            FOREIGN KEY (booking_id) REFERENCES bookings (booking_id)
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_seat_holds_expires_at ON seat_holds (expires_at) WHERE booking_id IS NULL')
     conn.commit()
+    # WAL lets reports read while sellers are booking
+    cursor.execute('PRAGMA journal_mode=WAL').fetchone()
     conn.close()
 
+# Function to open a connection for booking
+def connect(db_path=DB_PATH):
+    return sqlite3.connect(db_path, timeout=BUSY_TIMEOUT)
+
+# Function to book tickets without overselling. The seat count is claimed by one
+# conditional UPDATE on the event's tickets_sold counter inside BEGIN IMMEDIATE,
+# so concurrent sellers queue on the write lock instead of racing on a SUM over
+# the bookings. Returns the booking ID, or None when not enough tickets are left.
+def book_tickets(conn, event_id, customer_name, num_tickets):
+    num_tickets = int(num_tickets)
+    if num_tickets <= 0:
+        raise ValueError("The number of tickets must be positive")
+    cursor = conn.cursor()
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        cursor.execute('SELECT 1 FROM seat_maps WHERE event_id = ?', (event_id,))
+        if cursor.fetchone() is not None:
+            raise ValueError(f"Event {event_id} is seated; hold seats for it instead")
+        cursor.execute('UPDATE events SET tickets_sold = tickets_sold + ? WHERE event_id = ? AND tickets_sold + ? <= capacity',
+                       (num_tickets, event_id, num_tickets))
+        if cursor.rowcount == 0:
+            cursor.execute('SELECT 1 FROM events WHERE event_id = ?', (event_id,))
+            if cursor.fetchone() is None:
+                raise ValueError(f"No event with ID {event_id}")
+            conn.rollback()
+            return None
+        cursor.execute('INSERT INTO bookings (event_id, customer_name, num_tickets) VALUES (?, ?, ?)',
+                       (event_id, customer_name, num_tickets))
+        conn.commit()
+        return cursor.lastrowid
+    except Exception:
+        conn.rollback()
+        raise
+
+# Function to give an event a seat map; its capacity becomes the number of seats
+def create_seat_map(conn, event_id, rows, seats_per_row):
+    rows, seats_per_row = int(rows), int(seats_per_row)
+    if rows <= 0 or seats_per_row <= 0:
+        raise ValueError("The seat map needs at least one row of one seat")
+    with conn:
+        cursor = conn.execute('UPDATE events SET capacity = ? WHERE event_id = ? AND tickets_sold = 0',
+                              (rows * seats_per_row, event_id))
+        if cursor.rowcount == 0:
+            raise ValueError(f"No event with ID {event_id} that has no tickets sold")
+        conn.execute('INSERT INTO seat_maps (event_id, seats_per_row, seats) VALUES (?, ?, ?)',
+                     (event_id, seats_per_row, bytes(rows * seats_per_row)))
+
+# Function to read an event's seat map as (seat states, seats per row)
+def load_seat_map(cursor, event_id):
+    cursor.execute('SELECT seats, seats_per_row FROM seat_maps WHERE event_id = ?', (event_id,))
+    row = cursor.fetchone()
+    if row is None:
+        raise ValueError(f"Event {event_id} has no seat map")
+    return bytearray(row[0]), row[1]
+
+# Function to set seats to a state and write the seat map back
+def save_seats(cursor, event_id, seat_map, seats, state):
+    for seat in seats:
+        seat_map[seat] = state
+    cursor.execute('UPDATE seat_maps SET seats = ? WHERE event_id = ?', (bytes(seat_map), event_id))
+
+# Function to find the best block of contiguous free seats: the front-most row
+# with room, as near its centre as possible. Each row costs two C-level scans
+# (find and rfind for a run of zero bytes), so even a 50k-seat map is searched
+# in microseconds. Returns the seat indexes, or None when no row has room.
+def find_best_seats(seat_map, seats_per_row, num_seats):
+    if not 0 < num_seats <= seats_per_row:
+        return None
+    run = bytes(num_seats)
+    centre = (seats_per_row - num_seats) // 2
+    for row_start in range(0, len(seat_map), seats_per_row):
+        ideal = row_start + centre
+        right = seat_map.find(run, ideal, row_start + seats_per_row)
+        left = seat_map.rfind(run, row_start, ideal + num_seats)
+        starts = [start for start in (left, right) if start >= 0]
+        if starts:
+            start = min(starts, key=lambda start: abs(start - ideal))
+            return list(range(start, start + num_seats))
+    return None
+
+# Function to describe seats as rows and seat numbers counted from 1
+def describe_seats(seats, seats_per_row):
+    return ", ".join(f"row {seat // seats_per_row + 1} seat {seat % seats_per_row + 1}" for seat in seats)
+
+# Function to hold seats: the given seat indexes, or else the best block of
+# num_seats. Returns (hold ID, seats), or None when the seats are not free.
+def hold_seats(conn, event_id, customer_name, num_seats=0, seats=None, hold_seconds=HOLD_SECONDS):
+    cursor = conn.cursor()
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        seat_map, seats_per_row = load_seat_map(cursor, event_id)
+        if seats is None:
+            seats = find_best_seats(seat_map, seats_per_row, int(num_seats))
+        elif len(set(seats)) != len(seats) or any(not 0 <= seat < len(seat_map) or seat_map[seat] != SEAT_FREE for seat in seats):
+            seats = None
+        if not seats:
+            conn.rollback()
+            return None
+        save_seats(cursor, event_id, seat_map, seats, SEAT_HELD)
+        cursor.execute('INSERT INTO seat_holds (event_id, customer_name, seats, expires_at) VALUES (?, ?, ?, ?)',
+                       (event_id, customer_name, array('I', seats).tobytes(), time.time() + hold_seconds))
+        conn.commit()
+        return cursor.lastrowid, seats
+    except Exception:
+        conn.rollback()
+        raise
+
+# Function to turn a hold into a booking. Returns the booking ID, or None when
+# the hold has expired or does not exist.
+def confirm_hold(conn, hold_id):
+    cursor = conn.cursor()
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        cursor.execute('SELECT event_id, customer_name, seats, expires_at, booking_id FROM seat_holds WHERE hold_id = ?', (hold_id,))
+        row = cursor.fetchone()
+        if row is None:
+            conn.rollback()
+            return None
+        event_id, customer_name, packed_seats, expires_at, booking_id = row
+        if booking_id is not None or expires_at <= time.time():
+            conn.rollback()
+            return booking_id
+        seats = array('I')
+        seats.frombytes(packed_seats)
+        seat_map, _ = load_seat_map(cursor, event_id)
+        save_seats(cursor, event_id, seat_map, seats, SEAT_SOLD)
+        cursor.execute('UPDATE events SET tickets_sold = tickets_sold + ? WHERE event_id = ? AND tickets_sold + ? <= capacity',
+                       (len(seats), event_id, len(seats)))
+        if cursor.rowcount == 0:
+            raise ValueError(f"Event {event_id} has sold more tickets than it has seats")
+        cursor.execute('INSERT INTO bookings (event_id, customer_name, num_tickets) VALUES (?, ?, ?)',
+                       (event_id, customer_name, len(seats)))
+        booking_id = cursor.lastrowid
+        cursor.execute('UPDATE seat_holds SET booking_id = ? WHERE hold_id = ?', (booking_id, hold_id))
+        conn.commit()
+        return booking_id
+    except Exception:
+        conn.rollback()
+        raise
+
+# Function to give up a hold before it expires. Returns False if there was no
+# unconfirmed hold with that ID.
+def release_hold(conn, hold_id):
+    cursor = conn.cursor()
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        cursor.execute('SELECT event_id, seats FROM seat_holds WHERE hold_id = ? AND booking_id IS NULL', (hold_id,))
+        row = cursor.fetchone()
+        if row is None:
+            conn.rollback()
+            return False
+        seats = array('I')
+        seats.frombytes(row[1])
+        seat_map, _ = load_seat_map(cursor, row[0])
+        save_seats(cursor, row[0], seat_map, seats, SEAT_FREE)
+        cursor.execute('DELETE FROM seat_holds WHERE hold_id = ?', (hold_id,))
+        conn.commit()
+        return True
+    except Exception:
+        conn.rollback()
+        raise
+
+# Function to free the seats of every unconfirmed hold that has expired, each
+# event's seat map being read and written once. Returns the number of holds.
+# The write lock is only taken once a plain read on the partial expires_at
+# index has found an expired hold, so idle sweeps don't block the sellers.
+def expire_holds(conn, now=None):
+    now = time.time() if now is None else now
+    cursor = conn.cursor()
+    cursor.execute('SELECT 1 FROM seat_holds WHERE booking_id IS NULL AND expires_at <= ? LIMIT 1', (now,))
+    if cursor.fetchone() is None:
+        return 0
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        cursor.execute('SELECT hold_id, event_id, seats FROM seat_holds WHERE booking_id IS NULL AND expires_at <= ? ORDER BY event_id',
+                       (now,))
+        expired = cursor.fetchall()
+        seats_by_event = {}
+        for _, event_id, packed_seats in expired:
+            seats_by_event.setdefault(event_id, array('I')).frombytes(packed_seats)
+        for event_id, seats in seats_by_event.items():
+            seat_map, _ = load_seat_map(cursor, event_id)
+            save_seats(cursor, event_id, seat_map, seats, SEAT_FREE)
+        cursor.executemany('DELETE FROM seat_holds WHERE hold_id = ?', [(hold_id,) for hold_id, _, _ in expired])
+        conn.commit()
+        return len(expired)
+    except Exception:
+        conn.rollback()
+        raise
+
+# Background thread that expires holds every SWEEP_INTERVAL seconds
+class HoldSweeper(threading.Thread):
+    def __init__(self, db_path=DB_PATH, interval=SWEEP_INTERVAL):
+        super().__init__(name='hold-sweeper', daemon=True)
+        self.db_path = db_path
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.expired = 0
+
+    def run(self):
+        conn = connect(self.db_path)
+        while not self.stopped.wait(self.interval):
+            try:
+                self.expired += expire_holds(conn)
+            except sqlite3.OperationalError:
+                pass  # the database stayed locked; try again on the next pass
+        conn.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+# Function to benchmark the seat map on one event of rows x seats_per_row seats:
+# best-available search on an empty and a 95% sold map, concurrent holders
+# that confirm most holds and abandon the rest to the sweeper until the event
+# sells out, and one sweep of many expired holds. The final seat map is then
+# checked against the holds and the bookings.
+def seat_benchmark(rows=100, seats_per_row=500, holders=8, hold_seconds=0.2, sweep_interval=0.05, confirm_rate=0.8):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, 'ticket_booking.db')
+        init_db(db_path)
+        conn = connect(db_path)
+        events = []
+        for name in ('Seat benchmark', 'Sweep benchmark'):
+            events.append(conn.execute('INSERT INTO events (name, date, venue, capacity) VALUES (?, ?, ?, 0)',
+                                       (name, '2026-01-01', 'Arena')).lastrowid)
+            conn.commit()
+            create_seat_map(conn, events[-1], rows, seats_per_row)
+        event_id, sweep_event_id = events
+        total_seats = rows * seats_per_row
+        result = {"seats": total_seats}
+
+        # Search
+        rng = random.Random(0)
+        full_map = bytearray(rng.choices(bytes([SEAT_FREE, SEAT_SOLD]), weights=[5, 95], k=total_seats))
+        for name, seat_map in (("search_empty_us", bytearray(total_seats)), ("search_95_sold_us", full_map)):
+            start = time.perf_counter()
+            for _ in range(1000):
+                find_best_seats(seat_map, seats_per_row, 4)
+            result[name] = (time.perf_counter() - start) * 1000
+
+        # Concurrent holds, confirmations and expiry until the event sells out
+        sweeper = HoldSweeper(db_path, sweep_interval)
+        sweeper.start()
+        holds = [0] * holders
+        confirmed = [0] * holders
+
+        def holder(index):
+            holder_conn = connect(db_path)
+            holder_rng = random.Random(index)
+            while True:
+                hold = hold_seats(holder_conn, event_id, f"Customer {index}", holder_rng.randint(1, 6), hold_seconds=hold_seconds)
+                if hold is None:
+                    hold = hold_seats(holder_conn, event_id, f"Customer {index}", 1, hold_seconds=hold_seconds)
+                if hold is None:
+                    cursor = holder_conn.execute('SELECT COUNT(*) FROM seat_holds WHERE event_id = ? AND booking_id IS NULL', (event_id,))
+                    if cursor.fetchone()[0] == 0:
+                        break
+                    time.sleep(sweep_interval)
+                    continue
+                holds[index] += 1
+                if holder_rng.random() < confirm_rate and confirm_hold(holder_conn, hold[0]) is not None:
+                    confirmed[index] += 1
+            holder_conn.close()
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=holder, args=(index,)) for index in range(holders)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        sweeper.stop()
+        result.update({
+            "sell_out_s": elapsed,
+            "holds_per_sec": sum(holds) / elapsed,
+            "holds": sum(holds),
+            "confirmed": sum(confirmed),
+            "expired_by_sweeper": sweeper.expired,
+        })
+
+        # One sweep of many expired holds
+        hold_count = total_seats // 4
+        for hold_start in range(0, hold_count * 4, 4):
+            hold_seats(conn, sweep_event_id, "Sweep", seats=list(range(hold_start, hold_start + 4)), hold_seconds=0)
+        start = time.perf_counter()
+        swept = expire_holds(conn)
+        result["sweep_ms"] = (time.perf_counter() - start) * 1000
+        result["swept_holds"] = swept
+
+        # Check the seat map against the holds and the bookings
+        cursor = conn.cursor()
+        seat_map, _ = load_seat_map(cursor, event_id)
+        sold_seats = array('I')
+        for packed_seats, in cursor.execute('SELECT seats FROM seat_holds WHERE event_id = ? AND booking_id IS NOT NULL', (event_id,)):
+            sold_seats.frombytes(packed_seats)
+        tickets_sold, = cursor.execute('SELECT tickets_sold FROM events WHERE event_id = ?', (event_id,)).fetchone()
+        tickets_booked, = cursor.execute('SELECT SUM(num_tickets) FROM bookings WHERE event_id = ?', (event_id,)).fetchone()
+        conn.close()
+        result["consistent"] = (seat_map.count(SEAT_SOLD) == len(sold_seats) == len(set(sold_seats))
+                                == tickets_sold == tickets_booked == total_seats)
+    return result
+
+# Function to stress test booking: seller threads, each on its own connection,
+# book 1-4 tickets at a time until the demand well exceeds the capacity, then
+# the bookings are checked against the capacity and the counter
+def stress_test(capacity=10000, sellers=16, demand=3):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, 'ticket_booking.db')
+        init_db(db_path)
+        conn = connect(db_path)
+        event_id = conn.execute('INSERT INTO events (name, date, venue, capacity) VALUES (?, ?, ?, ?)',
+                                ('Stress test', '2026-01-01', 'Arena', capacity)).lastrowid
+        conn.commit()
+
+        booked = [0] * sellers
+        refused = [0] * sellers
+
+        def seller(index):
+            seller_conn = connect(db_path)
+            rng = random.Random(index)
+            requested = 0
+            while requested < capacity * demand / sellers:
+                num_tickets = rng.randint(1, 4)
+                requested += num_tickets
+                if book_tickets(seller_conn, event_id, f"Customer {index}", num_tickets) is None:
+                    refused[index] += 1
+                else:
+                    booked[index] += 1
+            seller_conn.close()
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=seller, args=(index,)) for index in range(sellers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        tickets_sold, = conn.execute('SELECT tickets_sold FROM events WHERE event_id = ?', (event_id,)).fetchone()
+        tickets_booked, = conn.execute('SELECT COALESCE(SUM(num_tickets), 0) FROM bookings WHERE event_id = ?', (event_id,)).fetchone()
+        conn.close()
+
+    return {
+        "attempts_per_sec": (sum(booked) + sum(refused)) / elapsed,
+        "bookings": sum(booked),
+        "refused": sum(refused),
+        "tickets_booked": tickets_booked,
+        "capacity": capacity,
+        "oversold": max(tickets_booked - capacity, 0),
+        "counter_matches_bookings": tickets_sold == tickets_booked,
+    }
+
 # Function to add an event
 def add_event():
     name = event_name_entry.get()
@@ -46,20 +452,80 @@ def book_ticket():
     event_id = booking_event_id_entry.get()
     customer_name = booking_customer_name_entry.get()
     num_tickets = booking_num_tickets_entry.get()
-    conn = sqlite3.connect('ticket_booking.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT capacity FROM events WHERE event_id = ?', (event_id,))
-    capacity = cursor.fetchone()[0]
-    cursor.execute('SELECT SUM(num_tickets) FROM bookings WHERE event_id = ?', (event_id,))
-    booked_tickets = cursor.fetchone()[0] or 0
-    if booked_tickets + int(num_tickets) <= capacity:
-        cursor.execute('INSERT INTO bookings (event_id, customer_name, num_tickets) VALUES (?, ?, ?)',
-                       (event_id, customer_name, num_tickets))
-        conn.commit()
+    conn = connect()
+    try:
+        booking_id = book_tickets(conn, event_id, customer_name, num_tickets)
+    except ValueError as e:
+        messagebox.showerror("Error", str(e))
+        return
+    finally:
         conn.close()
+    if booking_id is None:
+        messagebox.showerror("Error", "Not enough tickets available!")
+    else:
         messagebox.showinfo("Success", "Ticket booked successfully!")
+    clear_entries()
+
+# Function to give the event a seat map
+def add_seat_map():
+    conn = connect()
+    try:
+        create_seat_map(conn, seat_event_id_entry.get(), seat_rows_entry.get(), seat_seats_per_row_entry.get())
+    except (ValueError, sqlite3.IntegrityError) as e:
+        messagebox.showerror("Error", str(e))
+        return
+    finally:
+        conn.close()
+    messagebox.showinfo("Success", "Seat map created successfully!")
+    clear_entries()
+
+# Function to hold the best available seats
+def hold_best_seats():
+    conn = connect()
+    try:
+        event_id = seat_event_id_entry.get()
+        hold = hold_seats(conn, event_id, seat_customer_name_entry.get(), seat_num_seats_entry.get())
+        _, seats_per_row = load_seat_map(conn.cursor(), event_id)
+    except ValueError as e:
+        messagebox.showerror("Error", str(e))
+        return
+    finally:
+        conn.close()
+    if hold is None:
+        messagebox.showerror("Error", "No block of that many seats is available!")
+        return
+    hold_id, seats = hold
+    messagebox.showinfo("Seats Held", f"Hold ID: {hold_id}\n{describe_seats(seats, seats_per_row)}\n"
+                                      f"Confirm within {HOLD_SECONDS // 60} minutes.")
+    clear_entries()
+
+# Function to confirm a hold
+def confirm_seats():
+    conn = connect()
+    try:
+        booking_id = confirm_hold(conn, seat_hold_id_entry.get())
+    except ValueError as e:
+        messagebox.showerror("Error", str(e))
+        return
+    finally:
+        conn.close()
+    if booking_id is None:
+        messagebox.showerror("Error", "That hold has expired!")
     else:
-        messagebox.showerror("Error", "Not enough tickets available!")
+        messagebox.showinfo("Success", f"Seats booked successfully! Booking ID: {booking_id}")
+    clear_entries()
+
+# Function to release a hold
+def release_seats():
+    conn = connect()
+    try:
+        released = release_hold(conn, seat_hold_id_entry.get())
+    finally:
+        conn.close()
+    if released:
+        messagebox.showinfo("Success", "Seats released.")
+    else:
+        messagebox.showerror("Error", "No unconfirmed hold with that ID!")
     clear_entries()
 
 # Function to view all bookings
@@ -98,76 +564,248 @@ def clear_entries():
     booking_customer_name_entry.delete(0, tk.END)
     booking_num_tickets_entry.delete(0, tk.END)
     report_event_id_entry.delete(0, tk.END)
+    seat_event_id_entry.delete(0, tk.END)
+    seat_rows_entry.delete(0, tk.END)
+    seat_seats_per_row_entry.delete(0, tk.END)
+    seat_customer_name_entry.delete(0, tk.END)
+    seat_num_seats_entry.delete(0, tk.END)
+    seat_hold_id_entry.delete(0, tk.END)
 
-# Initialize the database
-init_db()
+# Unit tests for seat holds, run against a temporary database with one seated event
+class TestSeatHolds(unittest.TestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.db_path = os.path.join(tmpdir.name, 'ticket_booking.db')
+        init_db(self.db_path)
+        self.conn = connect(self.db_path)
+        self.addCleanup(self.conn.close)
+        self.event_id = self.conn.execute('INSERT INTO events (name, date, venue, capacity) VALUES (?, ?, ?, 0)',
+                                          ('Concert', '2026-01-01', 'Arena')).lastrowid
+        self.conn.commit()
+        create_seat_map(self.conn, self.event_id, 2, 10)
+
+    def seat_map(self):
+        return load_seat_map(self.conn.cursor(), self.event_id)[0]
+
+    def test_best_seats_are_centred(self):
+        self.assertEqual(find_best_seats(bytearray(10), 10, 4), [3, 4, 5, 6])
+        self.assertEqual(find_best_seats(bytearray(10), 10, 10), list(range(10)))
+        seat_map = bytearray(10)
+        seat_map[4] = SEAT_SOLD
+        self.assertEqual(find_best_seats(seat_map, 10, 3), [1, 2, 3])
+        seat_map[2] = SEAT_HELD
+        self.assertEqual(find_best_seats(seat_map, 10, 3), [5, 6, 7])
+
+    def test_best_seats_stay_within_a_row(self):
+        seat_map = bytearray(10)
+        seat_map[2] = SEAT_SOLD
+        # Seats 3-4 and 5-6 are free and adjacent in the map but on different rows
+        self.assertEqual(find_best_seats(seat_map, 5, 3), [6, 7, 8])
+        self.assertEqual(find_best_seats(seat_map, 5, 4), [5, 6, 7, 8])
+        self.assertIsNone(find_best_seats(seat_map, 5, 6))
+        self.assertIsNone(find_best_seats(seat_map, 5, 0))
+        self.assertIsNone(find_best_seats(bytearray([SEAT_SOLD]) * 10, 5, 1))
+
+    def test_held_seats_cannot_be_held_again(self):
+        hold_id, seats = hold_seats(self.conn, self.event_id, "Ann", 4)
+        self.assertEqual(seats, [3, 4, 5, 6])
+        self.assertIsNone(hold_seats(self.conn, self.event_id, "Bob", seats=[5]))
+        self.assertIsNone(hold_seats(self.conn, self.event_id, "Bob", seats=[7, 7]))
+        self.assertIsNone(hold_seats(self.conn, self.event_id, "Bob", seats=[20]))
+        self.assertEqual(hold_seats(self.conn, self.event_id, "Bob", 4)[1], [13, 14, 15, 16])
+        self.assertEqual(self.seat_map().count(SEAT_HELD), 8)
+
+    def test_confirming_twice_returns_the_same_booking(self):
+        hold_id, seats = hold_seats(self.conn, self.event_id, "Ann", 2)
+        booking_id = confirm_hold(self.conn, hold_id)
+        self.assertIsNotNone(booking_id)
+        self.assertEqual(confirm_hold(self.conn, hold_id), booking_id)
+        self.assertEqual(self.conn.execute('SELECT COUNT(*), SUM(num_tickets) FROM bookings').fetchone(), (1, 2))
+        self.assertEqual(self.conn.execute('SELECT tickets_sold FROM events').fetchone(), (2,))
+        self.assertEqual([self.seat_map()[seat] for seat in seats], [SEAT_SOLD, SEAT_SOLD])
+        self.assertFalse(release_hold(self.conn, hold_id))
+        self.assertIsNone(confirm_hold(self.conn, hold_id + 1))
+
+    def test_expired_holds_are_not_confirmed(self):
+        hold_id, _ = hold_seats(self.conn, self.event_id, "Ann", 2, hold_seconds=-1)
+        self.assertIsNone(confirm_hold(self.conn, hold_id))
+        self.assertEqual(self.conn.execute('SELECT COUNT(*) FROM bookings').fetchone(), (0,))
+
+    def test_release_frees_the_seats(self):
+        hold_id, _ = hold_seats(self.conn, self.event_id, "Ann", 2)
+        self.assertTrue(release_hold(self.conn, hold_id))
+        self.assertFalse(release_hold(self.conn, hold_id))
+        self.assertEqual(self.seat_map(), bytes(20))
+
+    def test_expire_holds_frees_the_seats(self):
+        hold_seats(self.conn, self.event_id, "Ann", 2, hold_seconds=-1)
+        hold_seats(self.conn, self.event_id, "Bob", 3, hold_seconds=-1)
+        kept, seats = hold_seats(self.conn, self.event_id, "Cy", 1)
+        self.assertEqual(expire_holds(self.conn), 2)
+        self.assertEqual(self.seat_map().count(SEAT_HELD), 1)
+        self.assertEqual(self.seat_map()[seats[0]], SEAT_HELD)
+        self.assertIsNotNone(confirm_hold(self.conn, kept))
+
+    def test_idle_sweep_does_not_take_the_write_lock(self):
+        hold_seats(self.conn, self.event_id, "Ann", 2)
+        seller = connect(self.db_path)
+        self.addCleanup(seller.close)
+        seller.execute('BEGIN IMMEDIATE')
+        sweeper_conn = sqlite3.connect(self.db_path, timeout=0)
+        self.addCleanup(sweeper_conn.close)
+        self.assertEqual(expire_holds(sweeper_conn), 0)
+        # With an expired hold the sweep needs the lock, and the seller still holds it
+        with self.assertRaises(sqlite3.OperationalError):
+            expire_holds(sweeper_conn, now=time.time() + HOLD_SECONDS + 1)
+        seller.rollback()
+
+    def test_sweeper_expires_holds_in_the_background(self):
+        hold_seats(self.conn, self.event_id, "Ann", 2, hold_seconds=-1)
+        sweeper = HoldSweeper(self.db_path, interval=0.01)
+        sweeper.start()
+        deadline = time.monotonic() + 5
+        while sweeper.expired == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        sweeper.stop()
+        self.assertEqual(sweeper.expired, 1)
+        self.assertEqual(self.seat_map(), bytes(20))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ticket booking system.")
+    commands = parser.add_subparsers(dest="command")
+    command = commands.add_parser("stress-test", help="book concurrently on a temporary database and check for overselling")
+    command.add_argument("--capacity", type=int, default=10000)
+    command.add_argument("--sellers", type=int, default=16)
+    command = commands.add_parser("seat-benchmark", help="time seat search, holds and expiry on a temporary database")
+    command.add_argument("--rows", type=int, default=100)
+    command.add_argument("--seats-per-row", type=int, default=500)
+    command.add_argument("--holders", type=int, default=8)
+    commands.add_parser("test", help="run the unit tests")
+    args = parser.parse_args()
+    if args.command == "test":
+        unittest.main(argv=parser.prog.split()[:1])
+    if args.command == "stress-test":
+        result = stress_test(args.capacity, args.sellers)
+        for name, value in result.items():
+            print(f"{name}\t{value:.1f}" if isinstance(value, float) else f"{name}\t{value}")
+        raise SystemExit(0 if result["oversold"] == 0 and result["counter_matches_bookings"] else 1)
+    if args.command == "seat-benchmark":
+        result = seat_benchmark(args.rows, args.seats_per_row, args.holders)
+        for name, value in result.items():
+            print(f"{name}\t{value:.1f}" if isinstance(value, float) else f"{name}\t{value}")
+        raise SystemExit(0 if result["consistent"] else 1)
+
+    # Initialize the database
+    init_db()
+    sweeper = HoldSweeper()
+    sweeper.start()
+
+    # Create the main window
+    root = tk.Tk()
+    root.title("Ticket Booking System")
+
+    # Create a notebook for tabs
+    notebook = ttk.Notebook(root)
+    notebook.pack(pady=10, expand=True)
+
+    # Create frames for each tab
+    event_frame = ttk.Frame(notebook)
+    booking_frame = ttk.Frame(notebook)
+    view_frame = ttk.Frame(notebook)
+    report_frame = ttk.Frame(notebook)
+    seat_frame = ttk.Frame(notebook)
+
+    notebook.add(event_frame, text='Add Event')
+    notebook.add(booking_frame, text='Book Ticket')
+    notebook.add(view_frame, text='View Bookings')
+    notebook.add(report_frame, text='Generate Report')
+    notebook.add(seat_frame, text='Seats')
+
+    # Event Frame
+    tk.Label(event_frame, text="Event Name:").grid(row=0, column=0, padx=10, pady=10)
+    event_name_entry = tk.Entry(event_frame)
+    event_name_entry.grid(row=0, column=1, padx=10, pady=10)
+
+    tk.Label(event_frame, text="Event Date:").grid(row=1, column=0, padx=10, pady=10)
+    event_date_entry = tk.Entry(event_frame)
+    event_date_entry.grid(row=1, column=1, padx=10, pady=10)
+
+    tk.Label(event_frame, text="Venue:").grid(row=2, column=0, padx=10, pady=10)
+    event_venue_entry = tk.Entry(event_frame)
+    event_venue_entry.grid(row=2, column=1, padx=10, pady=10)
+
+    tk.Label(event_frame, text="Capacity:").grid(row=3, column=0, padx=10, pady=10)
+    event_capacity_entry = tk.Entry(event_frame)
+    event_capacity_entry.grid(row=3, column=1, padx=10, pady=10)
+
+    add_event_button = tk.Button(event_frame, text="Add Event", command=add_event)
+    add_event_button.grid(row=4, column=0, columnspan=2, pady=10)
 
-# Create the main window
-root = tk.Tk()
-root.title("Ticket Booking System")
+    # Booking Frame
+    tk.Label(booking_frame, text="Event ID:").grid(row=0, column=0, padx=10, pady=10)
+    booking_event_id_entry = tk.Entry(booking_frame)
+    booking_event_id_entry.grid(row=0, column=1, padx=10, pady=10)
 
-# Create a notebook for tabs
-notebook = ttk.Notebook(root)
-notebook.pack(pady=10, expand=True)
+    tk.Label(booking_frame, text="Customer Name:").grid(row=1, column=0, padx=10, pady=10)
+    booking_customer_name_entry = tk.Entry(booking_frame)
+    booking_customer_name_entry.grid(row=1, column=1, padx=10, pady=10)
 
-# Create frames for each tab
-event_frame = ttk.Frame(notebook)
-booking_frame = ttk.Frame(notebook)
-view_frame = ttk.Frame(notebook)
-report_frame = ttk.Frame(notebook)
+    tk.Label(booking_frame, text="Number of Tickets:").grid(row=2, column=0, padx=10, pady=10)
+    booking_num_tickets_entry = tk.Entry(booking_frame)
+    booking_num_tickets_entry.grid(row=2, column=1, padx=10, pady=10)
 
-notebook.add(event_frame, text='Add Event')
-notebook.add(booking_frame, text='Book Ticket')
-notebook.add(view_frame, text='View Bookings')
-notebook.add(report_frame, text='Generate Report')
+    book_ticket_button = tk.Button(booking_frame, text="Book Ticket", command=book_ticket)
+    book_ticket_button.grid(row=3, column=0, columnspan=2, pady=10)
 
-# Event Frame
-tk.Label(event_frame, text="Event Name:").grid(row=0, column=0, padx=10, pady=10)
-event_name_entry = tk.Entry(event_frame)
-event_name_entry.grid(row=0, column=1, padx=10, pady=10)
+    # View Frame
+    view_bookings_button = tk.Button(view_frame, text="View All Bookings", command=view_bookings)
+    view_bookings_button.grid(row=0, column=0, columnspan=2, pady=10)
 
-tk.Label(event_frame, text="Event Date:").grid(row=1, column=0, padx=10, pady=10)
-event_date_entry = tk.Entry(event_frame)
-event_date_entry.grid(row=1, column=1, padx=10, pady=10)
+    # Report Frame
+    tk.Label(report_frame, text="Event ID:").grid(row=0, column=0, padx=10, pady=10)
+    report_event_id_entry = tk.Entry(report_frame)
+    report_event_id_entry.grid(row=0, column=1, padx=10, pady=10)
 
-tk.Label(event_frame, text="Venue:").grid(row=2, column=0, padx=10, pady=10)
-event_venue_entry = tk.Entry(event_frame)
-event_venue_entry.grid(row=2, column=1, padx=10, pady=10)
+    generate_report_button = tk.Button(report_frame, text="Generate Report", command=generate_report)
+    generate_report_button.grid(row=1, column=0, columnspan=2, pady=10)
 
-tk.Label(event_frame, text="Capacity:").grid(row=3, column=0, padx=10, pady=10)
-event_capacity_entry = tk.Entry(event_frame)
-event_capacity_entry.grid(row=3, column=1, padx=10, pady=10)
+    # Seat Frame
+    tk.Label(seat_frame, text="Event ID:").grid(row=0, column=0, padx=10, pady=10)
+    seat_event_id_entry = tk.Entry(seat_frame)
+    seat_event_id_entry.grid(row=0, column=1, padx=10, pady=10)
 
-add_event_button = tk.Button(event_frame, text="Add Event", command=add_event)
-add_event_button.grid(row=4, column=0, columnspan=2, pady=10)
+    tk.Label(seat_frame, text="Rows:").grid(row=1, column=0, padx=10, pady=10)
+    seat_rows_entry = tk.Entry(seat_frame)
+    seat_rows_entry.grid(row=1, column=1, padx=10, pady=10)
 
-# Booking Frame
-tk.Label(booking_frame, text="Event ID:").grid(row=0, column=0, padx=10, pady=10)
-booking_event_id_entry = tk.Entry(booking_frame)
-booking_event_id_entry.grid(row=0, column=1, padx=10, pady=10)
+    tk.Label(seat_frame, text="Seats per Row:").grid(row=2, column=0, padx=10, pady=10)
+    seat_seats_per_row_entry = tk.Entry(seat_frame)
+    seat_seats_per_row_entry.grid(row=2, column=1, padx=10, pady=10)
 
-tk.Label(booking_frame, text="Customer Name:").grid(row=1, column=0, padx=10, pady=10)
-booking_customer_name_entry = tk.Entry(booking_frame)
-booking_customer_name_entry.grid(row=1, column=1, padx=10, pady=10)
+    add_seat_map_button = tk.Button(seat_frame, text="Create Seat Map", command=add_seat_map)
+    add_seat_map_button.grid(row=3, column=0, columnspan=2, pady=10)
 
-tk.Label(booking_frame, text="Number of Tickets:").grid(row=2, column=0, padx=10, pady=10)
-booking_num_tickets_entry = tk.Entry(booking_frame)
-booking_num_tickets_entry.grid(row=2, column=1, padx=10, pady=10)
+    tk.Label(seat_frame, text="Customer Name:").grid(row=4, column=0, padx=10, pady=10)
+    seat_customer_name_entry = tk.Entry(seat_frame)
+    seat_customer_name_entry.grid(row=4, column=1, padx=10, pady=10)
 
-book_ticket_button = tk.Button(booking_frame, text="Book Ticket", command=book_ticket)
-book_ticket_button.grid(row=3, column=0, columnspan=2, pady=10)
+    tk.Label(seat_frame, text="Number of Seats:").grid(row=5, column=0, padx=10, pady=10)
+    seat_num_seats_entry = tk.Entry(seat_frame)
+    seat_num_seats_entry.grid(row=5, column=1, padx=10, pady=10)
 
-# View Frame
-view_bookings_button = tk.Button(view_frame, text="View All Bookings", command=view_bookings)
-view_bookings_button.grid(row=0, column=0, columnspan=2, pady=10)
+    hold_seats_button = tk.Button(seat_frame, text="Hold Best Seats", command=hold_best_seats)
+    hold_seats_button.grid(row=6, column=0, columnspan=2, pady=10)
 
-# Report Frame
-tk.Label(report_frame, text="Event ID:").grid(row=0, column=0, padx=10, pady=10)
-report_event_id_entry = tk.Entry(report_frame)
-report_event_id_entry.grid(row=0, column=1, padx=10, pady=10)
+    tk.Label(seat_frame, text="Hold ID:").grid(row=7, column=0, padx=10, pady=10)
+    seat_hold_id_entry = tk.Entry(seat_frame)
+    seat_hold_id_entry.grid(row=7, column=1, padx=10, pady=10)
 
-generate_report_button = tk.Button(report_frame, text="Generate Report", command=generate_report)
-generate_report_button.grid(row=1, column=0, columnspan=2, pady=10)
+    confirm_hold_button = tk.Button(seat_frame, text="Confirm Hold", command=confirm_seats)
+    confirm_hold_button.grid(row=8, column=0, pady=10)
+    release_hold_button = tk.Button(seat_frame, text="Release Hold", command=release_seats)
+    release_hold_button.grid(row=8, column=1, pady=10)
 
-# Run the application
-root.mainloop()
+    # Run the application
+    root.mainloop()
+    sweeper.stop()
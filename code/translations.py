@@ -0,0 +1,125 @@
+import logging
+import weakref
+
+# Translations shared by the applications. gettext is imported when the first
+# catalogue is loaded, and switching language relabels the widgets in place.
+# Each application sets text_domain to the name of its catalogues.
+
+# Translation settings
+DEFAULT_LANGUAGE = 'en'
+
+localedir = 'locales'
+text_domain = 'messages'
+current_language = DEFAULT_LANGUAGE
+_catalogs = {}
+_translations = {}
+_messages = {}
+_widget_messages = weakref.WeakKeyDictionary()  # only widgets that still exist keep their messages
+
+# Load a language's translation catalogue once
+def get_catalog(language):
+    """
+    Get the gettext catalogue for a language, reading it from disk only the first
+    time it is asked for.
+
+    Parameters:
+    language (str): The language code, such as 'fr'.
+
+    Returns:
+    gettext.NullTranslations: The catalogue, or a pass-through one if none is installed.
+    """
+    catalog = _catalogs.get(language)
+    if catalog is None:
+        import gettext
+        catalog = _catalogs[language] = gettext.translation(text_domain, localedir, languages=[language], fallback=True)
+    return catalog
+
+# Translate text into a language, remembering the result
+def translate(text, language=None):
+    """
+    Translate text, looking each message up in the catalogue only once per language.
+
+    Parameters:
+    text (str): The text to translate.
+    language (str): The language code, the current language by default.
+
+    Returns:
+    str: The translated text.
+    """
+    language = language or current_language
+    translations = _translations.setdefault(language, {})
+    translation = translations.get(text)
+    if translation is None:
+        translation = translations[text] = get_catalog(language).gettext(text)
+        _messages.setdefault(language, {})[translation] = text
+    return translation
+
+def _(text):
+    """
+    Translate text into the current language.
+
+    Parameters:
+    text (str): The text to translate.
+
+    Returns:
+    str: The translated text.
+    """
+    return translate(text)
+
+# Find the translatable labels under a widget
+def collect_labels(widget, labels=None):
+    """
+    List the window titles, widget texts and notebook tab texts under a widget,
+    each with the untranslated message it shows and a function that relabels it.
+
+    A label's message is remembered the first time it is seen, for as long as its
+    widget exists. Labels that the application has since changed to other text
+    are looked up again.
+
+    Parameters:
+    widget (tk.Misc): The window or widget to search.
+    labels (list): A list to add the labels to.
+
+    Returns:
+    list: (message, set_text) tuples.
+    """
+    if labels is None:
+        labels = []
+    found = []
+    if hasattr(widget, 'title'):
+        found.append(('title', widget.title(), widget.title))
+    if hasattr(widget, 'tabs'):
+        for tab in widget.tabs():
+            found.append((str(tab), widget.tab(tab, 'text'), lambda text, widget=widget, tab=tab: widget.tab(tab, text=text)))
+    options = widget.keys()
+    if 'text' in options and not ('textvariable' in options and str(widget.cget('textvariable'))):
+        found.append(('text', widget.cget('text'), lambda text, widget=widget: widget.configure(text=text)))
+    for part, shown, set_text in found:
+        if not shown:
+            continue
+        messages = _widget_messages.setdefault(widget, {})
+        message = messages.get(part)
+        if message is None or translate(message) != shown:
+            message = messages[part] = _messages.get(current_language, {}).get(shown, shown)
+        labels.append((message, set_text))
+    for child in widget.winfo_children():
+        collect_labels(child, labels)
+    return labels
+
+# Switch the application to another language
+def set_language(language, root=None):
+    """
+    Switch to another language and relabel the widgets under root in place,
+    instead of rebuilding the windows.
+
+    Parameters:
+    language (str): The language code, such as 'fr'.
+    root (tk.Misc): The window whose widgets should be relabelled.
+    """
+    global current_language
+    labels = collect_labels(root) if root is not None else []
+    get_catalog(language)
+    current_language = language
+    for message, set_text in labels:
+        set_text(translate(message))
+    logging.info(f"Language changed to {language}: {len(labels)} labels updated")
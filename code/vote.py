@@ -1,42 +1,371 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
 import sqlite3
+from collections import Counter
+from concurrent.futures import Future
 from datetime import datetime
+import argparse
+import hashlib
+import hmac
+import os
+import queue
+import random
+import tempfile
+import threading
+import time
+import unittest
+
+# Database settings
+DB_PATH = 'voting_system.db'
+
+# Vote ingestion settings
+VOTE_BATCH_SIZE = 500  # most votes written in one transaction
+VOTE_BATCH_MS = 20  # longest a vote waits for its batch to fill
+VOTE_POLL_MS = 10  # how often the GUI checks whether a vote has been written
+
+# Results settings
+TALLY_SHARDS = 16  # counter rows per candidate that writers spread their increments over
+STATION_ID_ENV = 'VOTE_STATION_ID'  # environment variable holding this polling station's number, 0 by default
+RESULTS_REFRESH_MS = 500  # how often the results panel picks up new votes
+
+# Audit settings
+AUDIT_CHUNK_SIZE = 10000  # votes fetched per round trip
+AUDIT_KEY_ENV = 'VOTE_AUDIT_KEY'  # environment variable holding the digest key
+AUDIT_MAX_LISTED = 100  # most duplicate voter IDs listed in an audit report
+AUDIT_MAX_BITMAP_BYTES = 64 * 1024 * 1024  # largest voter bitmap; wider voter ID ranges are tracked in a set
+
+# Vote outcomes
+VOTE_ACCEPTED = "Vote cast successfully"
+VOTE_ALREADY_CAST = "Voter has already voted"
+VOTE_UNKNOWN_VOTER = "No voter with that ID"
+VOTE_UNKNOWN_CANDIDATE = "No candidate with that ID"
 
 # Database setup
-conn = sqlite3.connect('voting_system.db')
-c = conn.cursor()
-
-c.execute('''CREATE TABLE IF NOT EXISTS voters (
-                voter_id INTEGER PRIMARY KEY,
-                name TEXT NOT NULL,
-                has_voted INTEGER DEFAULT 0)''')
-
-c.execute('''CREATE TABLE IF NOT EXISTS candidates (
-                candidate_id INTEGER PRIMARY KEY,
-                name TEXT NOT NULL,
-                vote_count INTEGER DEFAULT 0)''')
-
-c.execute('''CREATE TABLE IF NOT EXISTS votes (
-                vote_id INTEGER PRIMARY KEY,
-                voter_id INTEGER,
-                candidate_id INTEGER,
-                vote_time TEXT,
-                FOREIGN KEY(voter_id) REFERENCES voters(voter_id),
-                FOREIGN KEY(candidate_id) REFERENCES candidates(candidate_id))''')
-
-conn.commit()
-
-# GUI setup
-root = tk.Tk()
-root.title("Online Voting System")
-root.geometry("800x600")
-
-# Styles
-style = ttk.Style()
-style.configure("TButton", padding=6, relief="flat", background="#ccc", foreground="#000")
-style.configure("TLabel", padding=6, background="#fff", foreground="#000")
-style.configure("TFrame", padding=6, background="#fff")
+def init_db(db_path=DB_PATH):
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+
+    c.execute('''CREATE TABLE IF NOT EXISTS voters (
+                    voter_id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    has_voted INTEGER DEFAULT 0)''')
+
+    c.execute('''CREATE TABLE IF NOT EXISTS candidates (
+                    candidate_id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    vote_count INTEGER DEFAULT 0)''')
+
+    c.execute('''CREATE TABLE IF NOT EXISTS votes (
+                    vote_id INTEGER PRIMARY KEY,
+                    voter_id INTEGER,
+                    candidate_id INTEGER,
+                    vote_time TEXT,
+                    FOREIGN KEY(voter_id) REFERENCES voters(voter_id),
+                    FOREIGN KEY(candidate_id) REFERENCES candidates(candidate_id))''')
+
+    # Running totals since the last fold into candidates.vote_count, one row per station shard
+    c.execute('''CREATE TABLE IF NOT EXISTS candidate_tally_shards (
+                    candidate_id INTEGER,
+                    shard INTEGER,
+                    count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (candidate_id, shard),
+                    FOREIGN KEY(candidate_id) REFERENCES candidates(candidate_id)) WITHOUT ROWID''')
+
+    # WAL lets the results and registration screens read while votes are written
+    c.execute("PRAGMA journal_mode=WAL")
+    conn.commit()
+    return conn
+
+# Tallies: vote_count plus whatever has been added to the shards since the last fold
+def get_tallies(conn):
+    return conn.execute('''SELECT c.candidate_id, c.name, c.vote_count + COALESCE(SUM(s.count), 0)
+                            FROM candidates c LEFT JOIN candidate_tally_shards s ON s.candidate_id = c.candidate_id
+                            GROUP BY c.candidate_id ORDER BY c.candidate_id''').fetchall()
+
+# Move the shard totals into candidates.vote_count in one transaction
+def fold_tally_shards(conn):
+    with conn:
+        conn.execute('''UPDATE candidates SET vote_count = vote_count +
+                            (SELECT SUM(count) FROM candidate_tally_shards s WHERE s.candidate_id = candidates.candidate_id)
+                        WHERE candidate_id IN (SELECT candidate_id FROM candidate_tally_shards)''')
+        conn.execute("DELETE FROM candidate_tally_shards")
+
+# Cached tallies for the results panel, re-read only when another connection has committed
+class TallyCache:
+    def __init__(self, db_path=DB_PATH):
+        self.conn = sqlite3.connect(db_path)
+        self.data_version = None
+        self.tallies = {}
+
+    # Returns {candidate_id: (name, total)} for the candidates whose tally changed since the last refresh
+    def refresh(self):
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self.data_version:
+            return {}
+        self.data_version = data_version
+        changed = {}
+        for candidate_id, name, total in get_tallies(self.conn):
+            if self.tallies.get(candidate_id) != (name, total):
+                changed[candidate_id] = self.tallies[candidate_id] = (name, total)
+        return changed
+
+    def close(self):
+        self.conn.close()
+
+# The tally shard of this polling station. Stations whose numbers differ modulo
+# TALLY_SHARDS never increment the same row; ingestors on one station share its row
+def station_shard():
+    station = os.environ.get(STATION_ID_ENV, '0')
+    try:
+        return int(station) % TALLY_SHARDS
+    except ValueError:
+        raise ValueError(f"{STATION_ID_ENV} must be a whole number, not {station!r}") from None
+
+# Vote ingestion: votes are validated and written by one background thread in
+# group commits, one transaction per VOTE_BATCH_SIZE votes or VOTE_BATCH_MS.
+# Tallies go to the station's shard unless another shard is passed
+class VoteIngestor:
+    def __init__(self, db_path=DB_PATH, batch_size=VOTE_BATCH_SIZE, batch_ms=VOTE_BATCH_MS, shard=None):
+        self.db_path = db_path
+        self.shard = station_shard() if shard is None else shard % TALLY_SHARDS
+        self.batch_size = batch_size
+        self.batch_ms = batch_ms
+        self.queue = queue.Queue()
+        self.candidates = set()
+        self.batches = 0
+        self.thread = threading.Thread(target=self.run, name="vote-ingestor", daemon=True)
+        self.thread.start()
+
+    # Queue a vote; the returned Future resolves to one of the VOTE_* outcomes once written
+    def submit(self, voter_id, candidate_id, vote_time=None):
+        future = Future()
+        vote_time = vote_time or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.queue.put((voter_id, candidate_id, vote_time, future))
+        return future
+
+    # Write the queued votes and fold the tally shards, then stop the thread
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+    def run(self):
+        conn = sqlite3.connect(self.db_path)
+        self.candidates = {row[0] for row in conn.execute("SELECT candidate_id FROM candidates")}
+        stopping = False
+        while not stopping:
+            item = self.queue.get()
+            batch = []
+            deadline = time.monotonic() + self.batch_ms / 1000
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self.queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+            if item is None:
+                stopping = True
+            if batch:
+                self.write_batch(conn, batch)
+        try:
+            fold_tally_shards(conn)
+        except sqlite3.Error:
+            pass  # another connection holds the write lock; the shards are folded next time
+        conn.close()
+
+    def write_batch(self, conn, batch):
+        outcomes = []
+        votes = []
+        tallies = Counter()
+        try:
+            with conn:
+                for voter_id, candidate_id, vote_time, future in batch:
+                    if candidate_id not in self.candidates:
+                        if not conn.execute("SELECT 1 FROM candidates WHERE candidate_id = ?", (candidate_id,)).fetchone():
+                            outcomes.append((future, VOTE_UNKNOWN_CANDIDATE))
+                            continue
+                        self.candidates.add(candidate_id)
+                    # Only one vote can ever flip has_voted, whichever connection casts it
+                    if conn.execute("UPDATE voters SET has_voted = 1 WHERE voter_id = ? AND has_voted = 0", (voter_id,)).rowcount:
+                        votes.append((voter_id, candidate_id, vote_time))
+                        tallies[candidate_id] += 1
+                        outcomes.append((future, VOTE_ACCEPTED))
+                    elif conn.execute("SELECT 1 FROM voters WHERE voter_id = ?", (voter_id,)).fetchone():
+                        outcomes.append((future, VOTE_ALREADY_CAST))
+                    else:
+                        outcomes.append((future, VOTE_UNKNOWN_VOTER))
+                conn.executemany("INSERT INTO votes (voter_id, candidate_id, vote_time) VALUES (?, ?, ?)", votes)
+                conn.executemany('''INSERT INTO candidate_tally_shards (candidate_id, shard, count) VALUES (?, ?, ?)
+                                    ON CONFLICT (candidate_id, shard) DO UPDATE SET count = count + excluded.count''',
+                                 [(candidate_id, self.shard, count) for candidate_id, count in tallies.items()])
+        except sqlite3.Error as e:
+            for _, _, _, future in batch:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        for future, outcome in outcomes:
+            future.set_result(outcome)
+
+# Load generator: writer threads cast votes through one ingestor against a
+# temporary database, some voters trying twice, and the result is checked
+def load_test(n_voters=100000, n_candidates=10, writers=8, repeat_rate=0.05, batch_size=VOTE_BATCH_SIZE, batch_ms=VOTE_BATCH_MS):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, 'voting_system.db')
+        conn = init_db(db_path)
+        conn.executemany("INSERT INTO voters (name) VALUES (?)", ((f"Voter {i}",) for i in range(n_voters)))
+        conn.executemany("INSERT INTO candidates (name) VALUES (?)", ((f"Candidate {i}",) for i in range(n_candidates)))
+        conn.commit()
+
+        ingestor = VoteIngestor(db_path, batch_size, batch_ms)
+        futures = [[] for _ in range(writers)]
+
+        def writer(index):
+            rng = random.Random(index)
+            for voter_id in range(index + 1, n_voters + 1, writers):
+                futures[index].append(ingestor.submit(voter_id, rng.randint(1, n_candidates)))
+                if rng.random() < repeat_rate:
+                    futures[index].append(ingestor.submit(voter_id, rng.randint(1, n_candidates)))
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=writer, args=(index,)) for index in range(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        outcomes = Counter(future.result() for writer_futures in futures for future in writer_futures)
+        elapsed = time.perf_counter() - start
+        ingestor.close()
+
+        votes, voters = conn.execute("SELECT COUNT(*), COUNT(DISTINCT voter_id) FROM votes").fetchone()
+        tallied = sum(total for _, _, total in get_tallies(conn))
+        conn.close()
+
+    return {
+        "votes_per_sec": outcomes[VOTE_ACCEPTED] / elapsed,
+        "accepted": outcomes[VOTE_ACCEPTED],
+        "rejected_repeats": outcomes[VOTE_ALREADY_CAST],
+        "transactions": ingestor.batches,
+        "double_votes": votes - voters,
+        "tally_matches_ledger": tallied == votes == n_voters,
+    }
+
+# A set of voter IDs for the audit. IDs from low to high are marked in a bitmap,
+# one bit per ID, unless that range needs more than max_bytes, in which case they
+# are kept in a set. IDs outside the range, or that aren't integers, are never members
+class VoterIDs:
+    def __init__(self, low, high, max_bytes=AUDIT_MAX_BITMAP_BYTES):
+        self.low = low
+        self.high = high
+        size = (high - low) // 8 + 1
+        self.bitmap = bytearray(max(size, 0)) if size <= max_bytes else None
+        self.voters = set()
+
+    def in_range(self, voter_id):
+        return isinstance(voter_id, int) and self.low <= voter_id <= self.high
+
+    # Add a voter ID from the range; returns whether it was already a member
+    def add(self, voter_id):
+        if not self.in_range(voter_id):
+            raise ValueError(f"voter ID {voter_id!r} is outside {self.low}..{self.high}")
+        if self.bitmap is None:
+            if voter_id in self.voters:
+                return True
+            self.voters.add(voter_id)
+            return False
+        offset = voter_id - self.low
+        byte, mask = offset >> 3, 1 << (offset & 7)
+        if self.bitmap[byte] & mask:
+            return True
+        self.bitmap[byte] |= mask
+        return False
+
+    def __contains__(self, voter_id):
+        if not self.in_range(voter_id):
+            return False
+        if self.bitmap is None:
+            return voter_id in self.voters
+        offset = voter_id - self.low
+        return bool(self.bitmap[offset >> 3] & (1 << (offset & 7)))
+
+# Audit: recount the votes ledger in one pass, in vote_id order, and compare it
+# with the stored tallies. The registered voters are read into one VoterIDs and
+# the voters seen in the ledger into another, so memory stays at two bits per ID
+# between MIN(voter_id) and MAX(voter_id) however long the ledger is. A vote from
+# an ID with no voters row counts as an unknown voter, even inside that range.
+# The digest is an HMAC-SHA256 over every ledger row and the recount, so anyone
+# holding the key can confirm a later copy of the ledger matches.
+def audit_votes(key, db_path=DB_PATH, chunk_size=AUDIT_CHUNK_SIZE):
+    conn = sqlite3.connect(db_path)
+    try:
+        # One read transaction, so votes written during the audit are all left out
+        conn.execute("BEGIN")
+        low, high = conn.execute("SELECT MIN(voter_id), MAX(voter_id) FROM voters").fetchone()
+        if low is None:
+            low, high = 1, 0
+        registered = VoterIDs(low, high)
+        seen = VoterIDs(low, high)
+        cursor = conn.execute("SELECT voter_id FROM voters")
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            for voter_id, in rows:
+                registered.add(voter_id)
+        digest = hmac.new(key, digestmod=hashlib.sha256)
+        recount = Counter()
+        votes = duplicate_votes = unknown_voters = 0
+        duplicate_voters = []
+
+        cursor = conn.execute("SELECT vote_id, voter_id, candidate_id, vote_time FROM votes ORDER BY vote_id")
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            votes += len(rows)
+            digest.update("".join(f"{vote_id}|{voter_id}|{candidate_id}|{vote_time}\n"
+                                  for vote_id, voter_id, candidate_id, vote_time in rows).encode())
+            for _, voter_id, candidate_id, _ in rows:
+                recount[candidate_id] += 1
+                if voter_id not in registered:
+                    unknown_voters += 1
+                elif seen.add(voter_id):
+                    duplicate_votes += 1
+                    if len(duplicate_voters) < AUDIT_MAX_LISTED:
+                        duplicate_voters.append(voter_id)
+
+        # Voters whose has_voted flag disagrees with the ledger
+        has_voted_mismatches = 0
+        cursor = conn.execute("SELECT voter_id, has_voted FROM voters")
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            for voter_id, has_voted in rows:
+                if bool(has_voted) != (voter_id in seen):
+                    has_voted_mismatches += 1
+
+        stored = {candidate_id: total for candidate_id, _, total in get_tallies(conn)}
+        differences = {}
+        for candidate_id in sorted(set(stored) | set(recount), key=str):
+            digest.update(f"{candidate_id}={recount[candidate_id]}\n".encode())
+            if stored.get(candidate_id) != recount[candidate_id]:
+                differences[candidate_id] = (stored.get(candidate_id), recount[candidate_id])
+        conn.rollback()
+    finally:
+        conn.close()
+
+    return {
+        "votes": votes,
+        "tallies": dict(sorted(recount.items(), key=lambda item: str(item[0]))),
+        "differences": differences,
+        "duplicate_votes": duplicate_votes,
+        "duplicate_voters": duplicate_voters,
+        "unknown_voters": unknown_voters,
+        "has_voted_mismatches": has_voted_mismatches,
+        "clean": not (differences or duplicate_votes or unknown_voters or has_voted_mismatches),
+        "digest": digest.hexdigest(),
+    }
 
 # Functions
 def register_voter():
@@ -54,29 +383,48 @@ def register_candidate():
     clear_entries()
 
 def cast_vote():
-    voter_id = int(vote_voter_id_entry.get())
-    candidate_id = int(vote_candidate_id_entry.get())
-    vote_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    # Check if the voter has already voted
-    c.execute("SELECT has_voted FROM voters WHERE voter_id = ?", (voter_id,))
-    has_voted = c.fetchone()[0]
-    if has_voted:
-        messagebox.showerror("Error", "Voter has already voted")
-    else:
-        c.execute("INSERT INTO votes (voter_id, candidate_id, vote_time) VALUES (?, ?, ?)", (voter_id, candidate_id, vote_time))
-        c.execute("UPDATE voters SET has_voted = 1 WHERE voter_id = ?", (voter_id,))
-        c.execute("UPDATE candidates SET vote_count = vote_count + 1 WHERE candidate_id = ?", (candidate_id,))
-        conn.commit()
-        messagebox.showinfo("Success", "Vote cast successfully")
+    try:
+        voter_id = int(vote_voter_id_entry.get())
+        candidate_id = int(vote_candidate_id_entry.get())
+    except ValueError:
+        messagebox.showerror("Error", "Please enter a numeric voter ID and candidate ID")
+        return
+    future = ingestor.submit(voter_id, candidate_id)
+    root.after(VOTE_POLL_MS, show_vote_outcome, future)
     clear_entries()
 
+def show_vote_outcome(future):
+    if not future.done():
+        root.after(VOTE_POLL_MS, show_vote_outcome, future)
+    elif future.exception():
+        messagebox.showerror("Error", f"The vote could not be saved: {future.exception()}")
+    elif future.result() == VOTE_ACCEPTED:
+        messagebox.showinfo("Success", VOTE_ACCEPTED)
+    else:
+        messagebox.showerror("Error", future.result())
+
 def show_results():
     results_text.delete(1.0, tk.END)
-    c.execute("SELECT name, vote_count FROM candidates")
-    results = c.fetchall()
-    for candidate in results:
-        results_text.insert(tk.END, f"Candidate: {candidate[0]}, Votes: {candidate[1]}\n")
+    result_lines.clear()
+    tally_cache.data_version = None
+    tally_cache.tallies.clear()
+    update_results()
+
+# Rewrite only the lines of candidates whose tally changed; new candidates are appended
+def update_results():
+    for candidate_id, (name, total) in tally_cache.refresh().items():
+        line = f"Candidate: {name}, Votes: {total}"
+        if candidate_id in result_lines:
+            index = result_lines[candidate_id]
+            results_text.delete(f"{index}.0", f"{index}.end")
+            results_text.insert(f"{index}.0", line)
+        else:
+            result_lines[candidate_id] = len(result_lines) + 1
+            results_text.insert(tk.END, line + "\n")
+
+def poll_results():
+    update_results()
+    root.after(RESULTS_REFRESH_MS, poll_results)
 
 def clear_entries():
     voter_name_entry.delete(0, tk.END)
@@ -84,51 +432,309 @@ def clear_entries():
     vote_voter_id_entry.delete(0, tk.END)
     vote_candidate_id_entry.delete(0, tk.END)
 
-# Frames
-register_voter_frame = ttk.LabelFrame(root, text="Register Voter")
-register_voter_frame.grid(row=0, column=0, padx=10, pady=10, sticky="ew")
+# Unit tests for the audit, run against a temporary database with faults injected into the ledger
+class TestVoteAudit(unittest.TestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.db_path = os.path.join(tmpdir.name, 'voting_system.db')
+        self.conn = init_db(self.db_path)
+        self.addCleanup(self.conn.close)
+        self.conn.executemany("INSERT INTO candidates (name) VALUES (?)", [("Alice",), ("Bob",)])
+        self.conn.commit()
+
+    # Register voters and cast one vote for each as the ingestor would
+    def cast(self, ballots):
+        self.conn.executemany("INSERT INTO voters (voter_id, name, has_voted) VALUES (?, ?, 1)",
+                              [(voter_id, f"Voter {voter_id}") for voter_id in ballots])
+        self.conn.executemany("INSERT INTO votes (voter_id, candidate_id, vote_time) VALUES (?, ?, '2024-01-01 00:00:00')",
+                              ballots.items())
+        for candidate_id in ballots.values():
+            self.conn.execute("UPDATE candidates SET vote_count = vote_count + 1 WHERE candidate_id = ?", (candidate_id,))
+        self.conn.commit()
+
+    # Add a vote to the ledger without touching the voter or the tallies
+    def inject_vote(self, voter_id, candidate_id=1):
+        self.conn.execute("INSERT INTO votes (voter_id, candidate_id, vote_time) VALUES (?, ?, '2024-01-01 00:00:00')",
+                          (voter_id, candidate_id))
+        self.conn.commit()
+
+    def test_clean_ledger(self):
+        self.cast({1: 1, 2: 2, 3: 1})
+        result = audit_votes(b"key", self.db_path, chunk_size=2)
+        self.assertTrue(result["clean"], result)
+        self.assertEqual(result["tallies"], {1: 2, 2: 1})
+        self.assertEqual(result["digest"], audit_votes(b"key", self.db_path)["digest"])
+
+    def test_voter_ids_outside_the_register_are_unknown(self):
+        self.cast({1: 1, 2: 2})
+        for voter_id in (-5, 0, 9 * 10 ** 18, "voter 2", None):
+            self.inject_vote(voter_id)
+        result = audit_votes(b"key", self.db_path)
+        self.assertEqual(result["unknown_voters"], 5)
+        self.assertEqual(result["duplicate_votes"], 0)
+        self.assertEqual(result["has_voted_mismatches"], 0)
+        self.assertEqual(result["differences"], {1: (1, 6)})
+        self.assertFalse(result["clean"])
+
+    def test_duplicates_and_mismatches(self):
+        self.cast({1: 1, 2: 2})
+        self.conn.execute("INSERT INTO voters (voter_id, name) VALUES (3, 'Voter 3')")
+        self.conn.execute("UPDATE voters SET has_voted = 1 WHERE voter_id = 3")
+        self.conn.execute("UPDATE candidates SET vote_count = 5 WHERE candidate_id = 2")
+        self.conn.commit()
+        self.inject_vote(2)
+        result = audit_votes(b"key", self.db_path)
+        self.assertEqual((result["duplicate_votes"], result["duplicate_voters"]), (1, [2]))
+        self.assertEqual(result["has_voted_mismatches"], 1)
+        self.assertEqual(result["differences"], {1: (1, 2), 2: (5, 1)})
+
+    def test_sparse_voter_ids_fall_back_to_a_set(self):
+        self.cast({-7: 1, 1: 2, 9 * 10 ** 18: 1})
+        self.inject_vote(9 * 10 ** 18)
+        self.assertIsNone(VoterIDs(-7, 9 * 10 ** 18).bitmap)
+        result = audit_votes(b"key", self.db_path)
+        self.assertEqual(result["duplicate_voters"], [9 * 10 ** 18])
+        self.assertEqual(result["unknown_voters"], 0)
+        self.assertEqual(result["has_voted_mismatches"], 0)
+
+    def test_gaps_in_the_register_are_unknown(self):
+        self.cast({1: 1, 3: 2})
+        self.inject_vote(2)
+        self.conn.execute("UPDATE candidates SET vote_count = vote_count + 1 WHERE candidate_id = 1")
+        self.conn.commit()
+        result = audit_votes(b"key", self.db_path)
+        self.assertEqual(result["unknown_voters"], 1)
+        self.assertEqual(result["differences"], {})
+        self.assertFalse(result["clean"])
+
+    def test_bitmap_covers_only_the_registered_range(self):
+        voters = VoterIDs(1000, 1015)
+        self.assertEqual(len(voters.bitmap), 2)
+        self.assertFalse(voters.add(1015))
+        self.assertTrue(voters.add(1015))
+        self.assertIn(1015, voters)
+        self.assertNotIn(1014, voters)
+        self.assertNotIn(999, voters)
+        self.assertNotIn(-1, voters)
+        with self.assertRaises(ValueError):
+            voters.add(999)
+
+# Unit tests for vote ingestion, each ingestor writing to a fixed shard
+class TestVoteIngestor(unittest.TestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.db_path = os.path.join(tmpdir.name, 'voting_system.db')
+        self.conn = init_db(self.db_path)
+        self.addCleanup(self.conn.close)
+        self.conn.executemany("INSERT INTO voters (name) VALUES (?)", [("Ann",), ("Bob",), ("Cy",)])
+        self.conn.executemany("INSERT INTO candidates (name) VALUES (?)", [("Alice",), ("Bob",)])
+        self.conn.commit()
+
+    # An ingestor that writes one batch once batch_size votes are queued
+    def ingestor(self, shard, batch_size=1):
+        ingestor = VoteIngestor(self.db_path, batch_size=batch_size, batch_ms=5000, shard=shard)
+        self.addCleanup(ingestor.close)
+        return ingestor
+
+    def test_outcomes(self):
+        ingestor = self.ingestor(shard=3, batch_size=5)
+        futures = [ingestor.submit(1, 1), ingestor.submit(2, 2), ingestor.submit(1, 2),
+                   ingestor.submit(99, 1), ingestor.submit(3, 99)]
+        outcomes = [future.result(timeout=5) for future in futures]
+        self.assertEqual(outcomes, [VOTE_ACCEPTED, VOTE_ACCEPTED, VOTE_ALREADY_CAST, VOTE_UNKNOWN_VOTER, VOTE_UNKNOWN_CANDIDATE])
+        self.assertEqual(ingestor.batches, 1)
+        self.assertEqual(self.conn.execute("SELECT voter_id, candidate_id FROM votes ORDER BY vote_id").fetchall(), [(1, 1), (2, 2)])
+        self.assertEqual(self.conn.execute("SELECT voter_id FROM voters WHERE has_voted").fetchall(), [(1,), (2,)])
+        self.assertEqual(self.conn.execute("SELECT candidate_id, shard, count FROM candidate_tally_shards").fetchall(),
+                         [(1, 3, 1), (2, 3, 1)])
+
+    def test_repeat_vote_on_another_connection(self):
+        first, second = self.ingestor(shard=0), self.ingestor(shard=1)
+        self.assertEqual(first.submit(1, 1).result(timeout=5), VOTE_ACCEPTED)
+        self.assertEqual(second.submit(1, 2).result(timeout=5), VOTE_ALREADY_CAST)
+        self.assertEqual(second.submit(2, 2).result(timeout=5), VOTE_ACCEPTED)
+        self.assertEqual(self.conn.execute("SELECT candidate_id, shard, count FROM candidate_tally_shards ORDER BY shard").fetchall(),
+                         [(1, 0, 1), (2, 1, 1)])
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM votes").fetchone(), (2,))
+
+    def test_failed_batch_fails_every_vote(self):
+        ingestor = self.ingestor(shard=0, batch_size=2)
+        self.conn.execute("DROP TABLE votes")
+        self.conn.commit()
+        futures = [ingestor.submit(2, 1), ingestor.submit(99, 1)]
+        for future in futures:
+            with self.assertRaises(sqlite3.Error):
+                future.result(timeout=5)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM voters WHERE has_voted").fetchone(), (0,))
+        self.assertEqual(ingestor.batches, 0)
+
+    def test_close_folds_the_shards(self):
+        ingestor = VoteIngestor(self.db_path, shard=5)
+        ingestor.submit(1, 2)
+        ingestor.close()
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM candidate_tally_shards").fetchone(), (0,))
+        self.assertEqual(self.conn.execute("SELECT vote_count FROM candidates ORDER BY candidate_id").fetchall(), [(0,), (1,)])
+
+# Unit tests for the sharded tallies and the results panel's cache
+class TestTallies(unittest.TestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.db_path = os.path.join(tmpdir.name, 'voting_system.db')
+        self.conn = init_db(self.db_path)
+        self.addCleanup(self.conn.close)
+        self.conn.executemany("INSERT INTO candidates (name, vote_count) VALUES (?, ?)", [("Alice", 10), ("Bob", 20), ("Cy", 0)])
+        self.conn.commit()
+
+    def add_to_shards(self, rows):
+        self.conn.executemany('''INSERT INTO candidate_tally_shards (candidate_id, shard, count) VALUES (?, ?, ?)
+                                  ON CONFLICT (candidate_id, shard) DO UPDATE SET count = count + excluded.count''', rows)
+        self.conn.commit()
+
+    def test_tallies_add_the_shards_before_and_after_a_fold(self):
+        self.add_to_shards([(1, 0, 2), (1, 7, 3), (2, 7, 1)])
+        expected = [(1, "Alice", 15), (2, "Bob", 21), (3, "Cy", 0)]
+        self.assertEqual(get_tallies(self.conn), expected)
+        fold_tally_shards(self.conn)
+        self.assertEqual(get_tallies(self.conn), expected)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM candidate_tally_shards").fetchone(), (0,))
+        self.assertEqual(self.conn.execute("SELECT vote_count FROM candidates ORDER BY candidate_id").fetchall(), [(15,), (21,), (0,)])
+        fold_tally_shards(self.conn)
+        self.assertEqual(get_tallies(self.conn), expected)
+
+    def test_cache_returns_only_changed_candidates(self):
+        cache = TallyCache(self.db_path)
+        self.addCleanup(cache.close)
+        self.assertEqual(cache.refresh(), {1: ("Alice", 10), 2: ("Bob", 20), 3: ("Cy", 0)})
+        self.assertEqual(cache.refresh(), {})
+        self.add_to_shards([(2, 4, 1)])
+        self.assertEqual(cache.refresh(), {2: ("Bob", 21)})
+        self.assertEqual(cache.refresh(), {})
+        # A fold commits but leaves every total as it was
+        fold_tally_shards(self.conn)
+        self.assertEqual(cache.refresh(), {})
+        self.conn.execute("INSERT INTO candidates (name) VALUES ('Dee')")
+        self.conn.commit()
+        self.assertEqual(cache.refresh(), {4: ("Dee", 0)})
+
+    def test_shard_comes_from_the_station(self):
+        saved = os.environ.pop(STATION_ID_ENV, None)
+        if saved is not None:
+            self.addCleanup(os.environ.__setitem__, STATION_ID_ENV, saved)
+        self.addCleanup(os.environ.pop, STATION_ID_ENV, None)
+        self.assertEqual(station_shard(), 0)
+        os.environ[STATION_ID_ENV] = str(TALLY_SHARDS + 2)
+        self.assertEqual(station_shard(), 2)
+        ingestor = VoteIngestor(self.db_path, shard=TALLY_SHARDS + 1)
+        self.addCleanup(ingestor.close)
+        self.assertEqual(ingestor.shard, 1)
+        os.environ[STATION_ID_ENV] = "north"
+        with self.assertRaises(ValueError):
+            station_shard()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Online voting system.")
+    commands = parser.add_subparsers(dest="command")
+    command = commands.add_parser("load-test", help="measure sustained votes/sec on a temporary database")
+    command.add_argument("--voters", type=int, default=100000)
+    command.add_argument("--candidates", type=int, default=10)
+    command.add_argument("--writers", type=int, default=8)
+    command.add_argument("--batch-size", type=int, default=VOTE_BATCH_SIZE)
+    command.add_argument("--batch-ms", type=int, default=VOTE_BATCH_MS)
+    command = commands.add_parser("audit", help=f"recount the votes ledger and sign the result with the key in ${AUDIT_KEY_ENV}")
+    command.add_argument("--db", default=DB_PATH)
+    command.add_argument("--key-file", help="read the digest key from this file instead")
+    command.add_argument("--chunk-size", type=int, default=AUDIT_CHUNK_SIZE)
+    commands.add_parser("test", help="run the unit tests")
+    args = parser.parse_args()
+    if args.command == "test":
+        unittest.main(argv=parser.prog.split()[:1])
+    if args.command == "load-test":
+        result = load_test(args.voters, args.candidates, args.writers, batch_size=args.batch_size, batch_ms=args.batch_ms)
+        for name, value in result.items():
+            print(f"{name}\t{value:.1f}" if isinstance(value, float) else f"{name}\t{value}")
+        raise SystemExit(0)
+    if args.command == "audit":
+        if args.key_file:
+            with open(args.key_file, 'rb') as file:
+                key = file.read().strip()
+        elif os.environ.get(AUDIT_KEY_ENV):
+            key = os.environ[AUDIT_KEY_ENV].encode()
+        else:
+            parser.error(f"set {AUDIT_KEY_ENV} or pass --key-file")
+        result = audit_votes(key, args.db, args.chunk_size)
+        for name, value in result.items():
+            print(f"{name}\t{value}")
+        raise SystemExit(0 if result["clean"] else 1)
+
+    # Database setup
+    conn = init_db()
+    c = conn.cursor()
+    ingestor = VoteIngestor()
+    tally_cache = TallyCache()
+    result_lines = {}
+
+    # GUI setup
+    root = tk.Tk()
+    root.title("Online Voting System")
+    root.geometry("800x600")
+
+    # Styles
+    style = ttk.Style()
+    style.configure("TButton", padding=6, relief="flat", background="#ccc", foreground="#000")
+    style.configure("TLabel", padding=6, background="#fff", foreground="#000")
+    style.configure("TFrame", padding=6, background="#fff")
+
+    # Frames
+    register_voter_frame = ttk.LabelFrame(root, text="Register Voter")
+    register_voter_frame.grid(row=0, column=0, padx=10, pady=10, sticky="ew")
 
-register_candidate_frame = ttk.LabelFrame(root, text="Register Candidate")
-register_candidate_frame.grid(row=1, column=0, padx=10, pady=10, sticky="ew")
+    register_candidate_frame = ttk.LabelFrame(root, text="Register Candidate")
+    register_candidate_frame.grid(row=1, column=0, padx=10, pady=10, sticky="ew")
 
-vote_frame = ttk.LabelFrame(root, text="Cast Vote")
-vote_frame.grid(row=2, column=0, padx=10, pady=10, sticky="ew")
+    vote_frame = ttk.LabelFrame(root, text="Cast Vote")
+    vote_frame.grid(row=2, column=0, padx=10, pady=10, sticky="ew")
 
-results_frame = ttk.LabelFrame(root, text="Results")
-results_frame.grid(row=3, column=0, padx=10, pady=10, sticky="ew")
+    results_frame = ttk.LabelFrame(root, text="Results")
+    results_frame.grid(row=3, column=0, padx=10, pady=10, sticky="ew")
 
-# Register Voter Frame
-ttk.Label(register_voter_frame, text="Name").grid(row=0, column=0, padx=5, pady=5)
-voter_name_entry = ttk.Entry(register_voter_frame)
-voter_name_entry.grid(row=0, column=1, padx=5, pady=5)
+    # Register Voter Frame
+    ttk.Label(register_voter_frame, text="Name").grid(row=0, column=0, padx=5, pady=5)
+    voter_name_entry = ttk.Entry(register_voter_frame)
+    voter_name_entry.grid(row=0, column=1, padx=5, pady=5)
 
-ttk.Button(register_voter_frame, text="Register Voter", command=register_voter).grid(row=1, column=0, columnspan=2, pady=5)
+    ttk.Button(register_voter_frame, text="Register Voter", command=register_voter).grid(row=1, column=0, columnspan=2, pady=5)
 
-# Register Candidate Frame
-ttk.Label(register_candidate_frame, text="Name").grid(row=0, column=0, padx=5, pady=5)
-candidate_name_entry = ttk.Entry(register_candidate_frame)
-candidate_name_entry.grid(row=0, column=1, padx=5, pady=5)
+    # Register Candidate Frame
+    ttk.Label(register_candidate_frame, text="Name").grid(row=0, column=0, padx=5, pady=5)
+    candidate_name_entry = ttk.Entry(register_candidate_frame)
+    candidate_name_entry.grid(row=0, column=1, padx=5, pady=5)
 
-ttk.Button(register_candidate_frame, text="Register Candidate", command=register_candidate).grid(row=1, column=0, columnspan=2, pady=5)
+    ttk.Button(register_candidate_frame, text="Register Candidate", command=register_candidate).grid(row=1, column=0, columnspan=2, pady=5)
 
-# Vote Frame
-ttk.Label(vote_frame, text="Voter ID").grid(row=0, column=0, padx=5, pady=5)
-vote_voter_id_entry = ttk.Entry(vote_frame)
-vote_voter_id_entry.grid(row=0, column=1, padx=5, pady=5)
+    # Vote Frame
+    ttk.Label(vote_frame, text="Voter ID").grid(row=0, column=0, padx=5, pady=5)
+    vote_voter_id_entry = ttk.Entry(vote_frame)
+    vote_voter_id_entry.grid(row=0, column=1, padx=5, pady=5)
 
-ttk.Label(vote_frame, text="Candidate ID").grid(row=1, column=0, padx=5, pady=5)
-vote_candidate_id_entry = ttk.Entry(vote_frame)
-vote_candidate_id_entry.grid(row=1, column=1, padx=5, pady=5)
+    ttk.Label(vote_frame, text="Candidate ID").grid(row=1, column=0, padx=5, pady=5)
+    vote_candidate_id_entry = ttk.Entry(vote_frame)
+    vote_candidate_id_entry.grid(row=1, column=1, padx=5, pady=5)
 
-ttk.Button(vote_frame, text="Cast Vote", command=cast_vote).grid(row=2, column=0, columnspan=2, pady=5)
+    ttk.Button(vote_frame, text="Cast Vote", command=cast_vote).grid(row=2, column=0, columnspan=2, pady=5)
 
-# Results Frame
-ttk.Button(results_frame, text="Show Results", command=show_results).grid(row=0, column=0, pady=5)
+    # Results Frame
+    ttk.Button(results_frame, text="Show Results", command=show_results).grid(row=0, column=0, pady=5)
 
-results_text = tk.Text(results_frame, height=10, width=50)
-results_text.grid(row=1, column=0, pady=5)
+    results_text = tk.Text(results_frame, height=10, width=50)
+    results_text.grid(row=1, column=0, pady=5)
+    poll_results()
 
-root.mainloop()
+    root.mainloop()
 
-# Close the database connection
-conn.close()
+    # Write any votes still queued, then close the database connection
+    ingestor.close()
+    tally_cache.close()
+    conn.close()